@@ -0,0 +1,38 @@
+"""Compare `AccountsCoder.decode` with the interpretive construct parse.
+
+Run from the repository root with `python benchmarks/accounts_coder.py`.
+"""
+from pathlib import Path
+from timeit import timeit
+
+from anchorpy import AccountsCoder, Idl
+from anchorpy.coder.common import _account_size
+
+IDLS_DIR = Path("tests/idls")
+MAX_ACCOUNT_SIZE = 10000
+# Variable-length types count as 1 byte in _account_size; pad so they decode.
+PADDING = 64
+
+
+def main() -> None:
+    print(f"{'account':<50} {'construct (us)':>15} {'compiled (us)':>15} {'x':>6}")
+    for path in sorted(IDLS_DIR.iterdir()):
+        if "spl_token" in path.name:
+            continue
+        idl = Idl.from_json(path.read_text())
+        coder = AccountsCoder(idl)
+        for acc in idl.accounts:
+            size = _account_size(idl, acc)
+            if size > MAX_ACCOUNT_SIZE:
+                continue
+            data = coder.acc_name_to_discriminator[acc.name] + bytes(size + PADDING)
+            number = max(10, 200000 // (size + 1))
+            slow = timeit(lambda: coder.parse(data).data, number=number) / number
+            fast = timeit(lambda: coder.decode(data), number=number) / number
+            name = f"{path.stem}.{acc.name}"
+            ratio = slow / fast
+            print(f"{name:<50} {slow * 1e6:>15.1f} {fast * 1e6:>15.1f} {ratio:>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
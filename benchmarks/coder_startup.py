@@ -0,0 +1,37 @@
+"""Time building a `Coder` and the account sizes of a `Program` for large IDLs.
+
+Run from the repository root with `python benchmarks/coder_startup.py`.
+"""
+from pathlib import Path
+from timeit import timeit
+
+from anchorpy import Idl
+from anchorpy.coder.coder import Coder
+from anchorpy.coder.common import _account_size, _type_index_cache
+
+IDLS = ("switchboard_v2.mainnet.06022022.json", "jet.json")
+NUMBER = 20
+
+
+def main() -> None:
+    print(f"{'idl':<40} {'Coder (ms)':>12} {'account sizes (ms)':>20}")
+    for name in IDLS:
+        idl = Idl.from_json((Path("tests/idls") / name).read_text())
+
+        def build_coder() -> None:
+            _type_index_cache.clear()
+            Coder(idl)
+
+        def account_sizes() -> None:
+            _type_index_cache.clear()
+            for acc in idl.accounts:
+                _account_size(idl, acc)
+
+        build_coder()  # warm the generated dataclass caches
+        coder_time = timeit(build_coder, number=NUMBER) / NUMBER
+        sizes_time = timeit(account_sizes, number=NUMBER) / NUMBER
+        print(f"{name:<40} {coder_time * 1e3:>12.2f} {sizes_time * 1e3:>20.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Compare `EventParser` with the previous split-based log classification.
+
+Also compares one `EventParser` per program with a `WorkspaceEventParser`.
+
+Run from the repository root with `python benchmarks/event_parser.py`.
+"""
+from pathlib import Path
+from timeit import timeit
+from typing import Optional, Tuple
+
+from anchorpy import EventParser, Idl, Program, WorkspaceEventParser
+from anchorpy.coder.coder import Coder
+from anchorpy.program.common import Event
+from anchorpy.program.event import (
+    PROGRAM_DATA,
+    PROGRAM_DATA_START_INDEX,
+    PROGRAM_LOG,
+    PROGRAM_LOG_START_INDEX,
+    _ExecutionContext,
+)
+from solders.pubkey import Pubkey
+
+PROGRAM_ID = Pubkey.from_string("2dhGsWUzy5YKUsjZdLHLmkNpUDAXkNa9MYWsPc4Ziqzy")
+OTHER_ID = Pubkey.from_string("TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA")
+EVENT = "Program data: YLjF84sCWpQFAAAAAAAAAAUAAABoZWxsbw=="
+NUMBER = 20
+WORKSPACE_PROGRAMS = 12
+
+
+class _SplitEventParser(EventParser):
+    """The classification used before the precompiled one, for comparison."""
+
+    def handle_log(
+        self, execution: _ExecutionContext, log: str
+    ) -> Tuple[Optional[Event], Optional[str], bool]:
+        if execution.stack and execution.program() == str(self.program_id):
+            return self.handle_program_log(log)
+        return (None, *self.handle_system_log(log))
+
+    def handle_program_log(
+        self, log: str
+    ) -> Tuple[Optional[Event], Optional[str], bool]:
+        if log.startswith(PROGRAM_LOG) or log.startswith(PROGRAM_DATA):
+            log_str = (
+                log[PROGRAM_LOG_START_INDEX:]
+                if log.startswith(PROGRAM_LOG)
+                else log[PROGRAM_DATA_START_INDEX:]
+            )
+            event = self.coder.events.decode(log_str, self._discriminators)
+            return event, None, False
+        return (None, *self.handle_system_log(log))
+
+    def handle_system_log(self, log: str) -> Tuple[Optional[str], bool]:
+        log_start = log.split(":")[0]
+        splitted = log_start.split(" ")
+        invoke_msg = f"Program {str(self.program_id)} invoke"
+        if len(splitted) == 3 and splitted[0] == "Program" and splitted[2] == "success":
+            return None, True
+        if log_start.startswith(invoke_msg):
+            return str(self.program_id), False
+        if "invoke" in log_start:
+            return "cpi", False
+        return None, False
+
+
+def _logs(events: int, messages: int, cpis: int) -> list[str]:
+    logs = [f"Program {PROGRAM_ID} invoke [1]", "Program log: Instruction: Crank"]
+    for _ in range(cpis):
+        logs += [
+            f"Program {OTHER_ID} invoke [2]",
+            "Program log: Instruction: Transfer",
+            f"Program {OTHER_ID} consumed 4645 of 185000 compute units",
+            f"Program {OTHER_ID} success",
+        ]
+    logs += ["Program log: processing order"] * messages
+    logs += [EVENT] * events
+    logs += [
+        f"Program {PROGRAM_ID} consumed 101019 of 200000 compute units",
+        f"Program {PROGRAM_ID} success",
+    ]
+    return logs
+
+
+def _time(parser: EventParser, logs: list[str]) -> float:
+    return timeit(lambda: list(parser.iter_events(logs)), number=NUMBER) / NUMBER
+
+
+def _workspace_logs(program_ids: list[Pubkey]) -> list[str]:
+    """Each program logs, emits an event and CPIs into the next."""
+    logs = []
+    for depth, program_id in enumerate(program_ids, start=1):
+        logs += [
+            f"Program {program_id} invoke [{depth}]",
+            "Program log: Instruction: Crank",
+            EVENT,
+        ]
+    for program_id in reversed(program_ids):
+        logs += [
+            EVENT,
+            f"Program {program_id} consumed 4645 of 185000 compute units",
+            f"Program {program_id} success",
+        ]
+    return logs * 5
+
+
+def _compare_workspace(coder: Coder) -> None:
+    program_ids = [Pubkey.new_unique() for _ in range(WORKSPACE_PROGRAMS)]
+    logs = _workspace_logs(program_ids)
+    parsers = [EventParser(program_id, coder) for program_id in program_ids]
+    workspace = WorkspaceEventParser((program_id, coder) for program_id in program_ids)
+    slow = sum(_time(parser, logs) for parser in parsers)
+    fast = timeit(lambda: list(workspace.iter_events([logs])), number=NUMBER) / NUMBER
+    print(
+        f"\n{WORKSPACE_PROGRAMS} programs, {len(logs)} lines: "
+        f"{slow * 1e6:.1f} us with one EventParser each, "
+        f"{fast * 1e6:.1f} us with WorkspaceEventParser ({slow / fast:.1f}x)"
+    )
+
+
+def main() -> None:
+    idl = Idl.from_json(Path("tests/idls/events.json").read_text())
+    coder = Program(idl, PROGRAM_ID).coder
+    cases = {
+        "events only": _logs(events=100, messages=0, cpis=0),
+        "msg! heavy": _logs(events=5, messages=200, cpis=0),
+        "cpi heavy": _logs(events=5, messages=10, cpis=50),
+        "near log limit": _logs(events=300, messages=300, cpis=100),
+    }
+    print(
+        f"{'logs':<20} {'lines':>6} {'split (us)':>12} {'compiled (us)':>14} {'x':>6}"
+    )
+    for name, logs in cases.items():
+        parsers = [
+            parser_cls(PROGRAM_ID, coder)
+            for parser_cls in (_SplitEventParser, EventParser)
+        ]
+        slow, fast = (_time(parser, logs) for parser in parsers)
+        print(
+            f"{name:<20} {len(logs):>6} {slow * 1e6:>12.1f} "
+            f"{fast * 1e6:>14.1f} {slow / fast:>6.1f}"
+        )
+    _compare_workspace(coder)
+
+
+if __name__ == "__main__":
+    main()
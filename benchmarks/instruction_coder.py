@@ -0,0 +1,45 @@
+"""Compare compiled instruction encoding with the construct build.
+
+Run from the repository root with `python benchmarks/instruction_coder.py`.
+"""
+from pathlib import Path
+from timeit import timeit
+
+from anchorpy import Idl, InstructionCoder
+from anchorpy.program.common import _to_instruction
+from pyheck import snake
+
+IDLS_DIR = Path("tests/idls")
+NUMBER = 2000
+# Zeroed argument data, long enough for every instruction in tests/idls.
+PADDING = 256
+
+
+def main() -> None:
+    print(f"{'instruction':<50} {'construct (us)':>15} {'compiled (us)':>15} {'x':>6}")
+    for path in sorted(IDLS_DIR.iterdir()):
+        if "spl_token" in path.name:
+            continue
+        idl = Idl.from_json(path.read_text())
+        coder = InstructionCoder(idl)
+        for idl_ix in idl.instructions:
+            if not idl_ix.args:
+                continue
+            name = snake(idl_ix.name)
+            # Decode zeroed data to get valid argument values.
+            data = coder.parse(coder.sighashes[name] + bytes(PADDING)).data
+            args = tuple(data[snake(arg.name)] for arg in idl_ix.args)
+            slow = timeit(
+                lambda: coder.build(_to_instruction(idl_ix, args)), number=NUMBER
+            )
+            fast = timeit(lambda: coder.encode_args(name, args), number=NUMBER)
+            label = f"{path.stem}.{name}"
+            ratio = slow / fast
+            print(
+                f"{label:<50} {slow / NUMBER * 1e6:>15.1f} "
+                f"{fast / NUMBER * 1e6:>15.1f} {ratio:>6.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
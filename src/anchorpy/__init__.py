@@ -2,7 +2,17 @@
 from anchorpy_core.idl import Idl
 
 from anchorpy import error, utils
-from anchorpy.coder.coder import AccountsCoder, Coder, EventCoder, InstructionCoder
+from anchorpy.coder.coder import (
+    AccountsCoder,
+    Coder,
+    EventCoder,
+    InstructionCoder,
+    clear_coder_cache,
+    coder_cache_info,
+    get_coder,
+)
+from anchorpy.coder.records import Record
+from anchorpy.coder.view import AccountView
 from anchorpy.idl import IdlProgramAccount
 from anchorpy.program.common import (
     Event,
@@ -12,8 +22,18 @@ from anchorpy.program.common import (
 )
 from anchorpy.program.context import Context
 from anchorpy.program.core import Program
-from anchorpy.program.event import EventParser
-from anchorpy.program.namespace.account import AccountClient, ProgramAccount
+from anchorpy.program.event import EventParser, ProgramEvent, WorkspaceEventParser
+from anchorpy.program.namespace.account import (
+    AccountClient,
+    ProgramAccount,
+    ProgramAccountArray,
+)
+from anchorpy.program.namespace.events import (
+    BackfillStats,
+    EventClient,
+    EventNotification,
+)
+from anchorpy.program.namespace.replica import AccountReplica
 from anchorpy.program.namespace.simulate import SimulateResponse
 from anchorpy.provider import Provider, SendTxRequest, Wallet
 from anchorpy.pytest_plugin import localnet_fixture, workspace_fixture
@@ -35,6 +55,11 @@ __all__ = [
     "InstructionCoder",
     "EventCoder",
     "AccountsCoder",
+    "get_coder",
+    "coder_cache_info",
+    "clear_coder_cache",
+    "AccountView",
+    "Record",
     "NamedInstruction",
     "IdlProgramAccount",
     "Event",
@@ -42,7 +67,14 @@ __all__ = [
     "validate_accounts",
     "AccountClient",
     "ProgramAccount",
+    "ProgramAccountArray",
+    "AccountReplica",
     "EventParser",
+    "WorkspaceEventParser",
+    "ProgramEvent",
+    "BackfillStats",
+    "EventClient",
+    "EventNotification",
     "SimulateResponse",
     "error",
     "utils",
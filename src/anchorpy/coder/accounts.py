@@ -1,14 +1,67 @@
 """This module provides `AccountsCoder` and `_account_discriminator`."""
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import lru_cache
 from hashlib import sha256
-from typing import Any, Tuple
+from struct import error as StructError
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+from typing import Sequence as SequenceType
 
 from anchorpy_core.idl import Idl
 from construct import Adapter, Bytes, Container, Sequence, Switch
 
-from anchorpy.coder.idl import _typedef_layout
+from anchorpy.coder.columnar import _decode_array, _numpy_dtype
+from anchorpy.coder.common import _idl_type_index
+from anchorpy.coder.compiled import _as_decoder, _Decoder, _DecoderCompiler
+from anchorpy.coder.filters import (
+    _field_location,
+    _fixed_prefix,
+    _fixed_size,
+    _typedef_fixed_size,
+)
+from anchorpy.coder.idl import _type_layout, _typedef_layout
+from anchorpy.coder.records import DecodeOutput
+from anchorpy.coder.view import AccountView, _ViewLayout
 from anchorpy.program.common import NamedInstruction as AccountToSerialize
 
+if TYPE_CHECKING:
+    import numpy as np
+
 ACCOUNT_DISCRIMINATOR_SIZE = 8  # bytes
+DECODE_MANY_CHUNK_SIZE = 1000
+
+
+class FieldProjection:
+    """Decodes selected fields from a slice of account data.
+
+    Attributes:
+        offset: Start of the slice in the account data.
+        length: Length of the slice, covering all selected fields.
+    """
+
+    def __init__(
+        self, offset: int, length: int, fields: List[Tuple[str, int, _Decoder]]
+    ) -> None:
+        """Init.
+
+        Args:
+            offset: Start of the slice in the account data.
+            length: Length of the slice.
+            fields: Field path, offset in the slice and decoder of each field.
+        """
+        self.offset = offset
+        self.length = length
+        self._fields = fields
+
+    def decode(self, data: bytes) -> Dict[str, Any]:
+        """Decode the selected fields.
+
+        Args:
+            data: The slice of account data, e.g. from a `dataSlice` request.
+
+        Returns:
+            Mapping of field path to value.
+        """
+        return {path: decoder(data, rel)[0] for path, rel, decoder in self._fields}
 
 
 class AccountsCoder(Adapter):
@@ -20,8 +73,9 @@ class AccountsCoder(Adapter):
         Args:
             idl: The parsed IDL object.
         """
+        types = _idl_type_index(idl)
         self._accounts_layout = {
-            acc.name: _typedef_layout(acc, idl.types, acc.name) for acc in idl.accounts
+            acc.name: _typedef_layout(acc, types, acc.name) for acc in idl.accounts
         }
         self.acc_name_to_discriminator = {
             acc.name: _account_discriminator(acc.name) for acc in idl.accounts
@@ -33,22 +87,282 @@ class AccountsCoder(Adapter):
             disc: self._accounts_layout[acc_name]
             for acc_name, disc in self.acc_name_to_discriminator.items()
         }
+        self._idl = idl
+        self._idl_accounts = {acc.name: acc for acc in idl.accounts}
+        self._compiler = _DecoderCompiler(types)
+        self._view_layouts: dict[bytes, _ViewLayout] = {}
+        self._types = types
+        self._dtypes: dict[str, "np.dtype"] = {}
+        self._discriminator_to_decoder = self._compile_decoders(self._compiler)
+        self._output_decoders = {"dataclass": self._discriminator_to_decoder}
         subcon = Sequence(
             "discriminator" / Bytes(ACCOUNT_DISCRIMINATOR_SIZE),
             Switch(lambda this: this.discriminator, discriminator_to_typedef_layout),
         )
         super().__init__(subcon)  # type: ignore
 
-    def decode(self, obj: bytes) -> Container[Any]:
+    def decode(self, obj: bytes, output: DecodeOutput = "dataclass") -> Container[Any]:
         """Decode account data.
 
         Args:
             obj: Data to decode.
+            output: What to decode structs into. `"dataclass"` gives the
+                generated dataclasses. `"record"` gives read-only `Record`
+                classes with `__slots__`, and `"tuple"` gives plain tuples in
+                field order; both use far less memory per account.
 
         Returns:
             Decoded data.
         """
-        return self.parse(obj).data
+        decoders = self._decoders(output)
+        try:
+            decoder = decoders[obj[:ACCOUNT_DISCRIMINATOR_SIZE]]
+            return decoder(obj, ACCOUNT_DISCRIMINATOR_SIZE)[0]
+        except (StructError, ValueError, IndexError, KeyError):
+            return self._parse_fallback(obj, output)
+
+    def decode_many(
+        self,
+        buffers: List[bytes],
+        executor: Optional[Executor] = None,
+        output: DecodeOutput = "dataclass",
+        chunk_size: int = DECODE_MANY_CHUNK_SIZE,
+    ) -> List[Any]:
+        """Decode many accounts, optionally in parallel.
+
+        Buffers are grouped by discriminator and each group is decoded with its
+        account type's decoder directly. With an executor, batches larger than
+        `chunk_size` are split into chunks that are decoded by the executor.
+        A `ProcessPoolExecutor` decodes in parallel: each worker process builds
+        its own coder from the IDL, and decoded values are pickled back.
+
+        Args:
+            buffers: Account data to decode.
+            executor: (optional) Executor to decode chunks in.
+            output: What to decode structs into, see `decode`.
+            chunk_size: Number of accounts per executor task.
+
+        Returns:
+            Decoded accounts, in the same order as `buffers`.
+        """
+        if executor is None or len(buffers) <= chunk_size:
+            return self._decode_group(buffers, output)
+        chunks = [
+            buffers[start : start + chunk_size]
+            for start in range(0, len(buffers), chunk_size)
+        ]
+        if isinstance(executor, ProcessPoolExecutor):
+            idl_json = self._idl.to_json()
+            futures = [
+                executor.submit(_decode_group_in_process, idl_json, chunk, output)
+                for chunk in chunks
+            ]
+        else:
+            futures = [
+                executor.submit(self._decode_group, chunk, output) for chunk in chunks
+            ]
+        return [decoded for future in futures for decoded in future.result()]
+
+    def _decode_group(self, buffers: List[bytes], output: DecodeOutput) -> List[Any]:
+        decoders = self._decoders(output)
+        groups: Dict[bytes, List[int]] = {}
+        for idx, buf in enumerate(buffers):
+            groups.setdefault(buf[:ACCOUNT_DISCRIMINATOR_SIZE], []).append(idx)
+        result: List[Any] = [None] * len(buffers)
+        for discriminator, indices in groups.items():
+            decoder = decoders.get(discriminator)
+            for idx in indices:
+                buf = buffers[idx]
+                if decoder is None:
+                    result[idx] = self._parse_fallback(buf, output)
+                    continue
+                try:
+                    result[idx] = decoder(buf, ACCOUNT_DISCRIMINATOR_SIZE)[0]
+                except (StructError, ValueError, IndexError, KeyError):
+                    result[idx] = self._parse_fallback(buf, output)
+        return result
+
+    def _parse_fallback(self, obj: bytes, output: DecodeOutput) -> Any:
+        # Let construct raise its usual error for malformed data.
+        data = self.parse(obj).data
+        if output != "dataclass":
+            # Construct only builds dataclasses, so never hand one back in
+            # place of the requested output.
+            raise ValueError(f"Account data could not be decoded as {output!r}")
+        return data
+
+    def _decoders(self, output: DecodeOutput) -> Dict[bytes, _Decoder]:
+        try:
+            return self._output_decoders[output]
+        except KeyError:
+            decoders = self._compile_decoders(_DecoderCompiler(self._types, output))
+            self._output_decoders[output] = decoders
+            return decoders
+
+    def _compile_decoders(self, compiler: _DecoderCompiler) -> Dict[bytes, _Decoder]:
+        return {
+            self.acc_name_to_discriminator[name]: compiler.decoder(acc)
+            for name, acc in self._idl_accounts.items()
+        }
+
+    def view(self, obj: bytes) -> AccountView:
+        """Return a lazy read-only view of account data.
+
+        Unlike `decode`, fields are only decoded when they are accessed.
+
+        Args:
+            obj: Data to view.
+
+        Raises:
+            ValueError: If the discriminator does not match any account type.
+
+        Returns:
+            A view backed by a `memoryview` of `obj`.
+        """
+        discriminator = bytes(obj[:ACCOUNT_DISCRIMINATOR_SIZE])
+        try:
+            layout = self._view_layouts[discriminator]
+        except KeyError:
+            try:
+                acc_name = self.discriminator_to_acc_name[discriminator]
+            except KeyError as e:
+                raise ValueError("Unknown account discriminator") from e
+            layout = _ViewLayout(
+                self._idl_accounts[acc_name],
+                self._compiler,
+                ACCOUNT_DISCRIMINATOR_SIZE,
+            )
+            self._view_layouts[discriminator] = layout
+        return AccountView(layout, obj)
+
+    def fixed_size(self, name: str) -> Optional[int]:
+        """Return the exact data size of an account type, if it is fixed.
+
+        Args:
+            name: The account name.
+
+        Returns:
+            The size in bytes including the discriminator, or None if the
+            account has variable-length fields.
+        """
+        size = _typedef_fixed_size(self._idl_accounts[name], self._types)
+        return None if size is None else ACCOUNT_DISCRIMINATOR_SIZE + size
+
+    def fixed_prefix(self, name: str) -> Tuple[int, Optional[int]]:
+        """Find the leading fields that every account of a type has in full.
+
+        Args:
+            name: The account name.
+
+        Returns:
+            The offset of the first variable-length field, or the account size
+            if there is none, and the offset of the first top-level public key
+            field before it, if any.
+        """
+        return _fixed_prefix(
+            self._idl_accounts[name], self._types, ACCOUNT_DISCRIMINATOR_SIZE
+        )
+
+    def encode_field(self, name: str, path: str, value: Any) -> Tuple[int, bytes]:
+        """Encode a field value and find its offset, e.g. for a `memcmp` filter.
+
+        Args:
+            name: The account name.
+            path: Field path such as `"state"`, `"players[0]"` or `"config.owner"`.
+            value: The field value, as it would appear in the decoded account.
+
+        Raises:
+            ValueError: If the path does not exist or the field does not have a
+                fixed offset, i.e. it follows a variable-length field.
+
+        Returns:
+            The offset of the field in the account data and the encoded value.
+        """
+        offset, ty = _field_location(
+            self._idl_accounts[name], path, self._types, ACCOUNT_DISCRIMINATOR_SIZE
+        )
+        return offset, _type_layout(ty, self._types).build(value)
+
+    def projection(
+        self, name: str, paths: SequenceType[str], output: DecodeOutput = "dataclass"
+    ) -> FieldProjection:
+        """Find the smallest slice of account data holding the given fields.
+
+        Args:
+            name: The account name.
+            paths: Field paths, see `encode_field`.
+            output: What to decode structs into, see `decode`.
+
+        Raises:
+            ValueError: If a path does not exist, or a field does not have a
+                fixed offset or a fixed size.
+
+        Returns:
+            The projection, whose `offset` and `length` can be passed as a
+            `dataSlice`.
+        """
+        if not paths:
+            raise ValueError("No fields given")
+        compiler = (
+            self._compiler
+            if output == "dataclass"
+            else _DecoderCompiler(self._types, output)
+        )
+        located = []
+        for path in paths:
+            offset, ty = _field_location(
+                self._idl_accounts[name], path, self._types, ACCOUNT_DISCRIMINATOR_SIZE
+            )
+            size = _fixed_size(ty, self._types)
+            if size is None:
+                raise ValueError(f"Field {path!r} is variable-length")
+            located.append((path, offset, size, ty))
+        start = min(offset for _, offset, _, _ in located)
+        end = max(offset + size for _, offset, size, _ in located)
+        fields = [
+            (path, offset - start, _as_decoder(compiler.compile_type(ty)))
+            for path, offset, _, ty in located
+        ]
+        return FieldProjection(start, end - start, fields)
+
+    def dtype(self, name: str) -> "np.dtype":
+        """Return the NumPy structured dtype of a fixed-size account type.
+
+        Requires the optional `numpy` dependency.
+
+        Args:
+            name: The account name.
+
+        Raises:
+            ValueError: If the account has variable-length fields.
+
+        Returns:
+            The dtype, excluding the discriminator.
+        """
+        try:
+            return self._dtypes[name]
+        except KeyError:
+            dtype = _numpy_dtype(self._idl_accounts[name], self._types)
+            self._dtypes[name] = dtype
+            return dtype
+
+    def decode_array(self, name: str, buffers: Iterable[bytes]) -> "np.ndarray":
+        """Decode many accounts of one fixed-size type into a structured array.
+
+        All buffers are decoded in a single `np.frombuffer` pass. Public keys
+        are returned as 32-byte `np.void` values and enums as their variant index.
+        Requires the optional `numpy` dependency.
+
+        Args:
+            name: The account name.
+            buffers: Raw account data, including the discriminator.
+
+        Returns:
+            A structured array with one row per buffer.
+        """
+        return _decode_array(
+            buffers, self.dtype(name), self.acc_name_to_discriminator[name]
+        )
 
     def _decode(self, obj: Tuple[bytes, Any], context, path) -> AccountToSerialize:
         return AccountToSerialize(
@@ -71,3 +385,14 @@ def _account_discriminator(name: str) -> bytes:
         The discriminator in bytes.
     """
     return sha256(f"account:{name}".encode()).digest()[:ACCOUNT_DISCRIMINATOR_SIZE]
+
+
+@lru_cache(maxsize=8)
+def _process_accounts_coder(idl_json: str) -> "AccountsCoder":
+    return AccountsCoder(Idl.from_json(idl_json))
+
+
+def _decode_group_in_process(
+    idl_json: str, buffers: List[bytes], output: DecodeOutput
+) -> List[Any]:
+    return _process_accounts_coder(idl_json)._decode_group(buffers, output)
@@ -0,0 +1,92 @@
+"""A small thread-safe LRU cache with hit/miss statistics."""
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Generic, Hashable, NamedTuple, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class CacheInfo(NamedTuple):
+    """Statistics of an LRU cache, like `functools.lru_cache().cache_info()`."""
+
+    hits: int
+    misses: int
+    maxsize: Optional[int]
+    currsize: int
+
+
+class _LRUCache(Generic[K, V]):
+    """Mapping that evicts the least recently used entry beyond `maxsize`."""
+
+    def __init__(self, maxsize: Optional[int]) -> None:
+        """Init.
+
+        Args:
+            maxsize: The maximum number of entries to keep, or None to never
+                evict, like `functools.lru_cache(maxsize=None)`.
+
+        Raises:
+            ValueError: If `maxsize` is not positive.
+        """
+        if maxsize is not None and maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self._data: OrderedDict[K, V] = OrderedDict()
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get_or_create(self, key: K, factory: Callable[[], V]) -> V:
+        """Return the cached value for `key`, creating it on a miss.
+
+        `factory` runs outside the lock, so two threads missing on the same key
+        may both build the value; the first one stored wins.
+
+        Args:
+            key: The cache key.
+            factory: Builds the value on a miss.
+
+        Returns:
+            The cached or newly created value.
+        """
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self._misses += 1
+            else:
+                self._hits += 1
+                self._data.move_to_end(key)
+                return value
+        created = factory()
+        with self._lock:
+            value = self._data.setdefault(key, created)
+            self._data.move_to_end(key)
+            while self.maxsize is not None and len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def get(self, key: K) -> Optional[V]:
+        """Return the cached value for `key`, or None, without counting a hit.
+
+        Args:
+            key: The cache key.
+
+        Returns:
+            The cached value if present.
+        """
+        with self._lock:
+            return self._data.get(key)
+
+    def info(self) -> CacheInfo:
+        """Return the cache statistics."""
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self.maxsize, len(self._data))
+
+    def clear(self) -> None:
+        """Remove all entries and reset the statistics."""
+        with self._lock:
+            self._data.clear()
+            self._hits = 0
+            self._misses = 0
@@ -2,9 +2,13 @@
 from anchorpy_core.idl import Idl
 
 from anchorpy.coder.accounts import AccountsCoder
+from anchorpy.coder.cache import CacheInfo, _LRUCache
+from anchorpy.coder.common import idl_fingerprint
 from anchorpy.coder.event import EventCoder
 from anchorpy.coder.instruction import InstructionCoder
 
+CODER_CACHE_SIZE = 128
+
 
 class Coder:
     """Coder provides a facade for encoding and decoding all IDL related objects."""
@@ -18,3 +22,31 @@ class Coder:
         self.instruction: InstructionCoder = InstructionCoder(idl)
         self.accounts: AccountsCoder = AccountsCoder(idl)
         self.events: EventCoder = EventCoder(idl)
+
+
+_coder_cache: _LRUCache[bytes, Coder] = _LRUCache(CODER_CACHE_SIZE)
+
+
+def get_coder(idl: Idl) -> Coder:
+    """Return a Coder for the IDL, reusing one built from an identical IDL.
+
+    Coders are kept in a process-wide LRU cache of `CODER_CACHE_SIZE` entries
+    keyed by `idl_fingerprint`.
+
+    Args:
+        idl: a parsed Idl instance.
+
+    Returns:
+        The shared Coder.
+    """
+    return _coder_cache.get_or_create(idl_fingerprint(idl), lambda: Coder(idl))
+
+
+def coder_cache_info() -> CacheInfo:
+    """Return hit/miss statistics of the Coder cache used by `get_coder`."""
+    return _coder_cache.info()
+
+
+def clear_coder_cache() -> None:
+    """Empty the Coder cache used by `get_coder` and reset its statistics."""
+    _coder_cache.clear()
@@ -0,0 +1,142 @@
+"""Columnar decoding of fixed-size accounts into NumPy structured arrays.
+
+This needs the optional `numpy` dependency: `pip install anchorpy[numpy]`.
+"""
+from keyword import kwlist
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Iterable, Mapping, Sequence
+
+from anchorpy_core.idl import (
+    IdlType,
+    IdlTypeArray,
+    IdlTypeDefined,
+    IdlTypeDefinition,
+    IdlTypeDefinitionTyEnum,
+    IdlTypeDefinitionTyStruct,
+    IdlTypeSimple,
+)
+from pyheck import snake
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# u128 and i128 have no NumPy equivalent so they are kept as raw bytes.
+_SIMPLE_DTYPES: Mapping[IdlTypeSimple, str] = MappingProxyType(
+    {
+        IdlTypeSimple.Bool: "?",
+        IdlTypeSimple.U8: "u1",
+        IdlTypeSimple.I8: "i1",
+        IdlTypeSimple.U16: "<u2",
+        IdlTypeSimple.I16: "<i2",
+        IdlTypeSimple.U32: "<u4",
+        IdlTypeSimple.I32: "<i4",
+        IdlTypeSimple.F32: "<f4",
+        IdlTypeSimple.U64: "<u8",
+        IdlTypeSimple.I64: "<i8",
+        IdlTypeSimple.F64: "<f8",
+        IdlTypeSimple.U128: "V16",
+        IdlTypeSimple.I128: "V16",
+        IdlTypeSimple.PublicKey: "V32",
+    },
+)
+
+
+def _import_numpy() -> Any:
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError(
+            "NumPy is required for columnar decoding. "
+            "Install it with `pip install anchorpy[numpy]`.",
+        ) from e
+    return numpy
+
+
+def _type_dtype_spec(ty: IdlType, types: Mapping[str, IdlTypeDefinition]) -> Any:
+    if isinstance(ty, IdlTypeSimple):
+        try:
+            return _SIMPLE_DTYPES[ty]
+        except KeyError as e:
+            raise ValueError(f"{ty} is not fixed-size") from e
+    if isinstance(ty, IdlTypeArray):
+        return (_type_dtype_spec(ty.array[0], types), (ty.array[1],))
+    if isinstance(ty, IdlTypeDefined):
+        try:
+            typedef = types[ty.defined]
+        except KeyError as e:
+            raise ValueError(f"Type not found {ty.defined}") from e
+        return _typedef_dtype_spec(typedef, types)
+    raise ValueError(f"{ty} is not fixed-size")
+
+
+def _typedef_dtype_spec(
+    typedef: IdlTypeDefinition, types: Mapping[str, IdlTypeDefinition]
+) -> Any:
+    typedef_type = typedef.ty
+    if isinstance(typedef_type, IdlTypeDefinitionTyEnum):
+        if any(variant.fields is not None for variant in typedef_type.variants):
+            raise ValueError(f"Enum {typedef.name} is not fixed-size")
+        return "u1"
+    if isinstance(typedef_type, IdlTypeDefinitionTyStruct):
+        spec = []
+        for field in typedef_type.fields:
+            field_name = snake(field.name)
+            name_to_use = f"{field_name}_" if field_name in kwlist else field_name
+            spec.append((name_to_use, _type_dtype_spec(field.ty, types)))
+        return spec
+    unknown_type = typedef_type.kind
+    raise ValueError(f"Unknown type {unknown_type}")
+
+
+def _numpy_dtype(
+    typedef: IdlTypeDefinition, types: Sequence[IdlTypeDefinition]
+) -> "np.dtype":
+    """Map a fixed-size IDL typedef to a packed NumPy structured dtype.
+
+    Args:
+        typedef: The IDL typedef.
+        types: IDL type definitions.
+
+    Raises:
+        ValueError: If the typedef contains variable-length fields.
+
+    Returns:
+        The structured dtype. Public keys map to `V32` and enums to `u1`.
+    """
+    numpy = _import_numpy()
+    types_by_name = {t.name: t for t in types}
+    spec = _typedef_dtype_spec(typedef, types_by_name)
+    if not isinstance(spec, list):
+        raise ValueError(f"{typedef.name} is not a struct")
+    return numpy.dtype(spec)
+
+
+def _decode_array(
+    buffers: Iterable[bytes],
+    dtype: "np.dtype",
+    discriminator: bytes,
+) -> "np.ndarray":
+    """Decode account buffers into a structured array in one `np.frombuffer` pass.
+
+    Args:
+        buffers: Raw account data, including the discriminator.
+        dtype: The dtype of the account, excluding the discriminator.
+        discriminator: The expected account discriminator.
+
+    Raises:
+        ValueError: If a buffer has the wrong discriminator or is too short.
+
+    Returns:
+        A structured array with one row per buffer.
+    """
+    numpy = _import_numpy()
+    start = len(discriminator)
+    end = start + dtype.itemsize
+    chunks = []
+    for buf in buffers:
+        if buf[:start] != discriminator:
+            raise ValueError("Account has an invalid discriminator")
+        if len(buf) < end:
+            raise ValueError("Account data is too short")
+        chunks.append(memoryview(buf)[start:end])
+    return numpy.frombuffer(b"".join(chunks), dtype=dtype)
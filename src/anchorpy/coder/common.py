@@ -1,6 +1,8 @@
 """Common utilities for encoding and decoding."""
-from hashlib import sha256
-from typing import Dict, Union
+from collections.abc import Sequence as SequenceABC
+from hashlib import blake2b, sha256
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Union, overload
 
 from anchorpy_core.idl import (
     Idl,
@@ -16,6 +18,9 @@ from anchorpy_core.idl import (
     IdlTypeSimple,
     IdlTypeVec,
 )
+from construct import Construct
+
+from anchorpy.coder.cache import _LRUCache
 
 
 def _sighash(ix_name: str) -> bytes:
@@ -33,39 +38,111 @@ def _sighash(ix_name: str) -> bytes:
     return sha256(formatted_str.encode()).digest()[:8]
 
 
-def _type_size_compound_type(idl: Idl, ty: IdlTypeCompound) -> int:
-    if isinstance(ty, IdlTypeVec):
-        return 1
-    if isinstance(ty, IdlTypeOption):
-        return 1 + _type_size(idl, ty.option)
-    if isinstance(ty, IdlTypeDefined):
-        defined = ty.defined
-        filtered = [t for t in idl.types if t.name == defined]
-        if len(filtered) != 1:
-            raise ValueError(f"Type not found {ty}")
-        type_def = filtered[0]
-        return _account_size(idl, type_def)
-    if isinstance(ty, IdlTypeArray):
-        element_type = ty.array[0]
-        array_size = ty.array[1]
-        return _type_size(idl, element_type) * array_size
-    raise ValueError(f"type_size not implemented for {ty}")
+class _TypeIndex(SequenceABC[IdlTypeDefinition]):
+    """IDL type definitions indexed by name, with memoized sizes and layouts.
 
+    This is a sequence of the type definitions, so it can be passed wherever
+    a list of types is expected.
+    """
 
-def _type_size(idl: Idl, ty: IdlType) -> int:
-    """Return the size of the type in bytes.
+    def __init__(self, types: Iterable[IdlTypeDefinition]) -> None:
+        """Init.
 
-    For variable length types, just return 1.
-    Users should override this value in such cases.
+        Args:
+            types: IDL type definitions. Later definitions shadow earlier ones
+                with the same name.
+        """
+        self._types = list(types)
+        self._by_name = {t.name: t for t in self._types}
+        self._sizes: Dict[str, int] = {}
+        self.layouts: Dict[str, Construct] = {}
+
+    @overload
+    def __getitem__(self, idx: int) -> IdlTypeDefinition:
+        ...
+
+    @overload
+    def __getitem__(self, idx: slice) -> List[IdlTypeDefinition]:
+        ...
+
+    def __getitem__(self, idx):
+        """Get a type definition by position."""
+        return self._types[idx]
+
+    def __len__(self) -> int:
+        """Return the number of type definitions."""
+        return len(self._types)
+
+    def get(self, name: str) -> IdlTypeDefinition:
+        """Look up a type definition by name.
+
+        Args:
+            name: The type name.
+
+        Raises:
+            ValueError: If there are no types or the type is not found.
+
+        Returns:
+            The type definition.
+        """
+        if not self._types:
+            raise ValueError("User defined types not provided")
+        try:
+            return self._by_name[name]
+        except KeyError as e:
+            raise ValueError(f"Type not found {name}") from e
+
+    def size(self, name: str) -> int:
+        """Return the size of a user-defined type, see `_account_size`."""
+        try:
+            return self._sizes[name]
+        except KeyError:
+            result = _typedef_size(self, self.get(name))
+            self._sizes[name] = result
+            return result
+
+
+def _type_index(types: Iterable[IdlTypeDefinition]) -> _TypeIndex:
+    return types if isinstance(types, _TypeIndex) else _TypeIndex(types)
+
+
+def idl_fingerprint(idl: Idl) -> bytes:
+    """Hash the content of an IDL.
 
     Args:
-        idl: The parsed `Idl` object.
-        ty: The type object from the IDL.
+        idl: a parsed Idl instance.
 
     Returns:
-        The size of the object in bytes.
+        A 16-byte digest that is equal for IDLs with equal content.
+    """
+    return blake2b(idl.to_json().encode(), digest_size=16).digest()
+
+
+TYPE_INDEX_CACHE_SIZE = 128
+
+_type_index_cache: _LRUCache[bytes, _TypeIndex] = _LRUCache(TYPE_INDEX_CACHE_SIZE)
+
+
+def _idl_type_index(idl: Idl) -> _TypeIndex:
+    """Return the shared type index of an IDL.
+
+    It covers both `idl.accounts` and `idl.types`, so instruction arguments can
+    refer to accounts. Types shadow accounts with the same name.
+
+    Args:
+        idl: The parsed `Idl` instance.
+
+    Returns:
+        The type index, shared by all coders of identical IDLs.
     """
-    sizes: Dict[IdlTypeSimple, int] = {
+    return _type_index_cache.get_or_create(
+        idl_fingerprint(idl),
+        lambda: _TypeIndex([*idl.accounts, *idl.types]),
+    )
+
+
+_SIMPLE_TYPE_SIZES: Mapping[IdlTypeSimple, int] = MappingProxyType(
+    {
         IdlTypeSimple.Bool: 1,
         IdlTypeSimple.U8: 1,
         IdlTypeSimple.I8: 1,
@@ -82,28 +159,74 @@ def _type_size(idl: Idl, ty: IdlType) -> int:
         IdlTypeSimple.U128: 16,
         IdlTypeSimple.I128: 16,
         IdlTypeSimple.PublicKey: 32,
-    }
+    },
+)
+
+
+def _type_size_compound_type(types: _TypeIndex, ty: IdlTypeCompound) -> int:
+    if isinstance(ty, IdlTypeVec):
+        return 1
+    if isinstance(ty, IdlTypeOption):
+        return 1 + _indexed_type_size(types, ty.option)
+    if isinstance(ty, IdlTypeDefined):
+        return types.size(ty.defined)
+    if isinstance(ty, IdlTypeArray):
+        element_type = ty.array[0]
+        array_size = ty.array[1]
+        return _indexed_type_size(types, element_type) * array_size
+    raise ValueError(f"type_size not implemented for {ty}")
+
+
+def _indexed_type_size(types: _TypeIndex, ty: IdlType) -> int:
     if isinstance(ty, IdlTypeSimple):
-        return sizes[ty]
-    return _type_size_compound_type(idl, ty)
+        return _SIMPLE_TYPE_SIZES[ty]
+    return _type_size_compound_type(types, ty)
 
 
-def _variant_field_size(idl: Idl, field: Union[IdlField, IdlType]) -> int:
+def _type_size(idl: Idl, ty: IdlType) -> int:
+    """Return the size of the type in bytes.
+
+    For variable length types, just return 1.
+    Users should override this value in such cases.
+
+    Args:
+        idl: The parsed `Idl` object.
+        ty: The type object from the IDL.
+
+    Returns:
+        The size of the object in bytes.
+    """
+    return _indexed_type_size(_idl_type_index(idl), ty)
+
+
+def _variant_field_size(types: _TypeIndex, field: Union[IdlField, IdlType]) -> int:
     if isinstance(field, IdlField):
-        return _type_size(idl, field.ty)
-    return _type_size(idl, field)
+        return _indexed_type_size(types, field.ty)
+    return _indexed_type_size(types, field)
 
 
-def _variant_size(idl: Idl, variant: IdlEnumVariant) -> int:
+def _variant_size(types: _TypeIndex, variant: IdlEnumVariant) -> int:
     if variant.fields is None:
         return 0
     field_sizes = []
     field: Union[IdlField, IdlType]
     for field in variant.fields.fields:
-        field_sizes.append(_variant_field_size(idl, field))
+        field_sizes.append(_variant_field_size(types, field))
     return sum(field_sizes)
 
 
+def _typedef_size(types: _TypeIndex, typedef: IdlTypeDefinition) -> int:
+    typedef_type = typedef.ty
+    if isinstance(typedef_type, IdlTypeDefinitionTyEnum):
+        variant_sizes = (
+            _variant_size(types, variant) for variant in typedef_type.variants
+        )
+        return max(variant_sizes) + 1
+    if typedef_type.fields is None:
+        return 0
+    return sum(_indexed_type_size(types, f.ty) for f in typedef_type.fields)
+
+
 def _account_size(idl: Idl, idl_account: IdlTypeDefinition) -> int:
     """Calculate account size in bytes.
 
@@ -114,12 +237,4 @@ def _account_size(idl: Idl, idl_account: IdlTypeDefinition) -> int:
     Returns:
         Account size.
     """
-    idl_account_type = idl_account.ty
-    if isinstance(idl_account_type, IdlTypeDefinitionTyEnum):
-        variant_sizes = (
-            _variant_size(idl, variant) for variant in idl_account_type.variants
-        )
-        return max(variant_sizes) + 1
-    if idl_account_type.fields is None:
-        return 0
-    return sum(_type_size(idl, f.ty) for f in idl_account_type.fields)
+    return _typedef_size(_idl_type_index(idl), idl_account)
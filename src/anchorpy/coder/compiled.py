@@ -0,0 +1,812 @@
+"""Compiled decoders and encoders for IDL types.
+
+`construct` walks a tree of `Construct` objects and builds a context dict for
+every field it parses or builds. The decoders and encoders in this module are
+compiled once per IDL type instead: runs of fixed-size fields are handled by a
+single precomputed `struct.Struct`, and variable-length types by small closures.
+The results are the same as those of the `construct` layouts in
+`anchorpy.coder.idl`.
+"""
+from dataclasses import dataclass
+from keyword import kwlist
+from math import isnan
+from struct import Struct, unpack_from
+from types import MappingProxyType
+from typing import Any, Callable, Mapping, Optional, Sequence, Union, cast
+
+from anchorpy_core.idl import (
+    IdlField,
+    IdlType,
+    IdlTypeArray,
+    IdlTypeDefined,
+    IdlTypeDefinition,
+    IdlTypeDefinitionTyEnum,
+    IdlTypeDefinitionTyStruct,
+    IdlTypeOption,
+    IdlTypeSimple,
+    IdlTypeVec,
+)
+from pyheck import snake
+from solders.pubkey import Pubkey
+
+from anchorpy.coder.idl import (
+    _handle_enum_variants,
+    _idl_typedef_ty_struct_to_dataclass_type,
+)
+from anchorpy.coder.records import (
+    DECODE_OUTPUTS,
+    DecodeOutput,
+    _idl_typedef_ty_struct_to_record_type,
+)
+from anchorpy.idl import TypeDefs
+
+_Decoder = Callable[[bytes, int], tuple[Any, int]]
+_Builder = Callable[[tuple, int], Any]
+
+_U32 = Struct("<I")
+
+_SIMPLE_FORMATS: Mapping[IdlTypeSimple, str] = MappingProxyType(
+    {
+        IdlTypeSimple.Bool: "?",
+        IdlTypeSimple.U8: "B",
+        IdlTypeSimple.I8: "b",
+        IdlTypeSimple.U16: "H",
+        IdlTypeSimple.I16: "h",
+        IdlTypeSimple.U32: "I",
+        IdlTypeSimple.I32: "i",
+        IdlTypeSimple.U64: "Q",
+        IdlTypeSimple.I64: "q",
+    },
+)
+
+
+class _CodecError(ValueError):
+    """Raised when compiled code gets data that it cannot handle."""
+
+
+@dataclass(frozen=True)
+class _Fixed:
+    """A compiled fixed-size type.
+
+    Attributes:
+        fmt: The `struct` format of the type, without the byte order prefix.
+        n_values: The number of values `struct` produces for `fmt`.
+        build: Turns the unpacked values starting at a given index into the
+            decoded value. `None` means the raw unpacked value is used as is.
+    """
+
+    fmt: str
+    n_values: int
+    build: Optional[_Builder] = None
+
+
+_Compiled = Union[_Fixed, _Decoder]
+
+
+def _check_float(vals: tuple, idx: int) -> float:
+    val = vals[idx]
+    if isnan(val):
+        raise _CodecError("Borsh does not support nan.")
+    return val
+
+
+def _u128(vals: tuple, idx: int) -> int:
+    return int.from_bytes(vals[idx], "little")
+
+
+def _i128(vals: tuple, idx: int) -> int:
+    return int.from_bytes(vals[idx], "little", signed=True)
+
+
+def _pubkey(vals: tuple, idx: int) -> Pubkey:
+    return Pubkey(vals[idx])
+
+
+_SIMPLE_FIXED: Mapping[IdlTypeSimple, _Fixed] = MappingProxyType(
+    {
+        **{ty: _Fixed(fmt, 1) for ty, fmt in _SIMPLE_FORMATS.items()},
+        IdlTypeSimple.F32: _Fixed("f", 1, _check_float),
+        IdlTypeSimple.F64: _Fixed("d", 1, _check_float),
+        IdlTypeSimple.U128: _Fixed("16s", 1, _u128),
+        IdlTypeSimple.I128: _Fixed("16s", 1, _i128),
+        IdlTypeSimple.PublicKey: _Fixed("32s", 1, _pubkey),
+    },
+)
+
+
+def _read_len(buf: bytes, offset: int) -> tuple[int, int]:
+    return _U32.unpack_from(buf, offset)[0], offset + 4
+
+
+def _read_slice(buf: bytes, offset: int) -> tuple[bytes, int]:
+    length, start = _read_len(buf, offset)
+    end = start + length
+    if end > len(buf):
+        raise _CodecError("Not enough data for length-prefixed bytes")
+    return bytes(buf[start:end]), end
+
+
+def _decode_bytes(buf: bytes, offset: int) -> tuple[bytes, int]:
+    return _read_slice(buf, offset)
+
+
+def _decode_string(buf: bytes, offset: int) -> tuple[str, int]:
+    raw, end = _read_slice(buf, offset)
+    return raw.decode("utf8"), end
+
+
+def _bind(fixed: _Fixed, rel: int) -> _Builder:
+    """Return a builder reading `fixed` at `rel` values past the given index."""
+    if fixed.build is None:
+        return lambda vals, idx: vals[idx + rel]
+    build: _Builder = fixed.build
+    if rel == 0:
+        return build
+    return lambda vals, idx: build(vals, idx + rel)
+
+
+def _fixed_to_decoder(fixed: _Fixed) -> _Decoder:
+    struct = Struct(f"<{fixed.fmt}")
+    size = struct.size
+    if fixed.build is None:
+
+        def decode_raw(buf: bytes, offset: int) -> tuple[Any, int]:
+            return struct.unpack_from(buf, offset)[0], offset + size
+
+        return decode_raw
+    build: _Builder = fixed.build
+
+    def decode(buf: bytes, offset: int) -> tuple[Any, int]:
+        return build(struct.unpack_from(buf, offset), 0), offset + size
+
+    return decode
+
+
+def _as_decoder(compiled: _Compiled) -> _Decoder:
+    if isinstance(compiled, _Fixed):
+        return _fixed_to_decoder(compiled)
+    return compiled
+
+
+def _fixed_struct(members: list[_Fixed], make: Callable[..., Any]) -> _Fixed:
+    fmt = "".join(m.fmt for m in members)
+    n_values = sum(m.n_values for m in members)
+    if all(m.build is None for m in members):
+        return _Fixed(
+            fmt, n_values, lambda vals, idx: make(*vals[idx : idx + n_values])
+        )
+    builders = []
+    rel = 0
+    for member in members:
+        builders.append(_bind(member, rel))
+        rel += member.n_values
+    return _Fixed(
+        fmt, n_values, lambda vals, idx: make(*[b(vals, idx) for b in builders])
+    )
+
+
+_Segment = Callable[[bytes, int, list], int]
+
+
+def _run_segment(members: list[_Fixed]) -> _Segment:
+    """Read a run of consecutive fixed-size fields with one `struct` call."""
+    struct = Struct("<" + "".join(m.fmt for m in members))
+    size = struct.size
+    if all(m.build is None for m in members):
+
+        def read_raw(buf: bytes, offset: int, out: list) -> int:
+            out.extend(struct.unpack_from(buf, offset))
+            return offset + size
+
+        return read_raw
+    builders = []
+    rel = 0
+    for member in members:
+        builders.append(_bind(member, rel))
+        rel += member.n_values
+
+    def read(buf: bytes, offset: int, out: list) -> int:
+        vals = struct.unpack_from(buf, offset)
+        out.extend([b(vals, 0) for b in builders])
+        return offset + size
+
+    return read
+
+
+def _variable_segment(decoder: _Decoder) -> _Segment:
+    def read(buf: bytes, offset: int, out: list) -> int:
+        val, new_offset = decoder(buf, offset)
+        out.append(val)
+        return new_offset
+
+    return read
+
+
+def _compile_struct(members: list[_Compiled], make: Callable[..., Any]) -> _Compiled:
+    """Compile a sequence of fields that are passed positionally to `make`."""
+    if all(isinstance(m, _Fixed) for m in members):
+        return _fixed_struct(cast(list[_Fixed], members), make)
+    segments: list[_Segment] = []
+    run: list[_Fixed] = []
+    for member in members:
+        if isinstance(member, _Fixed):
+            run.append(member)
+            continue
+        if run:
+            segments.append(_run_segment(run))
+            run = []
+        segments.append(_variable_segment(member))
+    if run:
+        segments.append(_run_segment(run))
+
+    def decode(buf: bytes, offset: int) -> tuple[Any, int]:
+        out: list = []
+        for segment in segments:
+            offset = segment(buf, offset, out)
+        return make(*out), offset
+
+    return decode
+
+
+def _compile_array(inner: _Compiled, length: int) -> _Compiled:
+    if isinstance(inner, _Fixed):
+        inner_fmt = inner.fmt
+        fmt = f"{length}{inner_fmt}" if len(inner_fmt) == 1 else inner_fmt * length
+        width = inner.n_values
+        n_values = width * length
+        if inner.build is None:
+            return _Fixed(
+                fmt, n_values, lambda vals, idx: list(vals[idx : idx + n_values])
+            )
+        build: _Builder = inner.build
+        return _Fixed(
+            fmt,
+            n_values,
+            lambda vals, idx: [build(vals, idx + i * width) for i in range(length)],
+        )
+    inner_decoder = cast(_Decoder, inner)
+
+    def decode(buf: bytes, offset: int) -> tuple[list, int]:
+        result = []
+        for _ in range(length):
+            val, offset = inner_decoder(buf, offset)
+            result.append(val)
+        return result, offset
+
+    return decode
+
+
+def _compile_vec(inner: _Compiled) -> _Decoder:
+    if isinstance(inner, _Fixed):
+        build = inner.build
+        fmt = inner.fmt
+        if build is None and len(fmt) == 1:
+            item_size = Struct(fmt).size
+
+            def decode_raw(buf: bytes, offset: int) -> tuple[list, int]:
+                length, start = _read_len(buf, offset)
+                vals = unpack_from(f"<{length}{fmt}", buf, start)
+                return list(vals), start + length * item_size
+
+            return decode_raw
+        struct = Struct(f"<{fmt}")
+        size = struct.size
+        build_to_use = build if build is not None else (lambda vals, idx: vals[idx])
+
+        def decode_fixed(buf: bytes, offset: int) -> tuple[list, int]:
+            length, start = _read_len(buf, offset)
+            end = start + length * size
+            if end > len(buf):
+                raise _CodecError("Not enough data for vec")
+            chunk = memoryview(buf)[start:end]
+            return [build_to_use(vals, 0) for vals in struct.iter_unpack(chunk)], end
+
+        return decode_fixed
+    inner_decoder = cast(_Decoder, inner)
+
+    def decode(buf: bytes, offset: int) -> tuple[list, int]:
+        length, offset = _read_len(buf, offset)
+        result = []
+        for _ in range(length):
+            val, offset = inner_decoder(buf, offset)
+            result.append(val)
+        return result, offset
+
+    return decode
+
+
+def _compile_option(inner: _Compiled) -> _Decoder:
+    inner_decoder = _as_decoder(inner)
+
+    def decode(buf: bytes, offset: int) -> tuple[Any, int]:
+        if buf[offset] == 0:
+            return None, offset + 1
+        return inner_decoder(buf, offset + 1)
+
+    return decode
+
+
+def _make_tuple(*vals: Any) -> tuple:
+    return vals
+
+
+class _DecoderCompiler:
+    """Compiles IDL types into decoders, caching user-defined types by name."""
+
+    def __init__(self, types: TypeDefs, output: DecodeOutput = "dataclass") -> None:
+        """Init.
+
+        Args:
+            types: IDL type definitions.
+            output: What to decode structs into: the generated dataclasses,
+                slotted `Record` classes or plain tuples. Enums are always
+                decoded into their sumtype variants.
+
+        Raises:
+            ValueError: If `output` is unknown.
+        """
+        if output not in DECODE_OUTPUTS:
+            raise ValueError(f"Unknown decode output {output!r}")
+        self._types = types
+        self._typedefs = {t.name: t for t in types}
+        self._defined: dict[str, _Compiled] = {}
+        self._output = output
+
+    def decoder(self, typedef: IdlTypeDefinition) -> _Decoder:
+        """Return a decoder for a typedef such as an account or event.
+
+        Args:
+            typedef: The IDL typedef.
+
+        Returns:
+            A function taking `(buffer, offset)` and returning the decoded
+            value along with the offset of the next unread byte.
+        """
+        return _as_decoder(self.compile_typedef(typedef))
+
+    def compile_typedef(self, typedef: IdlTypeDefinition) -> _Compiled:
+        typedef_type = typedef.ty
+        if isinstance(typedef_type, IdlTypeDefinitionTyStruct):
+            make: Callable[..., Any]
+            if self._output == "tuple":
+                make = _make_tuple
+            elif self._output == "record":
+                make = _idl_typedef_ty_struct_to_record_type(typedef_type, typedef.name)
+            else:
+                make = _idl_typedef_ty_struct_to_dataclass_type(
+                    typedef_type, typedef.name
+                )
+            members = [self.compile_type(f.ty) for f in typedef_type.fields]
+            return _compile_struct(members, make)
+        if isinstance(typedef_type, IdlTypeDefinitionTyEnum):
+            return self._compile_enum(typedef_type, typedef.name)
+        unknown_type = typedef_type.kind
+        raise ValueError(f"Unknown type {unknown_type}")
+
+    def compile_type(self, ty: IdlType) -> _Compiled:
+        if isinstance(ty, IdlTypeSimple):
+            if ty == IdlTypeSimple.Bytes:
+                return _decode_bytes
+            if ty == IdlTypeSimple.String:
+                return _decode_string
+            return _SIMPLE_FIXED[ty]
+        if isinstance(ty, IdlTypeVec):
+            return _compile_vec(self.compile_type(ty.vec))
+        if isinstance(ty, IdlTypeOption):
+            return _compile_option(self.compile_type(ty.option))
+        if isinstance(ty, IdlTypeDefined):
+            return self._compile_defined(ty.defined)
+        if isinstance(ty, IdlTypeArray):
+            return _compile_array(self.compile_type(ty.array[0]), ty.array[1])
+        raise ValueError(f"Type {ty} not implemented yet")
+
+    def _compile_defined(self, name: str) -> _Compiled:
+        if name in self._defined:
+            return self._defined[name]
+        if not self._types:
+            raise ValueError("User defined types not provided")
+        try:
+            typedef = self._typedefs[name]
+        except KeyError as e:
+            raise ValueError(f"Type not found {name}") from e
+        compiled = self.compile_typedef(typedef)
+        self._defined[name] = compiled
+        return compiled
+
+    def _compile_enum(self, idl_enum: IdlTypeDefinitionTyEnum, name: str) -> _Compiled:
+        enum_cls = _handle_enum_variants(idl_enum, self._types, name).enum
+        variants: list[Optional[_Decoder]] = []
+        constructors = []
+        for idx, variant in enumerate(idl_enum.variants):
+            constructr = enum_cls.getitem(idx)
+            constructors.append(constructr)
+            if variant.fields is None:
+                variants.append(None)
+                continue
+            flds = variant.fields.fields
+            if isinstance(flds[0], IdlField):
+                named = cast(list[IdlField], flds)
+                members = [self.compile_type(f.ty) for f in named]
+                make = constructr
+            else:
+                unnamed = cast(list[IdlType], flds)
+                members = [self.compile_type(ty) for ty in unnamed]
+                make = _tuple_variant_maker(constructr)
+            variants.append(_as_decoder(_compile_struct(members, make)))
+        if all(v is None for v in variants):
+            return _Fixed("B", 1, lambda vals, idx: constructors[vals[idx]]())
+
+        def decode(buf: bytes, offset: int) -> tuple[Any, int]:
+            index = buf[offset]
+            variant_decoder = variants[index]
+            if variant_decoder is None:
+                return constructors[index](), offset + 1
+            return variant_decoder(buf, offset + 1)
+
+        return decode
+
+
+def _tuple_variant_maker(constructr: Callable[[list], Any]) -> Callable[..., Any]:
+    return lambda *vals: constructr(list(vals))
+
+
+_Flatten = Callable[[Any, list], None]
+_Writer = Callable[[Any, bytearray], None]
+
+
+@dataclass(frozen=True)
+class _FixedEncoder:
+    """A compiled fixed-size type, for encoding.
+
+    Attributes:
+        fmt: The `struct` format of the type, without the byte order prefix.
+        flatten: Appends the values `struct` should pack for an object to a list.
+    """
+
+    fmt: str
+    flatten: _Flatten
+
+
+_CompiledEncoder = Union[_FixedEncoder, _Writer]
+
+
+def _append(obj: Any, vals: list) -> None:
+    vals.append(obj)
+
+
+def _append_float(obj: float, vals: list) -> None:
+    if isnan(obj):
+        raise _CodecError("Borsh does not support nan.")
+    vals.append(obj)
+
+
+def _append_u128(obj: int, vals: list) -> None:
+    vals.append(obj.to_bytes(16, "little"))
+
+
+def _append_i128(obj: int, vals: list) -> None:
+    vals.append(obj.to_bytes(16, "little", signed=True))
+
+
+def _append_pubkey(obj: Pubkey, vals: list) -> None:
+    raw = bytes(obj)
+    if len(raw) != 32:
+        raise _CodecError("Public keys must be 32 bytes")
+    vals.append(raw)
+
+
+_SIMPLE_FIXED_ENCODERS: Mapping[IdlTypeSimple, _FixedEncoder] = MappingProxyType(
+    {
+        **{ty: _FixedEncoder(fmt, _append) for ty, fmt in _SIMPLE_FORMATS.items()},
+        IdlTypeSimple.F32: _FixedEncoder("f", _append_float),
+        IdlTypeSimple.F64: _FixedEncoder("d", _append_float),
+        IdlTypeSimple.U128: _FixedEncoder("16s", _append_u128),
+        IdlTypeSimple.I128: _FixedEncoder("16s", _append_i128),
+        IdlTypeSimple.PublicKey: _FixedEncoder("32s", _append_pubkey),
+    },
+)
+
+
+def _write_bytes(obj: bytes, out: bytearray) -> None:
+    if not isinstance(obj, (bytes, bytearray, memoryview)):
+        # bytes(5) would give five zero bytes instead of failing.
+        raise TypeError(f"Expected bytes, got {type(obj).__name__}")
+    raw = bytes(obj)
+    out += _U32.pack(len(raw))
+    out += raw
+
+
+def _write_string(obj: str, out: bytearray) -> None:
+    _write_bytes(obj.encode("utf8"), out)
+
+
+def _fixed_to_writer(fixed: _FixedEncoder) -> _Writer:
+    struct = Struct(f"<{fixed.fmt}")
+    flatten = fixed.flatten
+
+    def write(obj: Any, out: bytearray) -> None:
+        vals: list = []
+        flatten(obj, vals)
+        out += struct.pack(*vals)
+
+    return write
+
+
+def _as_writer(compiled: _CompiledEncoder) -> _Writer:
+    if isinstance(compiled, _FixedEncoder):
+        return _fixed_to_writer(compiled)
+    return compiled
+
+
+_Getter = Callable[[Any], Any]
+
+
+def _field_getter(key: str, attr_name: str) -> _Getter:
+    """Read a struct field from a dict (by layout name) or object (by attribute)."""
+
+    def get(obj: Any) -> Any:
+        if isinstance(obj, dict):
+            return obj[key]
+        return getattr(obj, attr_name)
+
+    return get
+
+
+def _compile_struct_encoder(
+    members: list[_CompiledEncoder], getters: list[_Getter]
+) -> _CompiledEncoder:
+    """Compile a struct whose field values are read from an object by `getters`."""
+    if all(isinstance(m, _FixedEncoder) for m in members):
+        fixed_members = cast(list[_FixedEncoder], members)
+        pairs = [(getters[idx], m.flatten) for idx, m in enumerate(fixed_members)]
+
+        def flatten(obj: Any, vals: list) -> None:
+            for getter, flatten_member in pairs:
+                flatten_member(getter(obj), vals)
+
+        return _FixedEncoder("".join(m.fmt for m in fixed_members), flatten)
+    writers = [(getters[idx], _as_writer(m)) for idx, m in enumerate(members)]
+
+    def write(obj: Any, out: bytearray) -> None:
+        for getter, write_member in writers:
+            write_member(getter(obj), out)
+
+    return write
+
+
+def _compile_array_encoder(inner: _CompiledEncoder, length: int) -> _CompiledEncoder:
+    def check_length(obj: Any) -> None:
+        if len(obj) != length:
+            raise _CodecError(f"Expected {length} elements, got {len(obj)}")
+
+    if isinstance(inner, _FixedEncoder):
+        inner_fmt = inner.fmt
+        fmt = f"{length}{inner_fmt}" if len(inner_fmt) == 1 else inner_fmt * length
+        inner_flatten = inner.flatten
+        if inner_flatten is _append:
+
+            def flatten_raw(obj: Any, vals: list) -> None:
+                check_length(obj)
+                vals.extend(obj)
+
+            return _FixedEncoder(fmt, flatten_raw)
+
+        def flatten(obj: Any, vals: list) -> None:
+            check_length(obj)
+            for item in obj:
+                inner_flatten(item, vals)
+
+        return _FixedEncoder(fmt, flatten)
+    inner_writer = cast(_Writer, inner)
+
+    def write(obj: Any, out: bytearray) -> None:
+        check_length(obj)
+        for item in obj:
+            inner_writer(item, out)
+
+    return write
+
+
+def _compile_vec_encoder(inner: _CompiledEncoder) -> _Writer:
+    if isinstance(inner, _FixedEncoder):
+        fmt = inner.fmt
+        inner_flatten = inner.flatten
+        if len(fmt) == 1:
+
+            def write_fixed(obj: Any, out: bytearray) -> None:
+                length = len(obj)
+                vals: list = []
+                if inner_flatten is _append:
+                    vals.extend(obj)
+                else:
+                    for item in obj:
+                        inner_flatten(item, vals)
+                out += _U32.pack(length)
+                out += Struct(f"<{length}{fmt}").pack(*vals)
+
+            return write_fixed
+        # Repeating a multi-code format would build a format string as long
+        # as the vec, so pack item by item with one precompiled struct.
+        item_struct = Struct(f"<{fmt}")
+
+        def write_items(obj: Any, out: bytearray) -> None:
+            out += _U32.pack(len(obj))
+            for item in obj:
+                vals: list = []
+                inner_flatten(item, vals)
+                out += item_struct.pack(*vals)
+
+        return write_items
+    inner_writer = cast(_Writer, inner)
+
+    def write(obj: Any, out: bytearray) -> None:
+        out += _U32.pack(len(obj))
+        for item in obj:
+            inner_writer(item, out)
+
+    return write
+
+
+def _compile_option_encoder(inner: _CompiledEncoder) -> _Writer:
+    inner_writer = _as_writer(inner)
+
+    def write(obj: Any, out: bytearray) -> None:
+        if obj is None:
+            out.append(0)
+        else:
+            out.append(1)
+            inner_writer(obj, out)
+
+    return write
+
+
+class _EncoderCompiler:
+    """Compiles IDL types into encoders, caching user-defined types by name."""
+
+    def __init__(self, types: TypeDefs) -> None:
+        """Init.
+
+        Args:
+            types: IDL type definitions.
+        """
+        self._types = types
+        self._typedefs = {t.name: t for t in types}
+        self._defined: dict[str, _CompiledEncoder] = {}
+
+    def args_encoder(
+        self, prefix: bytes, arg_types: list[IdlType]
+    ) -> Callable[[Sequence[Any]], bytes]:
+        """Return an encoder for positional arguments, such as instruction args.
+
+        Args:
+            prefix: Bytes to write before the arguments, e.g. the sighash.
+            arg_types: The IDL types of the arguments.
+
+        Returns:
+            A function taking the argument values and returning the encoded bytes.
+        """
+        members = [self.compile_type(ty) for ty in arg_types]
+        n_args = len(members)
+        prefix_len = len(prefix)
+
+        def check_count(args: Sequence[Any]) -> None:
+            if len(args) != n_args:
+                raise ValueError(f"Expected {n_args} arguments, got {len(args)}")
+
+        if all(isinstance(m, _FixedEncoder) for m in members):
+            fixed_members = cast(list[_FixedEncoder], members)
+            struct = Struct("<" + "".join(m.fmt for m in fixed_members))
+            flattens = [m.flatten for m in fixed_members]
+            total_size = prefix_len + struct.size
+
+            def encode_fixed(args: Sequence[Any]) -> bytes:
+                check_count(args)
+                vals: list = []
+                for flatten, arg in zip(flattens, args):  # noqa: B905
+                    flatten(arg, vals)
+                buf = bytearray(total_size)
+                buf[:prefix_len] = prefix
+                struct.pack_into(buf, prefix_len, *vals)
+                return bytes(buf)
+
+            return encode_fixed
+        writers = [_as_writer(m) for m in members]
+
+        def encode(args: Sequence[Any]) -> bytes:
+            check_count(args)
+            out = bytearray(prefix)
+            for write, arg in zip(writers, args):  # noqa: B905
+                write(arg, out)
+            return bytes(out)
+
+        return encode
+
+    def compile_typedef(self, typedef: IdlTypeDefinition) -> _CompiledEncoder:
+        typedef_type = typedef.ty
+        if isinstance(typedef_type, IdlTypeDefinitionTyStruct):
+            fields = typedef_type.fields
+            members = [self.compile_type(f.ty) for f in fields]
+            return _compile_struct_encoder(members, _named_getters(fields))
+        if isinstance(typedef_type, IdlTypeDefinitionTyEnum):
+            return self._compile_enum(typedef_type)
+        unknown_type = typedef_type.kind
+        raise ValueError(f"Unknown type {unknown_type}")
+
+    def compile_type(self, ty: IdlType) -> _CompiledEncoder:
+        if isinstance(ty, IdlTypeSimple):
+            if ty == IdlTypeSimple.Bytes:
+                return _write_bytes
+            if ty == IdlTypeSimple.String:
+                return _write_string
+            return _SIMPLE_FIXED_ENCODERS[ty]
+        if isinstance(ty, IdlTypeVec):
+            return _compile_vec_encoder(self.compile_type(ty.vec))
+        if isinstance(ty, IdlTypeOption):
+            return _compile_option_encoder(self.compile_type(ty.option))
+        if isinstance(ty, IdlTypeDefined):
+            return self._compile_defined(ty.defined)
+        if isinstance(ty, IdlTypeArray):
+            return _compile_array_encoder(self.compile_type(ty.array[0]), ty.array[1])
+        raise ValueError(f"Type {ty} not implemented yet")
+
+    def _compile_defined(self, name: str) -> _CompiledEncoder:
+        if name in self._defined:
+            return self._defined[name]
+        if not self._types:
+            raise ValueError("User defined types not provided")
+        try:
+            typedef = self._typedefs[name]
+        except KeyError as e:
+            raise ValueError(f"Type not found {name}") from e
+        compiled = self.compile_typedef(typedef)
+        self._defined[name] = compiled
+        return compiled
+
+    def _compile_enum(self, idl_enum: IdlTypeDefinitionTyEnum) -> _CompiledEncoder:
+        variants: list[Optional[_Writer]] = []
+        for variant in idl_enum.variants:
+            if variant.fields is None:
+                variants.append(None)
+                continue
+            flds = variant.fields.fields
+            if isinstance(flds[0], IdlField):
+                named = cast(list[IdlField], flds)
+                members = [self.compile_type(f.ty) for f in named]
+                getters = [_attr_getter(snake(f.name)) for f in named]
+            else:
+                unnamed = cast(list[IdlType], flds)
+                members = [self.compile_type(ty) for ty in unnamed]
+                getters = [_tuple_data_getter(idx) for idx in range(len(unnamed))]
+            variants.append(_as_writer(_compile_struct_encoder(members, getters)))
+        if all(v is None for v in variants):
+            return _FixedEncoder("B", _append_enum_index)
+
+        def write(obj: Any, out: bytearray) -> None:
+            index = obj.index
+            out.append(index)
+            variant_writer = variants[index]
+            if variant_writer is not None:
+                variant_writer(obj, out)
+
+        return write
+
+
+def _append_enum_index(obj: Any, vals: list) -> None:
+    vals.append(obj.index)
+
+
+def _named_getters(fields: list[IdlField]) -> list[_Getter]:
+    getters = []
+    for field in fields:
+        field_name = snake(field.name)
+        attr_name = f"{field_name}_" if field_name in kwlist else field_name
+        getters.append(_field_getter(field_name, attr_name))
+    return getters
+
+
+def _attr_getter(name: str) -> _Getter:
+    return lambda obj: getattr(obj, name)
+
+
+def _tuple_data_getter(idx: int) -> _Getter:
+    return lambda obj: obj.tuple_data[idx]
@@ -1,6 +1,9 @@
 """This module deals with (de)serializing Anchor events."""
+import binascii
+from base64 import b64decode
 from hashlib import sha256
-from typing import Any, Dict, Optional, Tuple
+from struct import error as StructError
+from typing import AbstractSet, Any, Dict, Optional, Tuple
 
 from anchorpy_core.idl import (
     Idl,
@@ -12,9 +15,16 @@ from anchorpy_core.idl import (
 from construct import Adapter, Bytes, Construct, Sequence, Switch
 from pyheck import snake
 
+from anchorpy.coder.common import _idl_type_index
+from anchorpy.coder.compiled import _DecoderCompiler
 from anchorpy.coder.idl import _typedef_layout
+from anchorpy.idl import TypeDefs
 from anchorpy.program.common import Event
 
+EVENT_DISCRIMINATOR_SIZE = 8  # bytes
+# 12 base64 characters decode to 9 bytes, enough to cover the discriminator.
+_DISCRIMINATOR_B64_CHARS = 12
+
 
 def _event_discriminator(name: str) -> bytes:
     """Get 8-byte discriminator from event name.
@@ -25,11 +35,11 @@ def _event_discriminator(name: str) -> bytes:
     Returns:
         Discriminator
     """
-    return sha256(f"event:{name}".encode()).digest()[:8]
+    return sha256(f"event:{name}".encode()).digest()[:EVENT_DISCRIMINATOR_SIZE]
 
 
-def _event_layout(event: IdlEvent, idl: Idl) -> Construct:
-    event_type_def = IdlTypeDefinition(
+def _event_typedef(event: IdlEvent) -> IdlTypeDefinition:
+    return IdlTypeDefinition(
         name=event.name,
         docs=None,
         ty=IdlTypeDefinitionTyStruct(
@@ -38,7 +48,10 @@ def _event_layout(event: IdlEvent, idl: Idl) -> Construct:
             ],
         ),
     )
-    return _typedef_layout(event_type_def, idl.types, event.name)
+
+
+def _event_layout(event: IdlEvent, types: TypeDefs) -> Construct:
+    return _typedef_layout(_event_typedef(event), types, event.name)
 
 
 class EventCoder(Adapter):
@@ -52,9 +65,10 @@ class EventCoder(Adapter):
         """
         self.idl = idl
         idl_events = idl.events
+        types = _idl_type_index(idl)
         layouts: Dict[str, Construct]
         if idl_events:
-            layouts = {event.name: _event_layout(event, idl) for event in idl_events}
+            layouts = {event.name: _event_layout(event, types) for event in idl_events}
         else:
             layouts = {}
         self.layouts = layouts
@@ -67,12 +81,60 @@ class EventCoder(Adapter):
             disc: self.layouts[event_name]
             for disc, event_name in self.discriminators.items()
         }
+        compiler = _DecoderCompiler(types)
+        self._discriminator_to_decoder = (
+            {}
+            if idl_events is None
+            else {
+                _event_discriminator(event.name): compiler.decoder(
+                    _event_typedef(event)
+                )
+                for event in idl_events
+            }
+        )
         subcon = Sequence(
-            "discriminator" / Bytes(8),  # not base64-encoded here
+            "discriminator" / Bytes(EVENT_DISCRIMINATOR_SIZE),  # not base64-encoded
             Switch(lambda this: this.discriminator, self.discriminator_to_layout),
         )
         super().__init__(subcon)  # type: ignore
 
+    def decode(
+        self, log: str, discriminators: Optional[AbstractSet[bytes]] = None
+    ) -> Optional[Event]:
+        """Decode a base64-encoded event from a program log.
+
+        Only the first few base64 characters are decoded before checking the
+        discriminator, so logs that are not events are rejected cheaply.
+
+        Args:
+            log: The base64 part of a `Program data:` or `Program log:` line.
+            discriminators: Only decode events with these discriminators.
+                Defaults to all events in the IDL.
+
+        Returns:
+            The event, or None if the log is not a (selected) event.
+        """
+        try:
+            prefix = b64decode(log[:_DISCRIMINATOR_B64_CHARS], validate=True)
+        except binascii.Error:
+            return None
+        disc = prefix[:EVENT_DISCRIMINATOR_SIZE]
+        known = self.discriminators.keys() if discriminators is None else discriminators
+        if disc not in known:
+            return None
+        try:
+            decoded = b64decode(log)
+        except binascii.Error:
+            return None
+        try:
+            data = self._discriminator_to_decoder[disc](
+                decoded, EVENT_DISCRIMINATOR_SIZE
+            )[0]
+        except (StructError, ValueError, IndexError, KeyError):
+            # Let construct raise its usual error for malformed data.
+            return self.parse(decoded)
+        return Event(data=data, name=self.discriminators[disc])
+
     def _decode(self, obj: Tuple[bytes, Any], context, path) -> Optional[Event]:
         disc = obj[0]
         try:
@@ -0,0 +1,165 @@
+"""Locate account fields at fixed byte offsets, for `memcmp` filters."""
+import re
+from keyword import kwlist
+from typing import Optional, Union
+
+from anchorpy_core.idl import (
+    IdlType,
+    IdlTypeArray,
+    IdlTypeDefined,
+    IdlTypeDefinition,
+    IdlTypeDefinitionTyEnum,
+    IdlTypeDefinitionTyStruct,
+    IdlTypeSimple,
+)
+from pyheck import snake
+
+from anchorpy.coder.common import _SIMPLE_TYPE_SIZES, _TypeIndex
+
+_PATH_TOKEN = re.compile(r"(?:^|\.)([A-Za-z_]\w*)|\[(\d+)\]")
+_VARIABLE_SIMPLE = frozenset((IdlTypeSimple.Bytes, IdlTypeSimple.String))
+
+
+def _fixed_size(ty: IdlType, types: _TypeIndex) -> Optional[int]:
+    """Return the exact encoded size of a type, or None if it varies."""
+    if isinstance(ty, IdlTypeSimple):
+        return None if ty in _VARIABLE_SIMPLE else _SIMPLE_TYPE_SIZES[ty]
+    if isinstance(ty, IdlTypeArray):
+        inner = _fixed_size(ty.array[0], types)
+        return None if inner is None else inner * ty.array[1]
+    if isinstance(ty, IdlTypeDefined):
+        return _typedef_fixed_size(types.get(ty.defined), types)
+    # Vec and Option
+    return None
+
+
+def _typedef_fixed_size(typedef: IdlTypeDefinition, types: _TypeIndex) -> Optional[int]:
+    """Return the exact encoded size of a typedef, or None if it varies."""
+    typedef_type = typedef.ty
+    if isinstance(typedef_type, IdlTypeDefinitionTyEnum):
+        if any(variant.fields is not None for variant in typedef_type.variants):
+            return None
+        return 1
+    total = 0
+    for field in typedef_type.fields:
+        size = _fixed_size(field.ty, types)
+        if size is None:
+            return None
+        total += size
+    return total
+
+
+def _parse_path(path: str) -> list[Union[str, int]]:
+    if path.startswith("."):
+        raise ValueError(f"Invalid field path {path!r}")
+    segments: list[Union[str, int]] = []
+    pos = 0
+    while pos < len(path):
+        match = _PATH_TOKEN.match(path, pos)
+        if match is None:
+            raise ValueError(f"Invalid field path {path!r}")
+        name, index = match.groups()
+        segments.append(name if name is not None else int(index))
+        pos = match.end()
+    if not segments or not isinstance(segments[0], str):
+        raise ValueError(f"Invalid field path {path!r}")
+    return segments
+
+
+def _struct_type(
+    ty: Union[IdlType, IdlTypeDefinition], types: _TypeIndex
+) -> Optional[IdlTypeDefinitionTyStruct]:
+    typedef = types.get(ty.defined) if isinstance(ty, IdlTypeDefined) else ty
+    if isinstance(typedef, IdlTypeDefinition) and isinstance(
+        typedef.ty, IdlTypeDefinitionTyStruct
+    ):
+        return typedef.ty
+    return None
+
+
+def _field_location(
+    typedef: IdlTypeDefinition, path: str, types: _TypeIndex, start: int
+) -> tuple[int, IdlType]:
+    """Find the byte offset and type of a (nested) field.
+
+    Args:
+        typedef: The account definition.
+        path: Field path such as `"state"`, `"players[0]"` or `"config.owner"`.
+            Field names may be given in snake case or as in the IDL.
+        types: The IDL type index.
+        start: Offset of the first field, i.e. the discriminator size.
+
+    Raises:
+        ValueError: If the path does not exist or the field does not have a
+            fixed offset, i.e. it follows a variable-length field.
+
+    Returns:
+        The offset of the field in the account data and its IDL type.
+    """
+    offset = start
+    current: Union[IdlType, IdlTypeDefinition] = typedef
+    for segment in _parse_path(path):
+        if isinstance(segment, str):
+            struct = _struct_type(current, types)
+            if struct is None:
+                raise ValueError(f"Cannot get field {segment!r} of {path!r}")
+            for field in struct.fields:
+                field_name = snake(field.name)
+                aliases = (
+                    field.name,
+                    f"{field_name}_" if field_name in kwlist else field_name,
+                )
+                if segment in aliases:
+                    current = field.ty
+                    break
+                size = _fixed_size(field.ty, types)
+                if size is None:
+                    raise ValueError(
+                        f"Field {path!r} follows variable-length field "
+                        f"{field.name!r} so has no fixed offset"
+                    )
+                offset += size
+            else:
+                raise ValueError(f"Field {segment!r} of {path!r} not found")
+        else:
+            if not isinstance(current, IdlTypeArray):
+                raise ValueError(f"Cannot index into {path!r}")
+            item_type, length = current.array
+            if segment >= length:
+                raise ValueError(f"Index {segment} out of range in {path!r}")
+            if segment:
+                item_size = _fixed_size(item_type, types)
+                if item_size is None:
+                    raise ValueError(f"Items of {path!r} are variable-length")
+                offset += item_size * segment
+            current = item_type
+    if isinstance(current, IdlTypeDefinition):
+        raise ValueError(f"Invalid field path {path!r}")
+    return offset, current
+
+
+def _fixed_prefix(
+    typedef: IdlTypeDefinition, types: _TypeIndex, start: int
+) -> tuple[int, Optional[int]]:
+    """Find the leading fields that every account of a type has at a fixed offset.
+
+    Args:
+        typedef: The account definition.
+        types: The IDL type index.
+        start: Offset of the first field, i.e. the discriminator size.
+
+    Returns:
+        The end offset of the leading fixed-size fields, and the offset of the
+        first public key among them, if any.
+    """
+    offset = start
+    pubkey_offset = None
+    struct = _struct_type(typedef, types)
+    for field in struct.fields if struct is not None else ():
+        size = _fixed_size(field.ty, types)
+        if size is None:
+            break
+        if pubkey_offset is None and field.ty == IdlTypeSimple.PublicKey:
+            pubkey_offset = offset
+        offset += size
+    return offset, pubkey_offset
@@ -1,9 +1,10 @@
 """IDL coding."""
 from dataclasses import fields as dc_fields
 from dataclasses import make_dataclass
+from functools import partialmethod
 from keyword import kwlist
 from types import MappingProxyType
-from typing import Mapping, Type, cast
+from typing import Any, Mapping, Type, cast
 
 from anchorpy_core.idl import (
     IdlField,
@@ -43,6 +44,8 @@ from construct import Construct
 from pyheck import snake
 
 from anchorpy.borsh_extension import BorshPubkey, _DataclassStruct
+from anchorpy.coder.cache import _LRUCache
+from anchorpy.coder.common import _type_index, _TypeIndex
 from anchorpy.idl import TypeDefs
 
 FIELD_TYPE_MAP: Mapping[IdlTypeSimple, Construct] = MappingProxyType(
@@ -67,7 +70,12 @@ FIELD_TYPE_MAP: Mapping[IdlTypeSimple, Construct] = MappingProxyType(
 )
 
 
-_enums_cache: dict[tuple[str, str], Enum] = {}
+# The caches below keep generated types stable across coders built from equal
+# IDL definitions. They are keyed by the JSON of the definition, which is much
+# cheaper to produce than its str(). They are never evicted: a rebuilt class
+# would be a different object, so values decoded before and after would no
+# longer compare equal or pass isinstance checks.
+_enums_cache: _LRUCache[tuple[str, str], Enum] = _LRUCache(None)
 
 
 def _handle_enum_variants(
@@ -75,13 +83,66 @@ def _handle_enum_variants(
     types: TypeDefs,
     name: str,
 ) -> Enum:
-    dict_key = (name, str(idl_enum))
-    try:
-        return _enums_cache[dict_key]
-    except KeyError:
-        result = _handle_enum_variants_no_cache(idl_enum, types, name)
-        _enums_cache[dict_key] = result
-        return result
+    return _enums_cache.get_or_create(
+        (name, idl_enum.to_json()),
+        lambda: _handle_enum_variants_no_cache(idl_enum, types, name),
+    )
+
+
+def _reduce_enum_variant(
+    self: Any, enum_spec: tuple[str, str, tuple[str, ...]], variant_name: str
+) -> tuple[Any, ...]:
+    values = tuple(getattr(self, a.name) for a in self.__attrs_attrs__)
+    return _rebuild_enum_variant, (enum_spec, variant_name, values)
+
+
+def _rebuild_enum_variant(
+    enum_spec: tuple[str, str, tuple[str, ...]], variant_name: str, values: tuple
+) -> Any:
+    # The spec holds the enum and every type it refers to, so the enum can be
+    # rebuilt in a process that never loaded the IDL.
+    name, enum_json, typedefs_json = enum_spec
+    enum = _handle_enum_variants(
+        IdlTypeDefinitionTyEnum.from_json(enum_json),
+        _TypeIndex(IdlTypeDefinition.from_json(raw) for raw in typedefs_json),
+        name,
+    )
+    return getattr(enum.enum, variant_name)(*values)
+
+
+def _referenced_typedefs(
+    types_to_visit: list[IdlType], types: _TypeIndex
+) -> dict[str, IdlTypeDefinition]:
+    """Find the type definitions that the given types refer to, transitively."""
+    found: dict[str, IdlTypeDefinition] = {}
+    while types_to_visit:
+        ty = types_to_visit.pop()
+        if isinstance(ty, IdlTypeVec):
+            types_to_visit.append(ty.vec)
+        elif isinstance(ty, IdlTypeOption):
+            types_to_visit.append(ty.option)
+        elif isinstance(ty, IdlTypeArray):
+            types_to_visit.append(ty.array[0])
+        elif isinstance(ty, IdlTypeDefined) and ty.defined not in found:
+            typedef = types.get(ty.defined)
+            found[ty.defined] = typedef
+            typedef_type = typedef.ty
+            if isinstance(typedef_type, IdlTypeDefinitionTyStruct):
+                types_to_visit.extend(field.ty for field in typedef_type.fields)
+            else:
+                types_to_visit.extend(_variant_types(typedef_type))
+    return found
+
+
+def _variant_types(idl_enum: IdlTypeDefinitionTyEnum) -> list[IdlType]:
+    result: list[IdlType] = []
+    for variant in idl_enum.variants:
+        if variant.fields is not None:
+            result.extend(
+                fld.ty if isinstance(fld, IdlField) else fld
+                for fld in variant.fields.fields
+            )
+    return result
 
 
 def _handle_enum_variants_no_cache(
@@ -119,6 +180,15 @@ def _handle_enum_variants_no_cache(
                 renamed = variant_name / tuple_struct
             variants.append(renamed)  # type: ignore
     enum_without_types = Enum(*variants, enum_name=name)
+    referenced = _referenced_typedefs(_variant_types(idl_enum), _type_index(types))
+    enum_spec = (
+        name,
+        idl_enum.to_json(),
+        tuple(typedef.to_json() for typedef in referenced.values()),
+    )
+    for cname in enum_without_types.enum._sumtype_constructor_names:
+        variant_cls = getattr(enum_without_types.enum, cname)
+        variant_cls.__reduce__ = partialmethod(_reduce_enum_variant, enum_spec, cname)
     if dclasses:
         for cname in enum_without_types.enum._sumtype_constructor_names:
             try:
@@ -154,7 +224,7 @@ def _typedef_layout_without_field_name(
 
 def _typedef_layout(
     typedef: IdlTypeDefinition,
-    types: list[IdlTypeDefinition],
+    types: TypeDefs,
     field_name: str,
 ) -> Construct:
     """Map an IDL typedef to a `Construct` object.
@@ -170,7 +240,16 @@ def _typedef_layout(
     Returns:
         `Construct` object from `borsh-construct`.
     """
-    return field_name / _typedef_layout_without_field_name(typedef, types)
+    return field_name / _typedef_layout_without_field_name(typedef, _type_index(types))
+
+
+def _defined_layout(name: str, types: _TypeIndex) -> Construct:
+    try:
+        return types.layouts[name]
+    except KeyError:
+        result = _typedef_layout_without_field_name(types.get(name), types)
+        types.layouts[name] = result
+        return result
 
 
 def _type_layout(type_: IdlType, types: TypeDefs) -> Construct:
@@ -181,13 +260,7 @@ def _type_layout(type_: IdlType, types: TypeDefs) -> Construct:
     elif isinstance(type_, IdlTypeOption):
         return Option(_type_layout(type_.option, types))
     elif isinstance(type_, IdlTypeDefined):
-        defined = type_.defined
-        if not types:
-            raise ValueError("User defined types not provided")
-        filtered = [t for t in types if t.name == defined]
-        if len(filtered) != 1:
-            raise ValueError(f"Type not found {defined}")
-        return _typedef_layout_without_field_name(filtered[0], types)
+        return _defined_layout(type_.defined, _type_index(types))
     elif isinstance(type_, IdlTypeArray):
         array_ty = type_.array[0]
         array_len = type_.array[1]
@@ -212,27 +285,45 @@ def _field_layout(field: IdlField, types: TypeDefs) -> Construct:
         `Construct` object from `borsh-construct`.
     """
     field_name = snake(field.name) if field.name else ""
-    return field_name / _type_layout(field.ty, types)
+    return field_name / _type_layout(field.ty, _type_index(types))
+
+
+_datacls_cache: _LRUCache[tuple[str, tuple[str, ...]], Type] = _LRUCache(None)
 
 
 def _make_datacls(name: str, fields: list[str]) -> type:
-    return make_dataclass(name, fields)
+    key = (name, tuple(fields))
+    return _datacls_cache.get_or_create(
+        key,
+        lambda: make_dataclass(name, fields, namespace={"__reduce__": _reduce_datacls}),
+    )
+
+
+def _reduce_datacls(self: Any) -> tuple[Any, ...]:
+    # The generated classes cannot be found by pickle, so rebuild them by name
+    # and fields. This lets decoded values cross process boundaries.
+    names = tuple(f.name for f in dc_fields(self))
+    values = tuple(getattr(self, name) for name in names)
+    return _rebuild_datacls, (type(self).__name__, names, values)
+
+
+def _rebuild_datacls(name: str, names: tuple[str, ...], values: tuple) -> Any:
+    return _make_datacls(name, list(names))(*values)
 
 
-_idl_typedef_ty_struct_to_dataclass_type_cache: dict[tuple[str, str], Type] = {}
+_idl_typedef_ty_struct_to_dataclass_type_cache: _LRUCache[
+    tuple[str, str], Type
+] = _LRUCache(None)
 
 
 def _idl_typedef_ty_struct_to_dataclass_type(
     typedef_type: IdlTypeDefinitionTyStruct,
     name: str,
 ) -> Type:
-    dict_key = (name, str(typedef_type))
-    try:
-        return _idl_typedef_ty_struct_to_dataclass_type_cache[dict_key]
-    except KeyError:
-        result = _idl_typedef_ty_struct_to_dataclass_type_no_cache(typedef_type, name)
-        _idl_typedef_ty_struct_to_dataclass_type_cache[dict_key] = result
-        return result
+    return _idl_typedef_ty_struct_to_dataclass_type_cache.get_or_create(
+        (name, typedef_type.to_json()),
+        lambda: _idl_typedef_ty_struct_to_dataclass_type_no_cache(typedef_type, name),
+    )
 
 
 def _idl_typedef_ty_struct_to_dataclass_type_no_cache(
@@ -258,20 +349,19 @@ def _idl_typedef_ty_struct_to_dataclass_type_no_cache(
     return _make_datacls(name, dataclass_fields)
 
 
-_idl_enum_fields_named_to_dataclass_type_cache: dict[tuple[str, str], Type] = {}
+_idl_enum_fields_named_to_dataclass_type_cache: _LRUCache[
+    tuple[str, tuple[str, ...]], Type
+] = _LRUCache(None)
 
 
 def _idl_enum_fields_named_to_dataclass_type(
     fields: list[IdlField],
     name: str,
 ) -> Type:
-    dict_key = (name, str(fields))
-    try:
-        return _idl_enum_fields_named_to_dataclass_type_cache[dict_key]
-    except KeyError:
-        result = _idl_enum_fields_named_to_dataclass_type_no_cache(fields, name)
-        _idl_enum_fields_named_to_dataclass_type_cache[dict_key] = result
-        return result
+    return _idl_enum_fields_named_to_dataclass_type_cache.get_or_create(
+        (name, tuple(field.to_json() for field in fields)),
+        lambda: _idl_enum_fields_named_to_dataclass_type_no_cache(fields, name),
+    )
 
 
 def _idl_enum_fields_named_to_dataclass_type_no_cache(
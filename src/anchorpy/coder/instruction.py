@@ -1,16 +1,27 @@
 """This module deals (de)serializing program instructions."""
-from typing import Any, Dict, Protocol, Tuple, TypeVar, cast
+from struct import error as StructError
+from typing import Any, Callable, Dict, Tuple
 
 from anchorpy_core.idl import Idl
 from borsh_construct import CStruct
 from construct import Adapter, Bytes, Construct, Container, Sequence, Switch
 from pyheck import snake
 
-from anchorpy.coder.common import _sighash
+from anchorpy.coder.common import _idl_type_index, _sighash
+from anchorpy.coder.compiled import _EncoderCompiler
 from anchorpy.coder.idl import _field_layout
-from anchorpy.idl import TypeDefs
 from anchorpy.program.common import NamedInstruction
 
+_ENCODE_ERRORS = (
+    StructError,
+    ValueError,
+    TypeError,
+    KeyError,
+    AttributeError,
+    IndexError,
+    OverflowError,
+)
+
 
 class _Sighash(Adapter):
     """Sighash as a Construct Adapter."""
@@ -40,12 +51,21 @@ class InstructionCoder(Adapter):
         sighash_layouts: Dict[bytes, Construct] = {}
         sighashes: Dict[str, bytes] = {}
         sighash_to_name: Dict[bytes, str] = {}
+        arg_names: Dict[str, list[str]] = {}
+        args_encoders: Dict[str, Callable[[Tuple[Any, ...]], bytes]] = {}
+        encoder_compiler = _EncoderCompiler(_idl_type_index(idl))
         for ix in idl.instructions:
             ix_name = snake(ix.name)
             sh = sighasher.build(ix_name)
             sighashes[ix_name] = sh
             sighash_layouts[sh] = self.ix_layout[ix_name]
             sighash_to_name[sh] = ix_name
+            arg_names[ix_name] = [snake(arg.name) for arg in ix.args]
+            args_encoders[ix_name] = encoder_compiler.args_encoder(
+                sh, [arg.ty for arg in ix.args]
+            )
+        self._arg_names = arg_names
+        self._args_encoders = args_encoders
         self.sighash_layouts = sighash_layouts
         self.sighashes = sighashes
         self.sighash_to_name = sighash_to_name
@@ -65,7 +85,38 @@ class InstructionCoder(Adapter):
         Returns:
             The encoded instruction.
         """
-        return self.build(NamedInstruction(name=ix_name, data=ix))
+        try:
+            args = tuple(ix[name] for name in self._arg_names[ix_name])
+            return self._args_encoders[ix_name](args)
+        except _ENCODE_ERRORS:
+            # Let construct raise its usual error for invalid input.
+            return self.build(NamedInstruction(name=ix_name, data=ix))
+
+    def encode_args(self, ix_name: str, args: Tuple[Any, ...]) -> bytes:
+        """Encode a program instruction from positional arguments.
+
+        This skips building an intermediate `NamedInstruction`.
+
+        Args:
+            ix_name: The name of the instruction.
+            args: The instruction arguments, in IDL order.
+
+        Raises:
+            ValueError: If the number of arguments does not match the IDL.
+
+        Returns:
+            The encoded instruction.
+        """
+        arg_names = self._arg_names[ix_name]
+        if len(args) != len(arg_names):
+            raise ValueError(
+                f"{ix_name} takes {len(arg_names)} arguments, got {len(args)}"
+            )
+        try:
+            return self._args_encoders[ix_name](args)
+        except _ENCODE_ERRORS:
+            data = dict(zip(arg_names, args))  # noqa: B905
+            return self.build(NamedInstruction(name=ix_name, data=data))
 
     def _decode(self, obj: Tuple[bytes, Any], context, path) -> NamedInstruction:
         return NamedInstruction(data=obj[1], name=self.sighash_to_name[obj[0]])
@@ -76,23 +127,11 @@ class InstructionCoder(Adapter):
         return (self.sighashes[obj.name], obj.data)
 
 
-_SA = TypeVar("_SA", bound="_SupportsAdd")
-
-
-class _SupportsAdd(Protocol):
-    """Any type T where +(:T, :T) -> T."""
-
-    def __add__(self: _SA, other: _SA) -> _SA:
-        ...
-
-
 def _parse_ix_layout(idl: Idl) -> Dict[str, Construct]:
     ix_layout: Dict[str, Construct] = {}
+    types = _idl_type_index(idl)
     for ix in idl.instructions:
-        typedefs = cast(_SupportsAdd, idl.accounts) + cast(_SupportsAdd, idl.types)
-        field_layouts = [
-            _field_layout(arg, cast(TypeDefs, typedefs)) for arg in ix.args
-        ]
+        field_layouts = [_field_layout(arg, types) for arg in ix.args]
         ix_name = snake(ix.name)
         ix_layout[ix_name] = ix_name / CStruct(*field_layouts)
     return ix_layout
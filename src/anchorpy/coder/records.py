@@ -0,0 +1,101 @@
+"""Slotted record classes, a compact alternative to the generated dataclasses.
+
+Instances of the generated dataclasses carry a `__dict__`. Record classes
+use `__slots__` instead, which makes each instance several times smaller
+when holding many decoded accounts in memory.
+"""
+from keyword import kwlist
+from typing import Any, Literal, Tuple, Type
+
+from anchorpy_core.idl import IdlTypeDefinitionTyStruct
+from pyheck import snake
+
+from anchorpy.coder.cache import _LRUCache
+
+DecodeOutput = Literal["dataclass", "record", "tuple"]
+DECODE_OUTPUTS: Tuple[DecodeOutput, ...] = ("dataclass", "record", "tuple")
+
+
+class Record:
+    """Base class of the generated record classes.
+
+    Records are read-only and compare equal when they have the same type and
+    field values.
+    """
+
+    __slots__: Tuple[str, ...] = ()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Raise, since records are read-only."""
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __eq__(self, other: object) -> bool:
+        """Compare type and field values."""
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in self.__slots__)
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        """Show the field values like a dataclass does."""
+        args = ", ".join(f"{f}={getattr(self, f)!r}" for f in self.__slots__)
+        return f"{type(self).__name__}({args})"
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        """Pickle by name and fields, since generated classes are not importable."""
+        values = tuple(getattr(self, f) for f in self.__slots__)
+        return _rebuild_record, (type(self).__name__, self.__slots__, values)
+
+
+def _make_record_type(name: str, field_names: Tuple[str, ...]) -> Type[Record]:
+    for field_name in field_names:
+        if not field_name.isidentifier():
+            raise ValueError(f"Invalid field name {field_name!r}")
+    args = "".join(f", {f}" for f in field_names)
+    body = "".join(f"    __set(__record, {f!r}, {f})\n" for f in field_names)
+    namespace: dict[str, Any] = {"__set": object.__setattr__}
+    exec(f"def __init__(__record{args}):\n{body or '    pass'}", namespace)
+    return type(
+        name,
+        (Record,),
+        {"__slots__": field_names, "__init__": namespace["__init__"]},
+    )
+
+
+# Never evicted, so records of the same type always share one class.
+_record_type_cache: _LRUCache[Tuple[str, Tuple[str, ...]], Type[Record]] = _LRUCache(
+    None
+)
+
+
+def _record_type(name: str, field_names: Tuple[str, ...]) -> Type[Record]:
+    return _record_type_cache.get_or_create(
+        (name, field_names), lambda: _make_record_type(name, field_names)
+    )
+
+
+def _rebuild_record(name: str, field_names: Tuple[str, ...], values: tuple) -> Record:
+    return _record_type(name, field_names)(*values)
+
+
+def _idl_typedef_ty_struct_to_record_type(
+    typedef_type: IdlTypeDefinitionTyStruct, name: str
+) -> Type[Record]:
+    """Return the record class of an IDL struct.
+
+    Field names are snake-cased, with a trailing underscore for Python
+    keywords, like the generated dataclasses.
+
+    Args:
+        typedef_type: The IDL struct.
+        name: The name of the class.
+
+    Returns:
+        The record class, shared by equal IDL structs.
+    """
+    field_names = []
+    for field in typedef_type.fields:
+        field_name = snake(field.name)
+        field_names.append(f"{field_name}_" if field_name in kwlist else field_name)
+    return _record_type(name, tuple(field_names))
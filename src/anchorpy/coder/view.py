@@ -0,0 +1,154 @@
+"""This module provides `AccountView`, a lazy read-only view over account data."""
+from keyword import kwlist
+from struct import Struct, calcsize
+from typing import Any, Callable, Optional, cast
+
+from anchorpy_core.idl import (
+    IdlType,
+    IdlTypeDefinition,
+    IdlTypeDefinitionTyStruct,
+    IdlTypeSimple,
+    IdlTypeVec,
+)
+from pyheck import snake
+
+from anchorpy.coder.compiled import _as_decoder, _DecoderCompiler, _Fixed
+
+_Skipper = Callable[[memoryview, int], int]
+
+_U32 = Struct("<I")
+
+
+def _prefixed_skipper(item_size: int) -> _Skipper:
+    def skip(buf: memoryview, offset: int) -> int:
+        return offset + 4 + _U32.unpack_from(buf, offset)[0] * item_size
+
+    return skip
+
+
+class _ViewLayout:
+    """Field names, decoders and precomputed offsets for one account type."""
+
+    def __init__(
+        self, typedef: IdlTypeDefinition, compiler: _DecoderCompiler, start: int
+    ) -> None:
+        """Init.
+
+        Args:
+            typedef: The IDL account definition.
+            compiler: Compiler for the IDL's types.
+            start: Offset of the first field, i.e. the discriminator size.
+
+        Raises:
+            ValueError: If the account is not a struct.
+        """
+        typedef_type = typedef.ty
+        if not isinstance(typedef_type, IdlTypeDefinitionTyStruct):
+            raise ValueError(f"Cannot create a view of enum account {typedef.name}")
+        self.name = typedef.name
+        names = []
+        decoders = []
+        skippers: list[Optional[_Skipper]] = []
+        sizes: list[Optional[int]] = []
+        for field in typedef_type.fields:
+            field_name = snake(field.name)
+            names.append(f"{field_name}_" if field_name in kwlist else field_name)
+            compiled = compiler.compile_type(field.ty)
+            decoders.append(_as_decoder(compiled))
+            if isinstance(compiled, _Fixed):
+                sizes.append(calcsize(f"<{compiled.fmt}"))
+                skippers.append(None)
+            else:
+                sizes.append(None)
+                skippers.append(_variable_skipper(field.ty, compiler))
+        self.names = tuple(names)
+        self.index = {name: idx for idx, name in enumerate(names)}
+        self.decoders = decoders
+        self.sizes = sizes
+        self.skippers = skippers
+        # Offsets are static up to and including the first variable-length field.
+        offsets: list[Optional[int]] = []
+        offset: Optional[int] = start
+        for size in sizes:
+            offsets.append(offset)
+            offset = None if offset is None or size is None else offset + size
+        offsets.append(offset)
+        self.static_offsets = offsets
+
+
+def _variable_skipper(ty: IdlType, compiler: _DecoderCompiler) -> _Skipper:
+    """Return a function that finds the end of a variable-length field."""
+    if isinstance(ty, IdlTypeSimple):  # bytes or string
+        return _prefixed_skipper(1)
+    if isinstance(ty, IdlTypeVec):
+        inner = compiler.compile_type(ty.vec)
+        if isinstance(inner, _Fixed):
+            return _prefixed_skipper(calcsize(f"<{inner.fmt}"))
+    decoder = _as_decoder(compiler.compile_type(ty))
+    return lambda buf, offset: decoder(buf, offset)[1]
+
+
+class AccountView:
+    """Read-only view over the raw bytes of an account.
+
+    Fields are accessed as attributes, like on the decoded account, but each
+    field is only decoded when it is accessed. Offsets of fields that follow a
+    variable-length field are computed on first use and cached on the view.
+    """
+
+    __slots__ = ("_layout", "_buf", "_offsets")
+
+    def __init__(self, layout: _ViewLayout, data: bytes) -> None:
+        """Init.
+
+        Args:
+            layout: The precomputed layout of the account type.
+            data: The raw account data, including the discriminator.
+        """
+        object.__setattr__(self, "_layout", layout)
+        object.__setattr__(self, "_buf", memoryview(data))
+        object.__setattr__(self, "_offsets", list(layout.static_offsets))
+
+    def __getattr__(self, name: str) -> Any:
+        """Decode and return a field."""
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            idx = self._layout.index[name]
+        except KeyError as e:
+            raise AttributeError(
+                f"{self._layout.name} has no field {name!r}",
+            ) from e
+        return self._layout.decoders[idx](self._buf, self._offset(idx))[0]
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Raise, since views are read-only."""
+        raise AttributeError("AccountView is read-only")
+
+    def __dir__(self) -> list[str]:
+        """Include field names for autocompletion."""
+        return [*super().__dir__(), *self._layout.names]
+
+    def __repr__(self) -> str:
+        """Show the account name and its field names."""
+        return f"AccountView({self._layout.name}, fields={list(self._layout.names)})"
+
+    def _offset(self, idx: int) -> int:
+        offsets = self._offsets
+        offset = offsets[idx]
+        if offset is not None:
+            return offset
+        known = idx - 1
+        while offsets[known] is None:
+            known -= 1
+        layout = self._layout
+        offset = cast(int, offsets[known])
+        for pos in range(known, idx):
+            size = layout.sizes[pos]
+            if size is None:
+                skipper = cast(_Skipper, layout.skippers[pos])
+                offset = skipper(self._buf, offset)
+            else:
+                offset += size
+            offsets[pos + 1] = offset
+        return offset
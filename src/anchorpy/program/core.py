@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import zlib
+from functools import partial
 from typing import Any, Optional
 
 from anchorpy_core.idl import Idl
@@ -9,11 +10,12 @@ from pyheck import snake
 from solders.pubkey import Pubkey
 
 from anchorpy.coder.accounts import ACCOUNT_DISCRIMINATOR_SIZE
-from anchorpy.coder.coder import Coder
+from anchorpy.coder.coder import Coder, get_coder
 from anchorpy.error import IdlNotFoundError
 from anchorpy.idl import _decode_idl_account, _idl_address
 from anchorpy.program.common import AddressType, translate_address
 from anchorpy.program.namespace.account import AccountClient, _build_account
+from anchorpy.program.namespace.events import EventClient
 from anchorpy.program.namespace.instruction import (
     _InstructionFn,
 )
@@ -91,7 +93,13 @@ def _build_namespace(
 
     for idl_ix in idl.instructions:
 
-        ix_item = _InstructionFn(idl_ix, coder.instruction.build, program_id)
+        name = snake(idl_ix.name)
+        ix_item = _InstructionFn(
+            idl_ix,
+            coder.instruction.build,
+            program_id,
+            partial(coder.instruction.encode_args, name),
+        )
         tx_item = _build_transaction_fn(idl_ix, ix_item)
         rpc_item = _build_rpc_item(idl_ix, tx_item, idl_errors, provider, program_id)
         simulate_item = _build_simulate_item(
@@ -108,7 +116,6 @@ def _build_namespace(
         )
         methods_item = _build_methods_item(idl_funcs)
 
-        name = snake(idl_ix.name)
         instruction[name] = ix_item
         transaction[name] = tx_item
         rpc[name] = rpc_item
@@ -147,6 +154,9 @@ class Program(object):
     ):
         """Initialize the Program object.
 
+        The coder is shared with other programs built from an identical IDL,
+        see `anchorpy.get_coder`.
+
         Args:
             idl: The parsed IDL object.
             program_id: The program ID.
@@ -155,7 +165,7 @@ class Program(object):
         self.idl = idl
         self.program_id = program_id
         self.provider = provider if provider is not None else Provider.local()
-        self.coder = Coder(idl)
+        self.coder = get_coder(idl)
 
         (
             rpc,
@@ -179,6 +189,7 @@ class Program(object):
         self.simulate = simulate
         self.type = types
         self.methods = methods
+        self.events = EventClient(program_id, self.coder, self.provider)
 
     async def __aenter__(self) -> Program:
         """Use as a context manager."""
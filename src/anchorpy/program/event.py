@@ -1,18 +1,51 @@
 """This module contains code for handling Anchor events."""
-import binascii
-from base64 import b64decode
-from dataclasses import dataclass
-from typing import Callable, List, Optional, cast
+import re
+import sys
+from base64 import b64encode
+from dataclasses import dataclass, field
+from itertools import chain
+from typing import (
+    Callable,
+    Collection,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    NamedTuple,
+    Optional,
+    Pattern,
+    Tuple,
+    Union,
+    cast,
+)
 
 from solders.pubkey import Pubkey
 
 from anchorpy.coder.coder import Coder
+from anchorpy.coder.event import EventCoder
 from anchorpy.program.common import Event
 
 PROGRAM_LOG = "Program log: "
 PROGRAM_DATA = "Program data: "
 PROGRAM_LOG_START_INDEX = len(PROGRAM_LOG)
 PROGRAM_DATA_START_INDEX = len(PROGRAM_DATA)
+# Pushed for invocations of other programs.
+_CPI = sys.intern("cpi")
+# 8 base64 characters encode 6 bytes, all within the 8-byte discriminator.
+_EVENT_PREFIX_CHARS = 8
+# An invocation of, or a return from, the named program.
+_FRAME_LOG = re.compile(
+    r"Program (?P<program>[^ :]+) (?:(?P<invoke>invoke \[)|success$|failed: )"
+)
+
+LogsInput = Union[Iterable[str], Iterable[Iterable[str]]]
+
+
+class ProgramEvent(NamedTuple):
+    """An event and the program that emitted it."""
+
+    program_id: Pubkey
+    event: Event
 
 
 class _ExecutionContext:
@@ -31,7 +64,7 @@ class _ExecutionContext:
             program = log.split("Program ")[1].split(" invoke [")[0]
         except IndexError as e:
             raise ValueError("Could not find program invocation log line") from e
-        self.stack = [program]
+        self.stack = [sys.intern(program)]
 
     def program(self) -> str:
         """Return the currently executing program.
@@ -56,25 +89,90 @@ class _ExecutionContext:
 
 @dataclass
 class EventParser:
-    """Parser to handle on_logs callbacks."""
+    """Parser to handle on_logs callbacks.
+
+    Attributes:
+        program_id: The program whose events to parse.
+        coder: The program's coder.
+        event_names: If provided, only these events are decoded and all others
+            are skipped after a cheap discriminator check.
+    """
 
     program_id: Pubkey
     coder: Coder
+    event_names: Optional[Collection[str]] = None
+    _discriminators: FrozenSet[bytes] = field(init=False, repr=False, compare=False)
+    _event_prefixes: FrozenSet[str] = field(init=False, repr=False, compare=False)
+    _program_id_str: str = field(init=False, repr=False, compare=False)
+    _system_log: Pattern[str] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        """Compute the discriminators of the selected events and the log classifier.
 
-    def parse_logs(self, logs: List[str], callback: Callable[[Event], None]) -> None:
+        Raises:
+            ValueError: If `event_names` contains an event not in the IDL.
+        """
+        name_to_disc = {
+            name: disc for disc, name in self.coder.events.discriminators.items()
+        }
+        names = name_to_disc.keys() if self.event_names is None else self.event_names
+        unknown = set(names) - name_to_disc.keys()
+        if unknown:
+            raise ValueError(f"Unknown events: {sorted(unknown)}")
+        self._discriminators = frozenset(name_to_disc[name] for name in names)
+        self._event_prefixes = _event_prefixes(self._discriminators)
+        self._program_id_str = sys.intern(str(self.program_id))
+        # Only the part of a line before the first colon is classified. The
+        # alternatives are tried in order: a program finished, this program was
+        # invoked, or another program was invoked.
+        self._system_log = re.compile(
+            r"(?P<success>Program [^ :]* success(?::|$))"
+            rf"|(?P<invoke>Program {re.escape(self._program_id_str)} invoke)"
+            r"|(?P<cpi>[^:]*invoke)"
+        )
+
+    def parse_logs(
+        self, logs: Iterable[str], callback: Callable[[Event], None]
+    ) -> None:
         """Parse a list of logs using a provided callback.
 
         Args:
             logs: The logs to parse.
             callback: The function to handle the parsed log.
         """
+        for event in self._iter_transaction(logs):
+            callback(event)
+
+    def iter_events(self, logs: LogsInput) -> Iterator[Event]:
+        """Lazily parse the events of one or many transactions.
+
+        Args:
+            logs: The log lines of one transaction, or an iterable of log line
+                batches with one batch per transaction. Each batch is scanned
+                with its own execution stack, in a single pass.
+
+        Yields:
+            The decoded events, in log order.
+
+        Example:
+            >>> events = parser.iter_events(
+            ...     tx.meta.log_messages for tx in txs
+            ... )  # doctest: +SKIP
+        """
+        for batch in _batches(logs):
+            yield from self._iter_transaction(batch)
+
+    def _iter_transaction(self, logs: Iterable[str]) -> Iterator[Event]:
         log_scanner = _LogScanner(logs)
-        execution = _ExecutionContext(cast(str, log_scanner.to_next()))
+        first = log_scanner.to_next()
+        if first is None:
+            return
+        execution = _ExecutionContext(first)
         log = log_scanner.to_next()
         while log is not None:
             event, new_program, did_pop = self.handle_log(execution, log)
             if event is not None:
-                callback(event)
+                yield event
             if new_program is not None:
                 execution.push(new_program)
             if did_pop:
@@ -99,7 +197,7 @@ class EventParser:
             execution stack).
         """
         # Executing program is this program.
-        if execution.stack and execution.program() == str(self.program_id):
+        if execution.stack and execution.program() == self._program_id_str:
             return self.handle_program_log(log)
         # Executing program is not this program.
         return (None, *self.handle_system_log(log))
@@ -113,20 +211,17 @@ class EventParser:
             log: log string from the RPC node.
 
         """
-        # This is a `msg!` log or a `sol_log_data!` log.
-        if log.startswith(PROGRAM_LOG) or log.startswith(PROGRAM_DATA):
-            log_str = (
-                log[PROGRAM_LOG_START_INDEX:]
-                if log.startswith(PROGRAM_LOG)
-                else log[PROGRAM_DATA_START_INDEX:]
-            )
-            try:
-                decoded = b64decode(log_str)
-            except binascii.Error:
-                return None, None, False
-            event = self.coder.events.parse(decoded)
-            return event, None, False
-        return (None, *self.handle_system_log(log))
+        # This is a `sol_log_data!` log or a `msg!` log.
+        if log.startswith(PROGRAM_DATA):
+            log_str = log[PROGRAM_DATA_START_INDEX:]
+        elif log.startswith(PROGRAM_LOG):
+            log_str = log[PROGRAM_LOG_START_INDEX:]
+        else:
+            return (None, *self.handle_system_log(log))
+        if log_str[:_EVENT_PREFIX_CHARS] not in self._event_prefixes:
+            return None, None, False
+        event = self.coder.events.decode(log_str, self._discriminators)
+        return event, None, False
 
     def handle_system_log(self, log: str) -> tuple[Optional[str], bool]:
         """Handle logs when the current program being executing is *not* this.
@@ -135,23 +230,150 @@ class EventParser:
             log: log string from the RPC node.
 
         """
-        log_start = log.split(":")[0]
-        splitted = log_start.split(" ")
-        invoke_msg = f"Program {str(self.program_id)} invoke"
-        if len(splitted) == 3 and splitted[0] == "Program" and splitted[2] == "success":
+        match = self._system_log.match(log)
+        if match is None:
+            return None, False
+        kind = match.lastgroup
+        if kind == "success":
             return None, True
-        if log_start.startswith(invoke_msg):
-            return str(self.program_id), False
-        if "invoke" in log_start:
-            return "cpi", False
-        return None, False
+        if kind == "invoke":
+            return self._program_id_str, False
+        return _CPI, False
+
+
+@dataclass(frozen=True)
+class _WorkspaceProgram:
+    program_id: Pubkey
+    events: EventCoder
+    event_prefixes: FrozenSet[str]
+
+
+class WorkspaceEventParser:
+    """Parses the events of many programs in one pass over the logs.
+
+    The parser tracks the invocation stack and decodes each `Program data:`
+    or `Program log:` line with the coder of the program executing it, so
+    programs that CPI into each other share a single scan.
+
+    Example:
+        >>> parser = WorkspaceEventParser(
+        ...     (program.program_id, program.coder) for program in workspace.values()
+        ... )  # doctest: +SKIP
+        >>> for program_id, event in parser.iter_events(logs):  # doctest: +SKIP
+        ...     print(program_id, event.name)
+    """
+
+    def __init__(self, programs: Iterable[Tuple[Pubkey, Coder]]) -> None:
+        """Init.
+
+        Args:
+            programs: The programs whose events to parse, with their coders.
+
+        Raises:
+            ValueError: If a program is given twice.
+        """
+        self._programs: Dict[str, _WorkspaceProgram] = {}
+        for program_id, coder in programs:
+            key = sys.intern(str(program_id))
+            if key in self._programs:
+                raise ValueError(f"Program {key} was given twice")
+            events = coder.events
+            self._programs[key] = _WorkspaceProgram(
+                program_id, events, _event_prefixes(events.discriminators.keys())
+            )
+
+    @property
+    def program_ids(self) -> list[Pubkey]:
+        """Return the programs whose events are parsed."""
+        return [program.program_id for program in self._programs.values()]
+
+    def parse_logs(
+        self, logs: Iterable[str], callback: Callable[[ProgramEvent], None]
+    ) -> None:
+        """Parse the logs of one transaction using a provided callback.
+
+        Args:
+            logs: The logs to parse.
+            callback: The function to handle each parsed event.
+        """
+        for event in self._iter_transaction(logs):
+            callback(event)
+
+    def iter_events(self, logs: LogsInput) -> Iterator[ProgramEvent]:
+        """Lazily parse the events of one or many transactions.
+
+        Args:
+            logs: The log lines of one transaction, or an iterable of log line
+                batches with one batch per transaction.
+
+        Yields:
+            The decoded events with their programs, in log order.
+        """
+        for batch in _batches(logs):
+            yield from self._iter_transaction(batch)
+
+    def _iter_transaction(self, logs: Iterable[str]) -> Iterator[ProgramEvent]:
+        programs = self._programs
+        stack: list[str] = []
+        for log in _LogScanner(logs):
+            program = programs.get(stack[-1]) if stack else None
+            if program is not None:
+                if log.startswith(PROGRAM_DATA):
+                    log_str = log[PROGRAM_DATA_START_INDEX:]
+                elif log.startswith(PROGRAM_LOG):
+                    log_str = log[PROGRAM_LOG_START_INDEX:]
+                else:
+                    log_str = None
+                if log_str is not None:
+                    if log_str[:_EVENT_PREFIX_CHARS] in program.event_prefixes:
+                        event = program.events.decode(log_str)
+                        if event is not None:
+                            yield ProgramEvent(program.program_id, event)
+                    continue
+            match = _FRAME_LOG.match(log)
+            if match is None:
+                continue
+            if match.group("invoke") is not None:
+                stack.append(sys.intern(match.group("program")))
+            elif stack:
+                stack.pop()
+
+
+def _event_prefixes(discriminators: Iterable[bytes]) -> FrozenSet[str]:
+    """Return the base64 prefixes that logs of these events start with."""
+    return frozenset(
+        b64encode(disc)[:_EVENT_PREFIX_CHARS].decode() for disc in discriminators
+    )
+
+
+def _batches(logs: LogsInput) -> Iterator[Iterable[str]]:
+    """Split parser input into per-transaction log batches."""
+    items = iter(logs)
+    first = next(items, None)
+    if first is None:
+        return
+    if isinstance(first, str):
+        lines = cast(Iterator[str], items)
+        yield chain((first,), lines)
+        return
+    batches = cast(Iterator[Iterable[str]], items)
+    yield from chain((first,), batches)
 
 
-@dataclass
 class _LogScanner:
-    """Object that iterates over logs."""
+    """Object that iterates over logs in a single pass."""
+
+    def __init__(self, logs: Iterable[str]) -> None:
+        """Init.
+
+        Args:
+            logs: The logs to scan. They are consumed lazily, not copied.
+        """
+        self._logs = iter(logs)
 
-    logs: list[str]
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the remaining log lines."""
+        return self._logs
 
     def to_next(self) -> Optional[str]:
         """Move to the next log item.
@@ -159,8 +381,4 @@ class _LogScanner:
         Returns:
             The next log line, or None if there's nothing to return.
         """
-        if self.logs:
-            log = self.logs[0]
-            self.logs = self.logs[1:]
-            return log
-        return None
+        return next(self._logs, None)
@@ -1,15 +1,35 @@
 """Provides the `AccountClient` class."""
+from asyncio import Semaphore, gather, get_running_loop
+from concurrent.futures import Executor
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Sequence, Union
+from functools import partial
+from itertools import product
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncGenerator,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Union,
+    cast,
+)
 
 from anchorpy_core.idl import Idl, IdlTypeDefinition
 from based58 import b58encode
 from construct import Container
 from solana.rpc.commitment import Commitment
-from solana.rpc.types import MemcmpOpts
+from solana.rpc.core import RPCException
+from solana.rpc.types import DataSliceOpts, MemcmpOpts
 from solana.transaction import Instruction
 from solders.keypair import Keypair
 from solders.pubkey import Pubkey
+from solders.rpc.responses import RpcKeyedAccount
 from solders.system_program import CreateAccountParams, create_account
 
 from anchorpy.coder.accounts import (
@@ -18,9 +38,49 @@ from anchorpy.coder.accounts import (
 )
 from anchorpy.coder.coder import Coder
 from anchorpy.coder.common import _account_size
+from anchorpy.coder.records import DecodeOutput
+from anchorpy.coder.view import AccountView
 from anchorpy.error import AccountDoesNotExistError, AccountInvalidDiscriminator
+from anchorpy.program.namespace.replica import AccountReplica
 from anchorpy.provider import Provider
-from anchorpy.utils.rpc import get_multiple_accounts
+from anchorpy.utils.rpc import (
+    _DEFAULT_MAX_RETRIES,
+    _backoff,
+    _get_program_accounts_core,
+    _MultipleAccountsItem,
+    _RetryableError,
+    _SplittableError,
+    get_multiple_accounts,
+    iter_multiple_accounts,
+)
+from anchorpy.utils.snapshot import AccountSnapshot
+from anchorpy.utils.subscriptions import (
+    SubscriptionMultiplexer,
+    _notification_data,
+    _provider_subscriptions,
+)
+
+if TYPE_CHECKING:
+    import numpy as np
+
+AccountEncoding = Literal["base64", "base64+zstd"]
+SHARD_CONCURRENCY = 16
+_SHARD_VALUES = 256
+
+
+class _ShardLayout(NamedTuple):
+    """Where a sharded scan compares account data.
+
+    Attributes:
+        offset: Offset of the bytes to shard on.
+        prefix_bytes: How many bytes the initial shards compare.
+        max_bytes: How many bytes a failed shard can be split down to, i.e.
+            how many bytes from `offset` every account of the type has.
+    """
+
+    offset: int
+    prefix_bytes: int
+    max_bytes: int
 
 
 def _build_account(
@@ -52,7 +112,21 @@ class ProgramAccount:
     """Deserialized account owned by a program."""
 
     public_key: Pubkey
-    account: Container
+    account: Any
+
+
+@dataclass
+class ProgramAccountArray:
+    """Fixed-size accounts owned by a program, decoded into a NumPy array.
+
+    Attributes:
+        public_keys: The account addresses, in the same order as the rows.
+        accounts: A structured array with one row per account. Public keys are
+            32-byte `np.void` values; use `Pubkey(bytes(value))` to convert them.
+    """
+
+    public_keys: List[Pubkey]
+    accounts: "np.ndarray"
 
 
 class AccountClient(object):
@@ -82,66 +156,541 @@ class AccountClient(object):
         self._size = ACCOUNT_DISCRIMINATOR_SIZE + _account_size(idl, idl_account)
 
     async def fetch(
-        self, address: Pubkey, commitment: Optional[Commitment] = None
+        self,
+        address: Pubkey,
+        commitment: Optional[Commitment] = None,
+        output: DecodeOutput = "dataclass",
+        min_context_slot: Optional[int] = None,
     ) -> Container[Any]:
         """Return a deserialized account.
 
+        If the provider has an `account_cache`, a fresh cached copy is returned
+        instead of querying the node. If it has an `account_loader`, concurrent
+        calls are coalesced into shared `getMultipleAccounts` requests.
+
         Args:
             address: The address of the account to fetch.
             commitment: Bank state to query.
+            output: What to decode structs into, see `AccountsCoder.decode`.
+            min_context_slot: (optional) Only accept account data read at this
+                slot or later.
 
 
         Raises:
             AccountDoesNotExistError: If the account doesn't exist.
             AccountInvalidDiscriminator: If the discriminator doesn't match the IDL.
         """
-        account_info = await self._provider.connection.get_account_info(
-            address,
-            encoding="base64",
-            commitment=commitment,
-        )
-        if not account_info.value:
+        data = await self._fetch_data(address, commitment, min_context_slot)
+        return self._coder.accounts.decode(data, output)
+
+    async def fetch_view(
+        self,
+        address: Pubkey,
+        commitment: Optional[Commitment] = None,
+        min_context_slot: Optional[int] = None,
+    ) -> AccountView:
+        """Return a lazy read-only view of an account.
+
+        Fields are only decoded when accessed, which is much cheaper than `fetch`
+        when only a few fields of a large account are needed.
+
+        Args:
+            address: The address of the account to fetch.
+            commitment: Bank state to query.
+            min_context_slot: (optional) Only accept account data read at this
+                slot or later.
+
+        Raises:
+            AccountDoesNotExistError: If the account doesn't exist.
+            AccountInvalidDiscriminator: If the discriminator doesn't match the IDL.
+        """
+        data = await self._fetch_data(address, commitment, min_context_slot)
+        return self._coder.accounts.view(data)
+
+    async def _fetch_data(
+        self,
+        address: Pubkey,
+        commitment: Optional[Commitment],
+        min_context_slot: Optional[int] = None,
+    ) -> bytes:
+        provider = self._provider
+        if (
+            provider.account_cache is None
+            and provider.account_loader is None
+            and min_context_slot is None
+        ):
+            account_info = await self._provider.connection.get_account_info(
+                address,
+                encoding="base64",
+                commitment=commitment,
+            )
+            data = None if account_info.value is None else account_info.value.data
+        else:
+            # getAccountInfo in solana-py takes no minContextSlot.
+            items = await self._get_multiple_accounts(
+                [address], 1, commitment, min_context_slot, coalesce=True
+            )
+            data = None if items[0] is None else items[0].account.data
+        if data is None:
             raise AccountDoesNotExistError(f"Account {address} does not exist")
-        data = account_info.value.data
         discriminator = _account_discriminator(self._idl_account.name)
         if discriminator != data[:ACCOUNT_DISCRIMINATOR_SIZE]:
             msg = f"Account {address} has an invalid discriminator"
             raise AccountInvalidDiscriminator(msg)
-        return self._coder.accounts.decode(data)
+        return data
 
     async def fetch_multiple(
         self,
         addresses: List[Pubkey],
         batch_size: int = 300,
         commitment: Optional[Commitment] = None,
+        output: DecodeOutput = "dataclass",
+        executor: Optional[Executor] = None,
+        min_context_slot: Optional[int] = None,
     ) -> list[Optional[Container[Any]]]:
         """Return multiple deserialized accounts.
 
         Accounts not found or with wrong discriminator are returned as None.
+        If the provider has an `account_cache`, only the accounts missing from
+        it are requested.
 
         Args:
             addresses: The addresses of the accounts to fetch.
             batch_size: The number of `getMultipleAccounts` objects to send
                 in each HTTP request.
             commitment: Bank state to query.
+            output: What to decode structs into, see `AccountsCoder.decode`.
+            executor: (optional) Executor to decode in, keeping the event loop
+                free, see `AccountsCoder.decode_many`.
+            min_context_slot: (optional) Only accept account data read at this
+                slot or later.
         """
-        accounts = await get_multiple_accounts(
+        accounts = await self._get_multiple_accounts(
+            addresses, batch_size, commitment, min_context_slot
+        )
+        return await self._decode_accounts(accounts, output, executor)
+
+    async def iter_multiple(
+        self,
+        addresses: Sequence[Pubkey],
+        ordered: bool = False,
+        batch_size: int = 300,
+        commitment: Optional[Commitment] = None,
+        output: DecodeOutput = "dataclass",
+        executor: Optional[Executor] = None,
+    ) -> AsyncGenerator[tuple[Pubkey, Optional[Container[Any]]], None]:
+        """Yield deserialized accounts as each `getMultipleAccounts` batch arrives.
+
+        Unlike `fetch_multiple`, this does not hold every account in memory,
+        so it suits scanning very large address lists.
+        Accounts not found or with wrong discriminator are yielded as None.
+
+        Args:
+            addresses: The addresses of the accounts to fetch.
+            ordered: If True, yield accounts in the order of `addresses`.
+                Otherwise yield each batch as soon as it arrives.
+            batch_size: The number of `getMultipleAccounts` objects to send
+                in each HTTP request.
+            commitment: Bank state to query.
+            output: What to decode structs into, see `AccountsCoder.decode`.
+            executor: (optional) Executor to decode in, keeping the event loop
+                free, see `AccountsCoder.decode_many`.
+
+        Yields:
+            Pairs of address and account.
+        """
+        async for batch in iter_multiple_accounts(
             self._provider.connection,
             addresses,
             batch_size=batch_size,
             commitment=commitment,
+            ordered=ordered,
+        ):
+            decoded = await self._decode_accounts(batch.accounts, output, executor)
+            for idx, account in enumerate(decoded):
+                yield addresses[batch.start + idx], account
+
+    async def _get_multiple_accounts(
+        self,
+        addresses: List[Pubkey],
+        batch_size: int,
+        commitment: Optional[Commitment],
+        min_context_slot: Optional[int],
+        coalesce: bool = False,
+    ) -> List[Optional[_MultipleAccountsItem]]:
+        connection = self._provider.connection
+        cache = self._provider.account_cache
+        loader = self._provider.account_loader if coalesce else None
+        commitment_to_use = connection._commitment if commitment is None else commitment
+        result: List[Optional[_MultipleAccountsItem]] = [None] * len(addresses)
+        misses = []
+        for idx, address in enumerate(addresses):
+            cached = (
+                None
+                if cache is None
+                else cache.get(address, commitment_to_use, min_context_slot)
+            )
+            if cached is None:
+                misses.append(idx)
+            else:
+                result[idx] = _MultipleAccountsItem(
+                    address, cached.account, cached.slot
+                )
+        if not misses:
+            return result
+        to_fetch = [addresses[idx] for idx in misses]
+        if loader is None:
+            fetched = await get_multiple_accounts(
+                connection,
+                to_fetch,
+                batch_size=batch_size,
+                commitment=commitment_to_use,
+                min_context_slot=min_context_slot,
+            )
+        else:
+            fetched = await gather(
+                *(
+                    loader.load(address, commitment_to_use, min_context_slot)
+                    for address in to_fetch
+                )
+            )
+        for idx, item in zip(misses, fetched):  # noqa: B905
+            result[idx] = item
+            if cache is not None and item is not None:
+                cache.put(item.pubkey, commitment_to_use, item.account, item.slot)
+        return result
+
+    async def _decode_accounts(
+        self,
+        accounts: List[Optional[_MultipleAccountsItem]],
+        output: DecodeOutput,
+        executor: Optional[Executor],
+    ) -> list[Optional[Container[Any]]]:
+        discriminator = _account_discriminator(self._idl_account.name)
+        found = [
+            idx
+            for idx, account in enumerate(accounts)
+            if account is not None and account.account.data[:8] == discriminator
+        ]
+        decoded = await self._decode_many(
+            [cast(_MultipleAccountsItem, accounts[idx]).account.data for idx in found],
+            output,
+            executor,
+        )
+        result: list[Optional[Container[Any]]] = [None] * len(accounts)
+        for idx, account in zip(found, decoded):  # noqa: B905
+            result[idx] = account
+        return result
+
+    async def _decode_many(
+        self, buffers: List[bytes], output: DecodeOutput, executor: Optional[Executor]
+    ) -> List[Any]:
+        decode_many = self._coder.accounts.decode_many
+        if executor is None:
+            return decode_many(buffers, output=output)
+        loop = get_running_loop()
+        # decode_many blocks on the executor's futures, so wait off the loop.
+        return await loop.run_in_executor(
+            None, partial(decode_many, buffers, executor, output)
+        )
+
+    async def fetch_multiple_array(
+        self,
+        addresses: List[Pubkey],
+        batch_size: int = 300,
+        commitment: Optional[Commitment] = None,
+        min_context_slot: Optional[int] = None,
+    ) -> ProgramAccountArray:
+        """Return multiple accounts as a NumPy structured array.
+
+        Only works for account types whose layout is fully fixed-size.
+        Accounts not found or with wrong discriminator are left out, so
+        `public_keys` of the result says which addresses were found.
+        Requires the optional `numpy` dependency.
+
+        Args:
+            addresses: The addresses of the accounts to fetch.
+            batch_size: The number of `getMultipleAccounts` objects to send
+                in each HTTP request.
+            commitment: Bank state to query.
+            min_context_slot: (optional) Only accept account data read at this
+                slot or later.
+        """
+        accounts = await self._get_multiple_accounts(
+            addresses, batch_size, commitment, min_context_slot
         )
         discriminator = _account_discriminator(self._idl_account.name)
-        result: list[Optional[Container[Any]]] = []
-        for account in accounts:
-            if account is None:
-                result.append(None)
-            elif discriminator == account.account.data[:8]:
-                result.append(self._coder.accounts.decode(account.account.data))
+        found = [
+            account
+            for account in accounts
+            if account is not None and account.account.data[:8] == discriminator
+        ]
+        return ProgramAccountArray(
+            public_keys=[account.pubkey for account in found],
+            accounts=self._coder.accounts.decode_array(
+                self._idl_account.name, [account.account.data for account in found]
+            ),
+        )
+
+    async def sync_snapshot(
+        self,
+        snapshot: AccountSnapshot,
+        full: bool = False,
+        refresh_existing: bool = False,
+        batch_size: int = 300,
+        change_fields: Optional[Sequence[str]] = None,
+    ) -> None:
+        """Bring a snapshot of this account type up to date.
+
+        An empty snapshot, or `full=True`, is filled with one
+        `getProgramAccounts` scan. Otherwise only the addresses are listed,
+        through a `dataSlice`, closed accounts are removed and new or changed
+        accounts are fetched with `getMultipleAccounts`.
+
+        The RPC API cannot list the accounts modified after a slot. Pass
+        `change_fields`, such as a sequence number or last-update slot that
+        the program bumps on every write, to have the listing include them and
+        refetch the accounts where they differ from the stored data. Without
+        them, a resumed sync keeps the stored, possibly stale, data of
+        accounts that still exist unless `refresh_existing` is True. Keeping
+        the snapshot current while running, e.g. from `subscribe_all`, limits
+        that to the downtime.
+
+        Args:
+            snapshot: The snapshot of this client's program.
+            full: If True, rescan all account data.
+            refresh_existing: If True, also refetch accounts already stored.
+            batch_size: The number of `getMultipleAccounts` objects to send
+                in each HTTP request.
+            change_fields: (optional) Field paths that change whenever an
+                account does, see `all`. They must have a fixed offset and
+                size.
+
+        Raises:
+            ValueError: If the snapshot belongs to another program.
+        """
+        if snapshot.program_id != self._program_id:
+            raise ValueError("The snapshot belongs to another program")
+        connection = self._provider.connection
+        discriminator = _account_discriminator(self._idl_account.name)
+        stored = set(snapshot.pubkeys(discriminator))
+        slot = (await connection.get_slot(connection._commitment)).value
+        if full or not stored:
+            resp = await self._get_program_accounts(None, None, None, False)
+            snapshot.put_many((r.pubkey, r.account.data, slot) for r in resp)
+            snapshot.delete_many(stored.difference(r.pubkey for r in resp))
+        else:
+            data_slice = DataSliceOpts(0, 0)
+            if change_fields is not None:
+                projection = self._coder.accounts.projection(
+                    self._idl_account.name, change_fields
+                )
+                data_slice = DataSliceOpts(projection.offset, projection.length)
+            listed = await self._get_program_accounts(
+                None, None, None, False, data_slice=data_slice
+            )
+            current = {r.pubkey: r.account.data for r in listed}
+            snapshot.delete_many(stored.difference(current))
+            if refresh_existing:
+                to_fetch = list(current)
             else:
-                result.append(None)
+                to_fetch = [pubkey for pubkey in current if pubkey not in stored]
+                if change_fields is not None:
+                    start, end = (
+                        data_slice.offset,
+                        data_slice.offset + data_slice.length,
+                    )
+                    for chunk in snapshot.iter_chunks(discriminator):
+                        to_fetch.extend(
+                            pubkey
+                            for pubkey, data in chunk
+                            if pubkey in current and data[start:end] != current[pubkey]
+                        )
+            items = await get_multiple_accounts(
+                connection, to_fetch, batch_size=batch_size
+            )
+            snapshot.put_many(
+                (item.pubkey, item.account.data, item.slot)
+                for item in items
+                if item is not None
+            )
+            # Accounts closed between the listing and the fetch.
+            snapshot.delete_many(
+                pubkey
+                for pubkey, item in zip(to_fetch, items)  # noqa: B905
+                if item is None
+            )
+        snapshot.set_slot(slot)
+
+    async def load_snapshot(
+        self,
+        snapshot: AccountSnapshot,
+        output: DecodeOutput = "dataclass",
+        executor: Optional[Executor] = None,
+    ) -> list[ProgramAccount]:
+        """Decode all accounts of this type stored in a snapshot.
+
+        Args:
+            snapshot: The snapshot.
+            output: What to decode structs into, see `AccountsCoder.decode`.
+            executor: (optional) Executor to decode in, keeping the event loop
+                free, see `AccountsCoder.decode_many`.
+        """
+        discriminator = _account_discriminator(self._idl_account.name)
+        result: list[ProgramAccount] = []
+        for chunk in snapshot.iter_chunks(discriminator):
+            decoded = await self._decode_many(
+                [data for _, data in chunk], output, executor
+            )
+            result.extend(
+                ProgramAccount(public_key=pubkey, account=account)
+                for (pubkey, _), account in zip(chunk, decoded)  # noqa: B905
+            )
         return result
 
+    async def subscribe(
+        self,
+        address: Pubkey,
+        commitment: Optional[Commitment] = None,
+        output: DecodeOutput = "dataclass",
+    ) -> AsyncGenerator[Optional[Container[Any]], None]:
+        """Yield the account each time it changes, via `accountSubscribe`.
+
+        Subscriptions of all clients sharing the provider use one websocket
+        connection, see `Provider(subscriptions=...)`. They are resubscribed
+        automatically after a reconnect.
+
+        Args:
+            address: The address of the account to watch.
+            commitment: Bank state to watch.
+            output: What to decode structs into, see `AccountsCoder.decode`.
+
+        Yields:
+            The decoded account, or None once it is closed or no longer has
+            this account type's discriminator.
+        """
+        commitment_to_use = (
+            self._provider.connection._commitment if commitment is None else commitment
+        )
+        config = {"encoding": "base64+zstd", "commitment": commitment_to_use}
+        sub = await self._subscriptions().subscribe(
+            "accountSubscribe", [str(address), config]
+        )
+        discriminator = _account_discriminator(self._idl_account.name)
+        try:
+            async for result in sub:
+                data = _notification_data(result["value"])
+                if data[:ACCOUNT_DISCRIMINATOR_SIZE] != discriminator:
+                    yield None
+                else:
+                    yield self._coder.accounts.decode(data, output)
+        finally:
+            await sub.close()
+
+    async def subscribe_all(
+        self,
+        buffer: Optional[bytes] = None,
+        filters: Optional[Sequence[Union[int, MemcmpOpts]]] = None,
+        where: Optional[Mapping[str, Any]] = None,
+        exact_size: bool = False,
+        commitment: Optional[Commitment] = None,
+        output: DecodeOutput = "dataclass",
+    ) -> AsyncGenerator[ProgramAccount, None]:
+        """Yield accounts of this type as they change, via `programSubscribe`.
+
+        Takes the same filters as `all`, and shares the websocket connection
+        like `subscribe`.
+
+        Args:
+            buffer: bytes filter to append to the discriminator.
+            filters: (optional) Options to compare a provided series of bytes with
+                program account data at a particular offset.
+                Note: an int entry is converted to a `dataSize` filter.
+            where: (optional) Mapping of field path to value, see `all`.
+            exact_size: If True and the account type is fixed-size, add a
+                `dataSize` filter for it.
+            commitment: Bank state to watch.
+            output: What to decode structs into, see `AccountsCoder.decode`.
+
+        Yields:
+            The changed accounts.
+        """
+        sub = await self._subscriptions().subscribe(
+            "programSubscribe",
+            self._program_subscribe_params(
+                buffer, filters, where, exact_size, commitment
+            ),
+        )
+        try:
+            async for result in sub:
+                value = result["value"]
+                data = _notification_data(value["account"])
+                yield ProgramAccount(
+                    public_key=Pubkey.from_string(value["pubkey"]),
+                    account=self._coder.accounts.decode(data, output),
+                )
+        finally:
+            await sub.close()
+
+    def replica(
+        self,
+        indexes: Sequence[str] = (),
+        buffer: Optional[bytes] = None,
+        filters: Optional[Sequence[Union[int, MemcmpOpts]]] = None,
+        where: Optional[Mapping[str, Any]] = None,
+        exact_size: bool = False,
+        output: DecodeOutput = "dataclass",
+    ) -> AccountReplica:
+        """Return an in-memory replica of all accounts of this type.
+
+        Use it as an async context manager, or call `start` and `stop`.
+
+        Args:
+            indexes: Field paths to index for `AccountReplica.lookup`.
+            buffer: bytes filter to append to the discriminator.
+            filters: (optional) `memcmp` or `dataSize` filters, see `all`.
+            where: (optional) Mapping of field path to value, see `all`.
+            exact_size: If True and the account type is fixed-size, add a
+                `dataSize` filter for it.
+            output: What to decode structs into, see `AccountsCoder.decode`.
+        """
+        return AccountReplica(
+            self,
+            indexes,
+            buffer=buffer,
+            filters=filters,
+            where=where,
+            exact_size=exact_size,
+            output=output,
+        )
+
+    def _program_subscribe_params(
+        self,
+        buffer: Optional[bytes],
+        filters: Optional[Sequence[Union[int, MemcmpOpts]]],
+        where: Optional[Mapping[str, Any]],
+        exact_size: bool,
+        commitment: Optional[Commitment],
+    ) -> list:
+        commitment_to_use = (
+            self._provider.connection._commitment if commitment is None else commitment
+        )
+        filters_to_use: List[Dict[str, Any]] = [
+            {"dataSize": f}
+            if isinstance(f, int)
+            else {"memcmp": {"offset": f.offset, "bytes": f.bytes}}
+            for f in self._build_filters(buffer, filters, where, exact_size)
+        ]
+        config = {
+            "encoding": "base64+zstd",
+            "commitment": commitment_to_use,
+            "filters": filters_to_use,
+        }
+        return [str(self._program_id), config]
+
+    def _subscriptions(self) -> SubscriptionMultiplexer:
+        return _provider_subscriptions(self._provider)
+
     async def create_instruction(
         self,
         signer: Keypair,
@@ -176,39 +725,277 @@ class AccountClient(object):
         self,
         buffer: Optional[bytes] = None,
         filters: Optional[Sequence[Union[int, MemcmpOpts]]] = None,
+        where: Optional[Mapping[str, Any]] = None,
+        exact_size: bool = False,
+        output: DecodeOutput = "dataclass",
+        executor: Optional[Executor] = None,
+        fields: Optional[Sequence[str]] = None,
+        encoding: AccountEncoding = "base64",
+        sharded: bool = False,
+        shard_field: Optional[str] = None,
+        shard_offset: Optional[int] = None,
+        shard_bytes: int = 1,
+        shard_concurrency: int = SHARD_CONCURRENCY,
+        max_retries: int = _DEFAULT_MAX_RETRIES,
     ) -> list[ProgramAccount]:
         """Return all instances of this account type for the program.
 
+        Example:
+            >>> await program.account["Game"].all(
+            ...     where={"players[0]": player, "turn": 1},
+            ... )  # doctest: +SKIP
+            >>> await program.account["Position"].all(
+            ...     fields=["owner", "amount"],
+            ... )  # doctest: +SKIP
+            >>> await program.account["Position"].all(
+            ...     sharded=True, shard_field="owner"
+            ... )  # doctest: +SKIP
+
         Args:
             buffer: bytes filter to append to the discriminator.
             filters: (optional) Options to compare a provided series of bytes with
                 program account data at a particular offset.
                 Note: an int entry is converted to a `dataSize` filter.
+            where: (optional) Mapping of field path to value, such as
+                `{"state": ..., "players[0]": pk, "config.owner": pk}`.
+                Each entry becomes a `memcmp` filter at the field's offset,
+                so it only works for fields that do not follow a
+                variable-length field.
+            exact_size: If True and the account type is fixed-size, add a
+                `dataSize` filter for it. This lets the node skip other
+                accounts cheaply, but also excludes accounts of this type that
+                were allocated with extra space.
+            output: What to decode structs into, see `AccountsCoder.decode`.
+            executor: (optional) Executor to decode in, keeping the event loop
+                free, see `AccountsCoder.decode_many`.
+            fields: (optional) Field paths to fetch, see `where`. Only the byte
+                range covering them is requested, through a `dataSlice`, and
+                each `ProgramAccount.account` is a dict of field path to value.
+                The fields must have a fixed offset and size.
+            encoding: `"base64"`, or `"base64+zstd"` to have the node compress
+                account data. Not every RPC provider supports zstd.
+            sharded: If True, split the scan into `256 ** shard_bytes`
+                `getProgramAccounts` requests, one per value of the bytes at
+                the shard offset, and merge the results. This bounds the size
+                of each response for programs with very many accounts. A shard
+                whose request times out or is too large is split again on the
+                next byte, and rate limited or failed requests are retried.
+            shard_field: (optional) Field path to shard on, ideally a public
+                key or another evenly distributed value. Defaults to the first
+                public key field with a fixed offset, or else the first byte
+                after the discriminator.
+            shard_offset: (optional) Byte offset to shard on, instead of
+                `shard_field`.
+            shard_bytes: How many bytes the shards compare, 1 for 256 shards,
+                2 for 65536. They must come before the first variable-length
+                field, so that every account has them.
+            shard_concurrency: Maximum number of shard requests in flight.
+            max_retries: How many times to retry a shard request before
+                giving up.
         """
-        all_accounts = []
+        shard = (
+            self._shard_layout(shard_field, shard_offset, shard_bytes)
+            if sharded
+            else None
+        )
+        if fields is None:
+            resp = await self._get_program_accounts(
+                buffer,
+                filters,
+                where,
+                exact_size,
+                encoding=encoding,
+                shard=shard,
+                shard_concurrency=shard_concurrency,
+                max_retries=max_retries,
+            )
+            decoded = await self._decode_many(
+                [r.account.data for r in resp], output, executor
+            )
+        else:
+            projection = self._coder.accounts.projection(
+                self._idl_account.name, fields, output
+            )
+            resp = await self._get_program_accounts(
+                buffer,
+                filters,
+                where,
+                exact_size,
+                encoding=encoding,
+                data_slice=DataSliceOpts(projection.offset, projection.length),
+                shard=shard,
+                shard_concurrency=shard_concurrency,
+                max_retries=max_retries,
+            )
+            decoded = [projection.decode(r.account.data) for r in resp]
+        return [
+            ProgramAccount(public_key=r.pubkey, account=account)
+            for r, account in zip(resp, decoded)  # noqa: B905
+        ]
+
+    async def all_array(
+        self,
+        buffer: Optional[bytes] = None,
+        filters: Optional[Sequence[Union[int, MemcmpOpts]]] = None,
+        where: Optional[Mapping[str, Any]] = None,
+        exact_size: bool = False,
+    ) -> ProgramAccountArray:
+        """Return all instances of this account type as a NumPy structured array.
+
+        Only works for account types whose layout is fully fixed-size.
+        Requires the optional `numpy` dependency.
+
+        Args:
+            buffer: bytes filter to append to the discriminator.
+            filters: (optional) Options to compare a provided series of bytes with
+                program account data at a particular offset.
+                Note: an int entry is converted to a `dataSize` filter.
+            where: (optional) Mapping of field path to value, see `all`.
+            exact_size: If True, add a `dataSize` filter for the account size.
+        """
+        resp = await self._get_program_accounts(buffer, filters, where, exact_size)
+        return ProgramAccountArray(
+            public_keys=[r.pubkey for r in resp],
+            accounts=self._coder.accounts.decode_array(
+                self._idl_account.name, [r.account.data for r in resp]
+            ),
+        )
+
+    def _build_filters(
+        self,
+        buffer: Optional[bytes],
+        filters: Optional[Sequence[Union[int, MemcmpOpts]]],
+        where: Optional[Mapping[str, Any]],
+        exact_size: bool,
+    ) -> List[Union[int, MemcmpOpts]]:
         discriminator = _account_discriminator(self._idl_account.name)
         to_encode = discriminator if buffer is None else discriminator + buffer
         bytes_arg = b58encode(to_encode).decode("ascii")
-        base_memcmp_opt = MemcmpOpts(
-            offset=0,
-            bytes=bytes_arg,
-        )
-        filters_to_use = [base_memcmp_opt] + [] if filters is None else filters
-        resp = await self._provider.connection.get_program_accounts(
-            self._program_id,
-            encoding="base64",
-            commitment=self.provider.connection._commitment,
-            filters=filters_to_use,
+        filters_to_use: List[Union[int, MemcmpOpts]] = [
+            MemcmpOpts(offset=0, bytes=bytes_arg)
+        ]
+        if filters is not None:
+            filters_to_use.extend(filters)
+        accounts_coder = self._coder.accounts
+        name = self._idl_account.name
+        if where:
+            for path, value in where.items():
+                offset, encoded = accounts_coder.encode_field(name, path, value)
+                filters_to_use.append(
+                    MemcmpOpts(offset=offset, bytes=b58encode(encoded).decode("ascii"))
+                )
+        if exact_size and not any(isinstance(f, int) for f in filters_to_use):
+            size = accounts_coder.fixed_size(name)
+            if size is not None:
+                filters_to_use.append(size)
+        return filters_to_use
+
+    async def _get_program_accounts(
+        self,
+        buffer: Optional[bytes],
+        filters: Optional[Sequence[Union[int, MemcmpOpts]]],
+        where: Optional[Mapping[str, Any]],
+        exact_size: bool,
+        encoding: AccountEncoding = "base64",
+        data_slice: Optional[DataSliceOpts] = None,
+        shard: Optional[_ShardLayout] = None,
+        shard_concurrency: int = SHARD_CONCURRENCY,
+        max_retries: int = _DEFAULT_MAX_RETRIES,
+    ) -> List[RpcKeyedAccount]:
+        connection = self._provider.connection
+        filters_to_use = self._build_filters(buffer, filters, where, exact_size)
+        if shard is None:
+            resp = await connection.get_program_accounts(
+                self._program_id,
+                encoding=encoding,
+                commitment=connection._commitment,
+                data_slice=data_slice,
+                filters=filters_to_use,
+            )
+            return resp.value
+        layout = shard
+        semaphore = Semaphore(shard_concurrency)
+
+        async def get_shard(prefix: bytes) -> List[RpcKeyedAccount]:
+            shard_filter = MemcmpOpts(
+                offset=layout.offset, bytes=b58encode(prefix).decode("ascii")
+            )
+            attempt = 0
+            while True:
+                try:
+                    async with semaphore:
+                        return await _get_program_accounts_core(
+                            connection,
+                            self._program_id,
+                            encoding=encoding,
+                            commitment=connection._commitment,
+                            data_slice=data_slice,
+                            filters=[*filters_to_use, shard_filter],
+                        )
+                except _SplittableError as e:
+                    if len(prefix) >= layout.max_bytes:
+                        raise RPCException(
+                            f"Failed to get the accounts of shard {prefix.hex()}"
+                        ) from e
+                    return await get_shards(
+                        prefix + bytes([value]) for value in range(_SHARD_VALUES)
+                    )
+                except _RetryableError as e:
+                    if attempt >= max_retries:
+                        raise RPCException(
+                            f"Failed to get the accounts of shard {prefix.hex()} "
+                            f"after {attempt} retries"
+                        ) from e
+                    await _backoff(attempt, e)
+                    attempt += 1
+
+        async def get_shards(prefixes: Iterable[bytes]) -> List[RpcKeyedAccount]:
+            # A split adds 256 shards, so only `shard_concurrency` workers
+            # are scheduled to go through them rather than one task each.
+            to_fetch = list(prefixes)
+            shards: List[List[RpcKeyedAccount]] = [[] for _ in to_fetch]
+            pending = iter(enumerate(to_fetch))
+
+            async def worker() -> None:
+                for idx, prefix in pending:
+                    shards[idx] = await get_shard(prefix)
+
+            await gather(*(worker() for _ in range(shard_concurrency)))
+            return [account for shard in shards for account in shard]
+
+        return await get_shards(
+            bytes(values)
+            for values in product(range(_SHARD_VALUES), repeat=layout.prefix_bytes)
         )
-        for r in resp.value:
-            account_data = r.account.data
-            all_accounts.append(
-                ProgramAccount(
-                    public_key=r.pubkey,
-                    account=self._coder.accounts.decode(account_data),
-                ),
-            )
-        return all_accounts
+
+    def _shard_layout(
+        self, shard_field: Optional[str], shard_offset: Optional[int], shard_bytes: int
+    ) -> _ShardLayout:
+        accounts_coder = self._coder.accounts
+        name = self._idl_account.name
+        if shard_field is not None and shard_offset is not None:
+            raise ValueError("Pass shard_field or shard_offset, not both")
+        if shard_bytes < 1:
+            raise ValueError("shard_bytes must be at least 1")
+        prefix_end, pubkey_offset = accounts_coder.fixed_prefix(name)
+        if shard_field is not None:
+            offset = accounts_coder.projection(name, [shard_field]).offset
+        elif shard_offset is not None:
+            offset = shard_offset
+        elif pubkey_offset is not None:
+            offset = pubkey_offset
+        elif prefix_end > ACCOUNT_DISCRIMINATOR_SIZE:
+            offset = ACCOUNT_DISCRIMINATOR_SIZE
+        else:
+            raise ValueError(f"{name} has no data to shard on")
+        # Past the fixed prefix, accounts may be too short to match the shard
+        # filter and would be silently left out.
+        if offset + shard_bytes > prefix_end:
+            raise ValueError(
+                f"Not every {name} account has {shard_bytes} bytes at offset "
+                f"{offset}; shard within the first {prefix_end} bytes"
+            )
+        return _ShardLayout(offset, shard_bytes, prefix_end - offset)
 
     @property
     def size(self) -> int:
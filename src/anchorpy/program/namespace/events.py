@@ -0,0 +1,308 @@
+"""Provides the `EventClient` class."""
+import binascii
+from collections import deque
+from dataclasses import dataclass
+from typing import (
+    Any,
+    AsyncGenerator,
+    Collection,
+    Deque,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from construct import ConstructError
+from solana.rpc.commitment import Commitment, Finalized
+from solders.pubkey import Pubkey
+from solders.rpc.responses import RpcConfirmedTransactionStatusWithSignature
+from solders.signature import Signature
+
+from anchorpy.coder.coder import Coder
+from anchorpy.program.common import Event
+from anchorpy.program.event import EventParser
+from anchorpy.provider import Provider
+from anchorpy.utils.checkpoint import EventCheckpoint
+from anchorpy.utils.rpc import (
+    _DEFAULT_MAX_CONCURRENCY,
+    _DEFAULT_MAX_RETRIES,
+    _DEFAULT_TRANSACTION_BATCH_SIZE,
+    _iter_transaction_log_chunks,
+)
+from anchorpy.utils.subscriptions import (
+    DEFAULT_QUEUE_SIZE,
+    OverflowPolicy,
+    _provider_subscriptions,
+)
+
+# The most signatures `getSignaturesForAddress` returns per call.
+_SIGNATURES_LIMIT = 1000
+
+
+class EventNotification(NamedTuple):
+    """An event emitted by a transaction, as received live."""
+
+    signature: Signature
+    slot: int
+    event: Event
+
+
+@dataclass
+class BackfillStats:
+    """Progress of `EventClient.backfill`.
+
+    Pass an instance to `backfill` to have it updated.
+
+    Attributes:
+        transactions: Transactions fetched and parsed.
+        events: Events yielded.
+        missing: Transactions the node no longer has, e.g. because its
+            history was pruned. They are skipped.
+        malformed: Transactions whose logs hold malformed event data. Their
+            events are skipped.
+    """
+
+    transactions: int = 0
+    events: int = 0
+    missing: int = 0
+    malformed: int = 0
+
+
+class EventClient:
+    """Consume the events of a program."""
+
+    def __init__(self, program_id: Pubkey, coder: Coder, provider: Provider) -> None:
+        """Init.
+
+        Args:
+            program_id: The program ID.
+            coder: The program's coder.
+            provider: The Provider instance.
+        """
+        self._program_id = program_id
+        self._coder = coder
+        self._provider = provider
+
+    async def subscribe(
+        self,
+        names: Optional[Collection[str]] = None,
+        commitment: Optional[Commitment] = None,
+        maxsize: int = DEFAULT_QUEUE_SIZE,
+        overflow: OverflowPolicy = "drop-oldest",
+        include_failed: bool = False,
+    ) -> AsyncGenerator[EventNotification, None]:
+        """Yield events as transactions mentioning the program are processed.
+
+        Backed by `logsSubscribe`, sharing the provider's websocket connection
+        like `AccountClient.subscribe`. Logs are parsed as they arrive and the
+        decoded events are buffered until consumed.
+
+        Args:
+            names: (optional) Only yield these events.
+            commitment: Bank state to watch.
+            maxsize: How many events to buffer.
+            overflow: What to do when the buffer is full: `"block"` pauses
+                reading the websocket, `"drop-oldest"` drops the oldest event
+                and `"coalesce"` replaces the buffered event of the same name,
+                if any. Coalescing loses the replaced events, so only use it
+                when the latest event of each name is all that matters, e.g.
+                for price updates, and never for fills or transfers.
+            include_failed: If True, also yield the events of failed
+                transactions, whose effects were reverted.
+
+        Yields:
+            The events, with the signature and slot of their transaction.
+            Transactions whose logs are truncated or hold a malformed event
+            are skipped.
+
+        Example:
+            >>> async for notification in program.events.subscribe(
+            ...     names=["Fill"]
+            ... ):  # doctest: +SKIP
+            ...     print(notification.slot, notification.event.data)
+        """
+        parser = EventParser(self._program_id, self._coder, event_names=names)
+        commitment_to_use = (
+            self._provider.connection._commitment if commitment is None else commitment
+        )
+
+        def to_notifications(result: Any) -> List[EventNotification]:
+            value = result["value"]
+            logs = value["logs"]
+            if not logs or (value["err"] is not None and not include_failed):
+                return []
+            signature = Signature.from_string(value["signature"])
+            slot = result["context"]["slot"]
+            try:
+                return [
+                    EventNotification(signature, slot, event)
+                    for event in parser.iter_events(logs)
+                ]
+            except (ValueError, binascii.Error, ConstructError):
+                # Truncated logs or malformed event data.
+                return []
+
+        sub = await _provider_subscriptions(self._provider).subscribe(
+            "logsSubscribe",
+            [{"mentions": [str(self._program_id)]}, {"commitment": commitment_to_use}],
+            maxsize,
+            overflow,
+            to_notifications,
+            _event_name if overflow == "coalesce" else None,
+        )
+        try:
+            async for notification in sub:
+                yield notification
+        finally:
+            await sub.close()
+
+    async def backfill(
+        self,
+        checkpoint: EventCheckpoint,
+        min_slot: Optional[int] = None,
+        names: Optional[Collection[str]] = None,
+        batch_size: int = _DEFAULT_TRANSACTION_BATCH_SIZE,
+        max_concurrency: int = _DEFAULT_MAX_CONCURRENCY,
+        max_retries: int = _DEFAULT_MAX_RETRIES,
+        include_failed: bool = False,
+        commitment: Commitment = Finalized,
+        stats: Optional[BackfillStats] = None,
+    ) -> AsyncGenerator[EventNotification, None]:
+        """Yield the past events of the program, oldest first.
+
+        The signatures of the program's transactions after the checkpoint (or
+        since `min_slot`) are paged with `getSignaturesForAddress`. The API
+        pages newest first, so only the position of each page is kept at
+        first, and the pages are then listed again oldest first. Their
+        transactions are fetched concurrently with batched `getTransaction`
+        requests as the pages arrive, and their logs parsed in slot order.
+        Transactions the node no longer has and transactions with malformed
+        event data are skipped and counted in `stats`.
+
+        The checkpoint is saved after each batch of transactions, once their
+        events have been consumed, so a restarted backfill resumes after the
+        last complete batch. Events of a batch that was interrupted are
+        yielded again.
+
+        Args:
+            checkpoint: Where to resume from and to record progress.
+            min_slot: (optional) Skip transactions before this slot. Without
+                a checkpoint or `min_slot`, the whole history is fetched.
+            names: (optional) Only yield these events.
+            batch_size: The number of `getTransaction` calls per HTTP request.
+            max_concurrency: Maximum number of concurrent HTTP requests.
+            max_retries: How many times to retry a request before giving up.
+            include_failed: If True, also yield the events of failed
+                transactions, whose effects were reverted.
+            commitment: Bank state to query, `confirmed` or `finalized`.
+            stats: (optional) Statistics object to update.
+
+        Yields:
+            The events, with the signature and slot of their transaction.
+
+        Example:
+            >>> checkpoint = EventCheckpoint("fills.json", program.program_id)
+            >>> async for notification in program.events.backfill(
+            ...     checkpoint, names=["Fill"]
+            ... ):  # doctest: +SKIP
+            ...     store(notification)
+        """
+        parser = EventParser(self._program_id, self._coder, event_names=names)
+        stats_to_use = BackfillStats() if stats is None else stats
+        # The status to checkpoint at once each chunk is consumed, in order.
+        ends: Deque[RpcConfirmedTransactionStatusWithSignature] = deque()
+        last: Optional[RpcConfirmedTransactionStatusWithSignature] = None
+
+        async def chunks() -> AsyncGenerator[List[Signature], None]:
+            nonlocal last
+            chunk: List[Signature] = []
+            pages = self._signature_pages(checkpoint.signature, min_slot, commitment)
+            async for page in pages:
+                for status in page:
+                    last = status
+                    if not include_failed and status.err is not None:
+                        continue
+                    chunk.append(status.signature)
+                    if len(chunk) >= batch_size:
+                        ends.append(status)
+                        yield chunk
+                        chunk = []
+            if chunk and last is not None:
+                ends.append(last)
+                yield chunk
+
+        batches = _iter_transaction_log_chunks(
+            self._provider.connection,
+            chunks(),
+            commitment,
+            max_concurrency,
+            max_retries,
+            skip_missing=True,
+        )
+        try:
+            async for chunk, batch in batches:
+                stats_to_use.missing += len(chunk) - len(batch)
+                for tx in batch:
+                    stats_to_use.transactions += 1
+                    try:
+                        events = list(parser.iter_events(tx.logs))
+                    except (ValueError, binascii.Error, ConstructError):
+                        stats_to_use.malformed += 1
+                        continue
+                    for event in events:
+                        stats_to_use.events += 1
+                        yield EventNotification(tx.signature, tx.slot, event)
+                end = ends.popleft()
+                checkpoint.save(end.signature, end.slot)
+        finally:
+            await batches.aclose()
+        if last is not None:
+            # Also move past trailing failed transactions that were not fetched.
+            checkpoint.save(last.signature, last.slot)
+
+    async def _signature_pages(
+        self,
+        until: Optional[Signature],
+        min_slot: Optional[int],
+        commitment: Commitment,
+    ) -> AsyncGenerator[List[RpcConfirmedTransactionStatusWithSignature], None]:
+        """Page the program's signatures newer than `until`, oldest first."""
+        newest, cursor = await self._signature_page(None, until, min_slot, commitment)
+        # The signature before each older page, newest first.
+        cursors: List[Signature] = []
+        while cursor is not None:
+            cursors.append(cursor)
+            _, cursor = await self._signature_page(cursor, until, min_slot, commitment)
+        for before in reversed(cursors):
+            page, _ = await self._signature_page(before, until, min_slot, commitment)
+            yield page[::-1]
+        if newest:
+            yield newest[::-1]
+
+    async def _signature_page(
+        self,
+        before: Optional[Signature],
+        until: Optional[Signature],
+        min_slot: Optional[int],
+        commitment: Commitment,
+    ) -> Tuple[List[RpcConfirmedTransactionStatusWithSignature], Optional[Signature]]:
+        """Return a page of signatures, newest first, and the next page's cursor."""
+        resp = await self._provider.connection.get_signatures_for_address(
+            self._program_id,
+            before=before,
+            until=until,
+            limit=_SIGNATURES_LIMIT,
+            commitment=commitment,
+        )
+        page: Sequence[RpcConfirmedTransactionStatusWithSignature] = resp.value
+        if min_slot is not None and page and page[-1].slot < min_slot:
+            return [status for status in page if status.slot >= min_slot], None
+        if len(page) < _SIGNATURES_LIMIT:
+            return list(page), None
+        return list(page), page[-1].signature
+
+
+def _event_name(notification: EventNotification) -> str:
+    return notification.event.name
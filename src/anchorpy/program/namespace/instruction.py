@@ -1,5 +1,5 @@
 """This module deals with generating program instructions."""
-from typing import Any, Callable, Sequence, Tuple, cast
+from typing import Any, Callable, Optional, Sequence, Tuple, cast
 
 from anchorpy_core.idl import IdlAccount, IdlAccountItem, IdlAccounts, IdlInstruction
 from pyheck import snake
@@ -31,6 +31,7 @@ class _InstructionFn:
         idl_ix: IdlInstruction,
         encode_fn: Callable[[NamedInstruction], bytes],
         program_id: Pubkey,
+        args_encode_fn: Optional[Callable[[Sequence[Any]], bytes]] = None,
     ) -> None:
         """Init.
 
@@ -38,6 +39,8 @@ class _InstructionFn:
             idl_ix: IDL instruction object
             encode_fn: [description]
             program_id: The program ID.
+            args_encode_fn: Optional function encoding the positional args
+                directly. Used instead of `encode_fn` when provided.
 
         Raises:
             ValueError: [description]
@@ -47,6 +50,7 @@ class _InstructionFn:
         self.idl_ix = idl_ix
         self.encode_fn = encode_fn
         self.program_id = program_id
+        self.args_encode_fn = args_encode_fn
 
     def __call__(
         self,
@@ -67,10 +71,14 @@ class _InstructionFn:
         keys = self.accounts(ctx.accounts)
         if ctx.remaining_accounts:
             keys.extend(ctx.remaining_accounts)
+        if self.args_encode_fn is None:
+            data = self.encode_fn(_to_instruction(self.idl_ix, args))
+        else:
+            data = self.args_encode_fn(args)
         return Instruction(
             accounts=keys,
             program_id=self.program_id,
-            data=self.encode_fn(_to_instruction(self.idl_ix, args)),
+            data=data,
         )
 
     def accounts(self, accs: Accounts) -> list[AccountMeta]:
@@ -0,0 +1,260 @@
+"""Provides the `AccountReplica` class."""
+from asyncio import Task, ensure_future
+from contextlib import suppress
+from struct import error as StructError
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Hashable,
+    Iterator,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from construct import ConstructError
+from solana.rpc.types import MemcmpOpts
+from solders.pubkey import Pubkey
+
+from anchorpy.coder.accounts import ACCOUNT_DISCRIMINATOR_SIZE, FieldProjection
+from anchorpy.coder.records import DecodeOutput
+from anchorpy.utils.subscriptions import Subscription, _notification_data
+
+if TYPE_CHECKING:
+    from anchorpy.program.namespace.account import AccountClient
+
+REPLICA_QUEUE_SIZE = 65536
+_DECODE_ERRORS = (ConstructError, StructError, ValueError, IndexError, KeyError)
+
+
+class AccountReplica:
+    """An in-memory copy of all accounts of one type, kept current by websocket.
+
+    The replica is filled with `getProgramAccounts` and then applies the
+    `programSubscribe` notifications. If notifications were dropped or the
+    websocket reconnected, it fills itself again, so no change is missed.
+    Accounts whose data cannot be decoded are left out and counted in
+    `skipped`. If updating fails for any other reason, the error is raised by
+    the accessors and by `stop`.
+
+    Example:
+        >>> async with program.account["Order"].replica(
+        ...     indexes=["market"]
+        ... ) as orders:  # doctest: +SKIP
+        ...     market_orders = orders.lookup("market", market)
+    """
+
+    def __init__(
+        self,
+        client: "AccountClient",
+        indexes: Sequence[str] = (),
+        buffer: Optional[bytes] = None,
+        filters: Optional[Sequence[Union[int, MemcmpOpts]]] = None,
+        where: Optional[Mapping[str, Any]] = None,
+        exact_size: bool = False,
+        output: DecodeOutput = "dataclass",
+        queue_size: int = REPLICA_QUEUE_SIZE,
+    ) -> None:
+        """Init. Use `AccountClient.replica` instead of calling this directly.
+
+        Args:
+            client: The account client.
+            indexes: Field paths to index, see `lookup`. They must have a fixed
+                offset and size, and hashable values such as public keys.
+            buffer: bytes filter to append to the discriminator.
+            filters: (optional) `memcmp` or `dataSize` filters, see
+                `AccountClient.all`.
+            where: (optional) Mapping of field path to value, see
+                `AccountClient.all`.
+            exact_size: If True and the account type is fixed-size, add a
+                `dataSize` filter for it.
+            output: What to decode structs into, see `AccountsCoder.decode`.
+            queue_size: How many notifications to buffer, e.g. while filling.
+        """
+        self._client = client
+        self._buffer = buffer
+        self._filters = filters
+        self._where = where
+        self._exact_size = exact_size
+        self._output = output
+        self._queue_size = queue_size
+        name = client._idl_account.name
+        self._discriminator = client.coder.accounts.acc_name_to_discriminator[name]
+        self._projections: Dict[str, FieldProjection] = {
+            path: client.coder.accounts.projection(name, [path]) for path in indexes
+        }
+        self._accounts: Dict[Pubkey, Any] = {}
+        self._keys: Dict[Pubkey, Tuple[Hashable, ...]] = {}
+        self._indexes: Dict[str, Dict[Hashable, Dict[Pubkey, None]]] = {
+            path: {} for path in indexes
+        }
+        self._sub: Optional[Subscription] = None
+        self._task: Optional[Task] = None
+        self._error: Optional[Exception] = None
+        self.slot = 0
+        self.resyncs = 0
+        self.skipped = 0
+
+    async def start(self) -> None:
+        """Subscribe, fill the replica and keep it current in the background."""
+        client = self._client
+        self._error = None
+        self._sub = await client._subscriptions().subscribe(
+            "programSubscribe",
+            client._program_subscribe_params(
+                self._buffer, self._filters, self._where, self._exact_size, None
+            ),
+            self._queue_size,
+        )
+        # Counted before filling, so updates missed meanwhile trigger a refill.
+        dropped = self._sub.dropped
+        reconnects = client._subscriptions().reconnects
+        await self._bootstrap()
+        self._task = ensure_future(self._run(self._sub, dropped, reconnects))
+
+    async def stop(self) -> None:
+        """Stop applying updates and unsubscribe.
+
+        Raises:
+            Exception: The error that stopped updates in the background, if any.
+        """
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            with suppress(BaseException):
+                await task
+        if self._sub is not None:
+            await self._sub.close()
+            self._sub = None
+        self._raise_error()
+
+    async def __aenter__(self) -> "AccountReplica":
+        """Start the replica."""
+        await self.start()
+        return self
+
+    async def __aexit__(self, _exc_type, _exc, _tb) -> None:
+        """Stop the replica."""
+        await self.stop()
+
+    def get(self, pubkey: Pubkey) -> Optional[Any]:
+        """Return the decoded account, or None if it is not in the replica.
+
+        Args:
+            pubkey: The account address.
+        """
+        self._raise_error()
+        return self._accounts.get(pubkey)
+
+    def lookup(self, path: str, value: Hashable) -> Dict[Pubkey, Any]:
+        """Return the accounts whose indexed field has the given value.
+
+        Args:
+            path: One of the `indexes` field paths.
+            value: The field value, as it appears in decoded accounts.
+
+        Raises:
+            KeyError: If the field is not indexed.
+
+        Returns:
+            Mapping of address to decoded account for the matching accounts.
+        """
+        self._raise_error()
+        pubkeys = self._indexes[path].get(value, {})
+        return {pubkey: self._accounts[pubkey] for pubkey in pubkeys}
+
+    def __len__(self) -> int:
+        """Return the number of accounts."""
+        self._raise_error()
+        return len(self._accounts)
+
+    def __contains__(self, pubkey: object) -> bool:
+        """Check whether an account is in the replica."""
+        self._raise_error()
+        return pubkey in self._accounts
+
+    def __iter__(self) -> Iterator[Pubkey]:
+        """Iterate over the account addresses."""
+        self._raise_error()
+        return iter(self._accounts)
+
+    def items(self) -> Iterator[Tuple[Pubkey, Any]]:
+        """Iterate over addresses and decoded accounts."""
+        self._raise_error()
+        return iter(self._accounts.items())
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    async def _bootstrap(self) -> None:
+        client = self._client
+        resp = await client._get_program_accounts(
+            self._buffer, self._filters, self._where, self._exact_size
+        )
+        for pubkey in list(self._accounts):
+            self._remove(pubkey)
+        for keyed in resp:
+            self._apply(keyed.pubkey, keyed.account.data)
+
+    async def _run(self, sub: Subscription, dropped: int, reconnects: int) -> None:
+        try:
+            await self._follow(sub, dropped, reconnects)
+        except Exception as e:  # noqa: BLE001
+            # Kept to raise from the accessors, rather than lost with the task.
+            self._error = e
+
+    async def _follow(self, sub: Subscription, dropped: int, reconnects: int) -> None:
+        multiplexer = self._client._subscriptions()
+        async for result in sub:
+            if sub.dropped != dropped or multiplexer.reconnects != reconnects:
+                # Updates were missed, so start over from a full scan.
+                dropped = sub.dropped
+                reconnects = multiplexer.reconnects
+                self.resyncs += 1
+                await self._bootstrap()
+                continue
+            value = result["value"]
+            account = value["account"]
+            data = _notification_data(account) if account["lamports"] else b""
+            self._apply(Pubkey.from_string(value["pubkey"]), data)
+            self.slot = max(self.slot, result["context"]["slot"])
+
+    def _apply(self, pubkey: Pubkey, data: bytes) -> None:
+        if data[:ACCOUNT_DISCRIMINATOR_SIZE] != self._discriminator:
+            self._remove(pubkey)
+            return
+        try:
+            keys = tuple(
+                projection.decode(data[projection.offset :])[path]
+                for path, projection in self._projections.items()
+            )
+            account = self._client.coder.accounts.decode(data, self._output)
+        except _DECODE_ERRORS:
+            # Truncated or otherwise malformed, so drop any stale copy.
+            self.skipped += 1
+            self._remove(pubkey)
+            return
+        old_keys = self._keys.get(pubkey)
+        if old_keys != keys:
+            if old_keys is not None:
+                self._unindex(pubkey, old_keys)
+            for index, key in zip(self._indexes.values(), keys):  # noqa: B905
+                index.setdefault(key, {})[pubkey] = None
+            self._keys[pubkey] = keys
+        self._accounts[pubkey] = account
+
+    def _remove(self, pubkey: Pubkey) -> None:
+        if self._accounts.pop(pubkey, None) is None:
+            return
+        self._unindex(pubkey, self._keys.pop(pubkey))
+
+    def _unindex(self, pubkey: Pubkey, keys: Tuple[Hashable, ...]) -> None:
+        for index, key in zip(self._indexes.values(), keys):  # noqa: B905
+            pubkeys = index[key]
+            del pubkeys[pubkey]
+            if not pubkeys:
+                del index[key]
@@ -5,7 +5,7 @@ import json
 from os import environ, getenv
 from pathlib import Path
 from types import MappingProxyType
-from typing import List, NamedTuple, Optional, Union
+from typing import TYPE_CHECKING, List, NamedTuple, Optional, Union
 
 from more_itertools import unique_everseen
 from solana.rpc import types
@@ -17,6 +17,11 @@ from solders.pubkey import Pubkey
 from solders.rpc.responses import SimulateTransactionResp
 from solders.signature import Signature
 
+if TYPE_CHECKING:
+    from anchorpy.utils.cache import AccountCache
+    from anchorpy.utils.loader import AccountLoader
+    from anchorpy.utils.subscriptions import SubscriptionMultiplexer
+
 
 class SendTxRequest(NamedTuple):
     """Use this to provide custom signers to `Provider.send_all`.
@@ -42,6 +47,9 @@ class Provider:
         connection: AsyncClient,
         wallet: Wallet,
         opts: types.TxOpts = DEFAULT_OPTIONS,
+        account_cache: Optional[AccountCache] = None,
+        account_loader: Optional[AccountLoader] = None,
+        subscriptions: Optional[SubscriptionMultiplexer] = None,
     ) -> None:
         """Initialize the Provider.
 
@@ -49,10 +57,20 @@ class Provider:
             connection: The cluster connection where the program is deployed.
             wallet: The wallet used to pay for and sign all transactions.
             opts: Transaction confirmation options to use by default.
+            account_cache: (optional) Cache for the accounts read by
+                `AccountClient.fetch` and `AccountClient.fetch_multiple`.
+            account_loader: (optional) Coalesces concurrent `AccountClient.fetch`
+                calls into batched requests.
+            subscriptions: (optional) The websocket connection shared by
+                `AccountClient.subscribe` and `subscribe_all`. Created on first
+                use from the connection's endpoint if omitted.
         """
         self.connection = connection
         self.wallet = wallet
         self.opts = opts
+        self.account_cache = account_cache
+        self.account_loader = account_loader
+        self.subscriptions = subscriptions
 
     @classmethod
     def local(
@@ -194,6 +212,8 @@ class Provider:
 
     async def close(self) -> None:
         """Use this when you are done with the connection."""
+        if self.subscriptions is not None:
+            await self.subscriptions.close()
         await self.connection.close()
 
 
@@ -1,4 +1,12 @@
 """Various utility functions."""
-from anchorpy.utils import rpc, token
+from anchorpy.utils import (
+    cache,
+    checkpoint,
+    loader,
+    rpc,
+    snapshot,
+    subscriptions,
+    token,
+)
 
-__all__ = ["rpc", "token"]
+__all__ = ["cache", "checkpoint", "loader", "rpc", "snapshot", "subscriptions", "token"]
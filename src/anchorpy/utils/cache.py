@@ -0,0 +1,176 @@
+"""An in-memory cache of fetched accounts, see `Provider(account_cache=...)`."""
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from types import MappingProxyType
+from typing import Callable, Mapping, NamedTuple, Optional
+
+from solana.rpc.commitment import Commitment, Confirmed, Finalized, Processed
+from solders.pubkey import Pubkey
+
+from anchorpy.utils.rpc import AccountInfo
+
+DEFAULT_MAX_BYTES = 64 * 1048576
+# Roughly one slot for processed data; confirmed and finalized data changes
+# no faster than that but is also observed with a delay.
+DEFAULT_TTLS: Mapping[Commitment, float] = MappingProxyType(
+    {Processed: 0.4, Confirmed: 1.0, Finalized: 5.0}
+)
+# Rough per-entry cost of the key, the entry tuple and the account fields.
+_ENTRY_OVERHEAD = 200
+
+
+class CachedAccount(NamedTuple):
+    """An account held in an `AccountCache`.
+
+    Attributes:
+        account: The account info, including the raw data.
+        slot: The context slot the account was read at.
+        expires: When the entry expires, on the cache's clock.
+    """
+
+    account: AccountInfo
+    slot: int
+    expires: float
+
+
+class AccountCacheInfo(NamedTuple):
+    """Statistics of an `AccountCache`."""
+
+    hits: int
+    misses: int
+    currsize: int
+    nbytes: int
+    max_bytes: int
+
+
+class AccountCache:
+    """Thread-safe LRU cache of raw accounts keyed by (pubkey, commitment).
+
+    Entries expire after a TTL that depends on the commitment level, and the
+    least recently used entries are evicted once the total size of the cached
+    account data exceeds `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttls: Mapping[Commitment, float] = DEFAULT_TTLS,
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        """Init.
+
+        Args:
+            max_bytes: Memory budget for the cached entries, in bytes.
+            ttls: Seconds to keep entries for, per commitment level. Entries
+                for commitment levels not listed here are not cached.
+            clock: Returns the current time in seconds.
+
+        Raises:
+            ValueError: If `max_bytes` is not positive.
+        """
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be positive")
+        self.max_bytes = max_bytes
+        self.ttls = ttls
+        self._clock = clock
+        self._data: OrderedDict[
+            tuple[Pubkey, Commitment], CachedAccount
+        ] = OrderedDict()
+        self._lock = Lock()
+        self._nbytes = 0
+        self._hits = 0
+        self._misses = 0
+
+    def get(
+        self,
+        pubkey: Pubkey,
+        commitment: Commitment,
+        min_context_slot: Optional[int] = None,
+    ) -> Optional[CachedAccount]:
+        """Return a fresh cached account, or None on a miss.
+
+        Args:
+            pubkey: The account address.
+            commitment: The commitment level the account was read at.
+            min_context_slot: (optional) Treat entries read before this slot
+                as misses.
+
+        Returns:
+            The cached account if present, not expired and recent enough.
+        """
+        key = (pubkey, commitment)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry.expires <= self._clock():
+                self._remove(key)
+                entry = None
+            if entry is None or (
+                min_context_slot is not None and entry.slot < min_context_slot
+            ):
+                self._misses += 1
+                return None
+            self._hits += 1
+            self._data.move_to_end(key)
+            return entry
+
+    def put(
+        self,
+        pubkey: Pubkey,
+        commitment: Commitment,
+        account: AccountInfo,
+        slot: int,
+    ) -> None:
+        """Cache an account read at `slot`.
+
+        An entry read at a newer slot is not replaced.
+
+        Args:
+            pubkey: The account address.
+            commitment: The commitment level the account was read at.
+            account: The account info.
+            slot: The context slot of the RPC response.
+        """
+        ttl = self.ttls.get(commitment)
+        if ttl is None or ttl <= 0:
+            return
+        size = len(account.data) + _ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        key = (pubkey, commitment)
+        with self._lock:
+            existing = self._data.get(key)
+            if existing is not None:
+                if existing.slot > slot:
+                    return
+                self._remove(key)
+            self._data[key] = CachedAccount(account, slot, self._clock() + ttl)
+            self._nbytes += size
+            while self._nbytes > self.max_bytes:
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+
+    def invalidate(self, pubkey: Optional[Pubkey] = None) -> None:
+        """Drop the entries of one account, or of all accounts.
+
+        Args:
+            pubkey: (optional) The account to drop. Drops everything if omitted.
+        """
+        with self._lock:
+            if pubkey is None:
+                self._data.clear()
+                self._nbytes = 0
+                return
+            for key in [key for key in self._data if key[0] == pubkey]:
+                self._remove(key)
+
+    def info(self) -> AccountCacheInfo:
+        """Return the cache statistics."""
+        with self._lock:
+            return AccountCacheInfo(
+                self._hits, self._misses, len(self._data), self._nbytes, self.max_bytes
+            )
+
+    def _remove(self, key: tuple[Pubkey, Commitment]) -> None:
+        entry = self._data.pop(key)
+        self._nbytes -= len(entry.account.data) + _ENTRY_OVERHEAD
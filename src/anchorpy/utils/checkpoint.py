@@ -0,0 +1,63 @@
+"""A persistent checkpoint of an event backfill, for resuming it."""
+import json
+import os
+from pathlib import Path
+from typing import Optional, Union
+
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+
+
+class EventCheckpoint:
+    """The last transaction whose events a backfill has yielded, stored in a file.
+
+    Use with `EventClient.backfill`, which saves it as it goes and only
+    fetches transactions after it on the next run.
+    """
+
+    def __init__(self, path: Union[str, Path], program_id: Pubkey) -> None:
+        """Open a checkpoint file, or start a new one if it does not exist.
+
+        Args:
+            path: The JSON file.
+            program_id: The program whose events are backfilled.
+
+        Raises:
+            ValueError: If the file holds a checkpoint of another program.
+        """
+        self.path = Path(path)
+        self.program_id = program_id
+        self.signature: Optional[Signature] = None
+        self.slot = 0
+        if not self.path.exists():
+            return
+        stored = json.loads(self.path.read_text())
+        if stored["program_id"] != str(program_id):
+            raise ValueError(
+                f"{self.path} is a checkpoint of program {stored['program_id']}"
+            )
+        self.signature = Signature.from_string(stored["signature"])
+        self.slot = stored["slot"]
+
+    def save(self, signature: Signature, slot: int) -> None:
+        """Record the last processed transaction.
+
+        The file is replaced atomically, so a crash never leaves it corrupt.
+
+        Args:
+            signature: The transaction signature.
+            slot: The slot of the transaction.
+        """
+        tmp_path = self.path.with_name(f"{self.path.name}.tmp")
+        tmp_path.write_text(
+            json.dumps(
+                {
+                    "program_id": str(self.program_id),
+                    "signature": str(signature),
+                    "slot": slot,
+                }
+            )
+        )
+        os.replace(tmp_path, self.path)
+        self.signature = signature
+        self.slot = slot
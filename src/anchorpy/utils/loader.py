@@ -0,0 +1,139 @@
+"""Coalesce concurrent single-account reads, see `Provider(account_loader=...)`."""
+from asyncio import Future, Task, ensure_future, get_running_loop, shield
+from typing import Optional
+
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Commitment
+from solders.pubkey import Pubkey
+
+from anchorpy.utils.rpc import (
+    _GET_MULTIPLE_ACCOUNTS_LIMIT,
+    _MultipleAccountsItem,
+    get_multiple_accounts,
+)
+
+_BatchKey = tuple[Commitment, Optional[int]]
+
+
+class _Batch:
+    def __init__(self) -> None:
+        self.futures: dict[Pubkey, Future] = {}
+        self.dispatched = False
+
+
+class AccountLoader:
+    """Collects account reads made close together into `getMultipleAccounts` calls.
+
+    Like a DataLoader: every `load` call made before the batch is dispatched
+    joins the same request, and a pubkey already being requested is not
+    requested again. A batch is dispatched on the next event loop iteration, or after
+    `max_wait` seconds, or as soon as it holds `max_batch_size` pubkeys.
+    """
+
+    def __init__(
+        self,
+        connection: AsyncClient,
+        max_wait: float = 0.0,
+        max_batch_size: int = _GET_MULTIPLE_ACCOUNTS_LIMIT,
+    ) -> None:
+        """Init.
+
+        Args:
+            connection: The `solana-py` client object.
+            max_wait: Seconds to wait for more reads before sending a batch.
+                With the default of 0, only reads made in the same event loop
+                iteration are coalesced.
+            max_batch_size: The maximum number of pubkeys per batch.
+
+        Raises:
+            ValueError: If `max_batch_size` is not positive or `max_wait` is
+                negative.
+        """
+        if max_batch_size <= 0:
+            raise ValueError("max_batch_size must be positive")
+        if max_wait < 0:
+            raise ValueError("max_wait must not be negative")
+        self.connection = connection
+        self.max_wait = max_wait
+        self.max_batch_size = max_batch_size
+        self._batches: dict[_BatchKey, _Batch] = {}
+        self._in_flight: dict[tuple[_BatchKey, Pubkey], Future] = {}
+        self._tasks: set[Task] = set()
+
+    async def load(
+        self,
+        pubkey: Pubkey,
+        commitment: Optional[Commitment] = None,
+        min_context_slot: Optional[int] = None,
+    ) -> Optional[_MultipleAccountsItem]:
+        """Read one account as part of the next batch.
+
+        Args:
+            pubkey: The account address.
+            commitment: Bank state to query.
+            min_context_slot: (optional) The minimum slot the node may serve the
+                request at. Only reads with the same commitment and
+                `min_context_slot` share a batch.
+
+        Raises:
+            RPCException: If the batched request fails.
+
+        Returns:
+            The account info and pubkey, or None if the account does not exist.
+        """
+        commitment_to_use = (
+            self.connection._commitment if commitment is None else commitment
+        )
+        key = (commitment_to_use, min_context_slot)
+        future = self._in_flight.get((key, pubkey))
+        if future is None:
+            loop = get_running_loop()
+            batch = self._batches.get(key)
+            if batch is None:
+                batch = _Batch()
+                self._batches[key] = batch
+                if self.max_wait:
+                    loop.call_later(self.max_wait, self._dispatch, key, batch)
+                else:
+                    loop.call_soon(self._dispatch, key, batch)
+            future = loop.create_future()
+            batch.futures[pubkey] = future
+            self._in_flight[(key, pubkey)] = future
+            if len(batch.futures) >= self.max_batch_size:
+                self._dispatch(key, batch)
+        # Shield so one cancelled caller does not cancel the shared future.
+        return await shield(future)
+
+    def _dispatch(self, key: _BatchKey, batch: _Batch) -> None:
+        if batch.dispatched:
+            return
+        batch.dispatched = True
+        if self._batches.get(key) is batch:
+            del self._batches[key]
+        task = ensure_future(self._fetch(key, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(self, key: _BatchKey, batch: _Batch) -> None:
+        commitment, min_context_slot = key
+        pubkeys = list(batch.futures)
+        try:
+            items = await get_multiple_accounts(
+                self.connection,
+                pubkeys,
+                batch_size=1,
+                commitment=commitment,
+                min_context_slot=min_context_slot,
+            )
+        except Exception as e:  # noqa: BLE001
+            for future in batch.futures.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            for pubkey in pubkeys:
+                del self._in_flight[(key, pubkey)]
+        for pubkey, item in zip(pubkeys, items):  # noqa: B905
+            future = batch.futures[pubkey]
+            if not future.done():
+                future.set_result(item)
@@ -1,25 +1,59 @@
 """This module contains the invoke function."""
-from asyncio import gather
+import json
+from asyncio import Future, Queue, ensure_future, gather, get_running_loop, sleep
 from base64 import b64decode
+from collections import deque
+from concurrent.futures import Executor
 from dataclasses import dataclass
-from typing import Any, NamedTuple, Optional
+from random import random
+from threading import local
+from time import monotonic
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterable,
+    Deque,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
+import httpx
 import jsonrpcclient
 import zstandard
+from solana.exceptions import SolanaRpcException
 from solana.rpc.async_api import AsyncClient
-from solana.rpc.commitment import Commitment
+from solana.rpc.commitment import Commitment, Finalized
 from solana.rpc.core import RPCException
 from solana.transaction import Transaction
 from solders.instruction import AccountMeta, Instruction
 from solders.pubkey import Pubkey
+from solders.rpc.responses import RpcKeyedAccount
 from solders.signature import Signature
-from toolz import concat, partition_all
+from toolz import partition_all
 
 from anchorpy.program.common import AddressType, translate_address
 from anchorpy.provider import Provider
 
 _GET_MULTIPLE_ACCOUNTS_LIMIT = 100
 _MAX_ACCOUNT_SIZE = 10 * 1048576
+_DEFAULT_MAX_CONCURRENCY = 8
+_DEFAULT_MAX_RETRIES = 5
+_MAX_BATCH_SIZE = 20
+_TARGET_LATENCY = 2.0  # seconds
+_TARGET_RESPONSE_BYTES = 16 * 1048576
+_BACKOFF_BASE = 0.25  # seconds
+_MAX_RETRY_AFTER = 60.0  # seconds
+_HTTP_TOO_MANY_REQUESTS = 429
+_HTTP_PAYLOAD_TOO_LARGE = 413
+_HTTP_SERVER_ERROR = 500
+_HTTP_OK = 200
+_HTTP_MULTIPLE_CHOICES = 300
+# How much of an error response body to include in exceptions.
+_ERROR_BODY_CHARS = 500
+_OFFLOAD_THRESHOLD = 1048576
+_DEFAULT_TRANSACTION_BATCH_SIZE = 20
 
 
 class AccountInfo(NamedTuple):
@@ -73,6 +107,102 @@ async def invoke(
 class _MultipleAccountsItem:
     pubkey: Pubkey
     account: AccountInfo
+    slot: int = 0
+
+
+@dataclass
+class MultipleAccountsStats:
+    """Throughput statistics of `get_multiple_accounts`.
+
+    Pass an instance to `get_multiple_accounts` to have it updated. The same
+    instance can be reused to accumulate statistics over many calls.
+
+    Attributes:
+        requests: HTTP requests that succeeded.
+        accounts: Pubkeys fetched, including ones with no account.
+        bytes_received: Size of the successful HTTP responses.
+        elapsed: Seconds spent in `get_multiple_accounts`.
+        retries: Requests that were retried after a rate limit or server error.
+        rate_limited: Responses with HTTP status 429.
+        splits: Requests split in half after a timeout or an oversized response.
+        batch_size: The latest number of `getMultipleAccounts` calls per request.
+    """
+
+    requests: int = 0
+    accounts: int = 0
+    bytes_received: int = 0
+    elapsed: float = 0
+    retries: int = 0
+    rate_limited: int = 0
+    splits: int = 0
+    batch_size: int = 0
+
+    @property
+    def accounts_per_second(self) -> float:
+        """Return the average number of pubkeys fetched per second."""
+        return self.accounts / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def bytes_per_second(self) -> float:
+        """Return the average download rate in bytes per second."""
+        return self.bytes_received / self.elapsed if self.elapsed else 0.0
+
+
+class _RetryableError(Exception):
+    def __init__(self, retry_after: Optional[float] = None) -> None:
+        super().__init__()
+        self.retry_after = retry_after
+
+
+class _RateLimitedError(_RetryableError):
+    """The RPC node answered with HTTP 429."""
+
+
+class _SplittableError(Exception):
+    """The request timed out or its response was too large."""
+
+
+async def _backoff(attempt: int, error: _RetryableError) -> None:
+    """Wait before retrying a failed request, with jittered exponential backoff."""
+    delay = _BACKOFF_BASE * 2**attempt * (0.5 + random())
+    await sleep(delay if error.retry_after is None else error.retry_after)
+
+
+class _AdaptiveBatcher:
+    """Tunes the number of `getMultipleAccounts` calls sent per HTTP request.
+
+    The batch size grows by one while requests are fast and small, and halves
+    when a request is slow, too large or rate limited.
+    """
+
+    def __init__(self, initial: int) -> None:
+        self.size = max(1, initial)
+        self.max_size = max(self.size, _MAX_BATCH_SIZE)
+
+    def on_success(self, latency: float, nbytes: int) -> None:
+        if latency > _TARGET_LATENCY or nbytes > _TARGET_RESPONSE_BYTES:
+            self.size = max(1, self.size // 2)
+        elif latency < _TARGET_LATENCY / 2 and nbytes < _TARGET_RESPONSE_BYTES / 2:
+            self.size = min(self.max_size, self.size + 1)
+
+    def on_failure(self) -> None:
+        self.size = max(1, self.size // 2)
+
+
+class MultipleAccountsBatch(NamedTuple):
+    """Accounts fetched by one HTTP request of `iter_multiple_accounts`.
+
+    Attributes:
+        start: Index in the input pubkeys of the first account in the batch.
+        accounts: Account infos and pubkeys, None where no account exists.
+            `accounts[i]` belongs to `pubkeys[start + i]`.
+    """
+
+    start: int
+    accounts: list[Optional[_MultipleAccountsItem]]
+
+
+_DONE = object()
 
 
 async def get_multiple_accounts(
@@ -80,59 +210,505 @@ async def get_multiple_accounts(
     pubkeys: list[Pubkey],
     batch_size: int = 3,
     commitment: Optional[Commitment] = None,
+    min_context_slot: Optional[int] = None,
+    max_concurrency: int = _DEFAULT_MAX_CONCURRENCY,
+    max_retries: int = _DEFAULT_MAX_RETRIES,
+    stats: Optional[MultipleAccountsStats] = None,
+    executor: Optional[Executor] = None,
+    offload_threshold: int = _OFFLOAD_THRESHOLD,
 ) -> list[Optional[_MultipleAccountsItem]]:
     """Fetch multiple account infos through batched `getMultipleAccount` RPC requests.
 
+    At most `max_concurrency` HTTP requests are in flight at once. The number
+    of `getMultipleAccounts` calls per request starts at `batch_size` and then
+    adapts to the observed latency and response size. A request that times
+    out or whose response is too large is split in half. Rate-limited (HTTP
+    429) and server error responses are retried with exponential backoff.
+
+    Responses larger than `offload_threshold` bytes are parsed, base64-decoded
+    and decompressed in `executor` so the event loop stays responsive.
+
     Args:
         connection: The `solana-py` client object.
         pubkeys: Pubkeys to fetch.
-        batch_size: The number of `getMultipleAccount` objects to include in each
-            HTTP request.
+        batch_size: The initial number of `getMultipleAccount` objects to include
+            in each HTTP request.
         commitment: Bank state to query.
+        min_context_slot: (optional) The minimum slot the node may serve the
+            request at.
+        max_concurrency: Maximum number of concurrent HTTP requests.
+        max_retries: How many times to retry a request before giving up.
+        stats: (optional) Statistics object to update.
+        executor: (optional) Thread or process executor for parsing large
+            responses. Defaults to the event loop's default executor.
+        offload_threshold: Response size in bytes above which parsing is moved
+            off the event loop.
+
+    Raises:
+        RPCException: If a request keeps failing or the node returns an error.
 
     Returns:
         Account infos and pubkeys.
     """
-    pubkeys_per_network_request = _GET_MULTIPLE_ACCOUNTS_LIMIT * batch_size
-    chunks = partition_all(pubkeys_per_network_request, pubkeys)
-    awaitables = [
-        _get_multiple_accounts_core(connection, pubkeys_chunk, commitment)
-        for pubkeys_chunk in chunks
-    ]
-    results = await gather(*awaitables, return_exceptions=False)
-    return list(concat(results))
+    result: list[Optional[_MultipleAccountsItem]] = [None] * len(pubkeys)
+    async for batch in iter_multiple_accounts(
+        connection,
+        pubkeys,
+        batch_size=batch_size,
+        commitment=commitment,
+        min_context_slot=min_context_slot,
+        max_concurrency=max_concurrency,
+        max_retries=max_retries,
+        stats=stats,
+        executor=executor,
+        offload_threshold=offload_threshold,
+    ):
+        result[batch.start : batch.start + len(batch.accounts)] = batch.accounts
+    return result
+
+
+async def iter_multiple_accounts(
+    connection: AsyncClient,
+    pubkeys: Sequence[Pubkey],
+    batch_size: int = 3,
+    commitment: Optional[Commitment] = None,
+    min_context_slot: Optional[int] = None,
+    ordered: bool = False,
+    max_concurrency: int = _DEFAULT_MAX_CONCURRENCY,
+    max_retries: int = _DEFAULT_MAX_RETRIES,
+    stats: Optional[MultipleAccountsStats] = None,
+    executor: Optional[Executor] = None,
+    offload_threshold: int = _OFFLOAD_THRESHOLD,
+) -> AsyncGenerator[MultipleAccountsBatch, None]:
+    """Yield account infos batch by batch as each HTTP request completes.
+
+    This schedules requests like `get_multiple_accounts`, but only keeps a
+    bounded number of completed batches in memory: fetching pauses while
+    the consumer falls behind. Close the generator (`aclose`) when stopping
+    early so the in-flight requests are cancelled.
+
+    Args:
+        connection: The `solana-py` client object.
+        pubkeys: Pubkeys to fetch.
+        batch_size: The initial number of `getMultipleAccount` objects to include
+            in each HTTP request.
+        commitment: Bank state to query.
+        min_context_slot: (optional) The minimum slot the node may serve the
+            request at.
+        ordered: If True, yield batches in the order of `pubkeys`. Otherwise
+            yield them as soon as they arrive.
+        max_concurrency: Maximum number of concurrent HTTP requests.
+        max_retries: How many times to retry a request before giving up.
+        stats: (optional) Statistics object to update.
+        executor: (optional) Thread or process executor for parsing large
+            responses. Defaults to the event loop's default executor.
+        offload_threshold: Response size in bytes above which parsing is moved
+            off the event loop.
+
+    Raises:
+        RPCException: If a request keeps failing or the node returns an error.
+
+    Yields:
+        Batches of account infos.
+    """
+    start_time = monotonic()
+    stats_to_use = MultipleAccountsStats() if stats is None else stats
+    batcher = _AdaptiveBatcher(batch_size)
+    n_workers = max(1, min(max_concurrency, len(pubkeys)))
+    completed: Queue[Any] = Queue(maxsize=n_workers)
+    # Work items are (start index, number of pubkeys, attempt). Failed items
+    # are pushed back and served before fresh pubkeys.
+    retry_queue: Deque[tuple[int, int, int]] = deque()
+    cursor = 0
+
+    def next_item() -> Optional[tuple[int, int, int]]:
+        nonlocal cursor
+        if retry_queue:
+            return retry_queue.popleft()
+        if cursor >= len(pubkeys):
+            return None
+        count = min(batcher.size * _GET_MULTIPLE_ACCOUNTS_LIMIT, len(pubkeys) - cursor)
+        item = (cursor, count, 0)
+        cursor += count
+        return item
+
+    async def worker() -> None:
+        while True:
+            item = next_item()
+            if item is None:
+                return
+            start, count, attempt = item
+            chunk = list(pubkeys[start : start + count])
+            request_start = monotonic()
+            try:
+                fetched, nbytes = await _get_multiple_accounts_core(
+                    connection,
+                    chunk,
+                    commitment,
+                    min_context_slot,
+                    executor,
+                    offload_threshold,
+                )
+            except _SplittableError as e:
+                if count == 1:
+                    raise RPCException(f"Failed to get account {chunk[0]}") from e
+                stats_to_use.splits += 1
+                batcher.on_failure()
+                half = count // 2
+                retry_queue.appendleft((start + half, count - half, attempt))
+                retry_queue.appendleft((start, half, attempt))
+                continue
+            except _RetryableError as e:
+                if isinstance(e, _RateLimitedError):
+                    stats_to_use.rate_limited += 1
+                    batcher.on_failure()
+                if attempt >= max_retries:
+                    raise RPCException(
+                        f"Failed to get info about accounts after {attempt} retries"
+                    ) from e
+                stats_to_use.retries += 1
+                await _backoff(attempt, e)
+                retry_queue.append((start, count, attempt + 1))
+                continue
+            batcher.on_success(monotonic() - request_start, nbytes)
+            stats_to_use.requests += 1
+            stats_to_use.accounts += count
+            stats_to_use.bytes_received += nbytes
+            await completed.put(MultipleAccountsBatch(start, fetched))
+
+    async def supervise(tasks: Sequence[Future]) -> None:
+        try:
+            await gather(*tasks)
+        except Exception as e:  # noqa: BLE001
+            for task in tasks:
+                task.cancel()
+            await completed.put(e)
+        else:
+            await completed.put(_DONE)
+
+    workers = [ensure_future(worker()) for _ in range(n_workers)]
+    supervisor = ensure_future(supervise(workers))
+    pending: dict[int, MultipleAccountsBatch] = {}
+    next_start = 0
+    try:
+        while True:
+            got = await completed.get()
+            if got is _DONE:
+                break
+            if isinstance(got, Exception):
+                raise got
+            if not ordered:
+                yield got
+                continue
+            pending[got.start] = got
+            while next_start in pending:
+                batch = pending.pop(next_start)
+                next_start += len(batch.accounts)
+                yield batch
+    finally:
+        supervisor.cancel()
+        for task in workers:
+            task.cancel()
+        await gather(supervisor, *workers, return_exceptions=True)
+        stats_to_use.batch_size = batcher.size
+        stats_to_use.elapsed += monotonic() - start_time
 
 
 async def _get_multiple_accounts_core(
-    connection: AsyncClient, pubkeys: list[Pubkey], commitment: Optional[Commitment]
-) -> list[Optional[_MultipleAccountsItem]]:
+    connection: AsyncClient,
+    pubkeys: list[Pubkey],
+    commitment: Optional[Commitment],
+    min_context_slot: Optional[int] = None,
+    executor: Optional[Executor] = None,
+    offload_threshold: int = _OFFLOAD_THRESHOLD,
+) -> tuple[list[Optional[_MultipleAccountsItem]], int]:
     pubkey_batches = partition_all(_GET_MULTIPLE_ACCOUNTS_LIMIT, pubkeys)
     rpc_requests: list[dict[str, Any]] = []
     commitment_to_use = connection._commitment if commitment is None else commitment
+    config: dict[str, Any] = {
+        "encoding": "base64+zstd",
+        "commitment": commitment_to_use,
+    }
+    if min_context_slot is not None:
+        config["minContextSlot"] = min_context_slot
     for pubkey_batch in pubkey_batches:
         pubkeys_to_send = [str(pubkey) for pubkey in pubkey_batch]
         rpc_request = jsonrpcclient.request(
-            "getMultipleAccounts",
-            params=[
-                pubkeys_to_send,
-                {"encoding": "base64+zstd", "commitment": commitment_to_use},
-            ],
+            "getMultipleAccounts", params=[pubkeys_to_send, config]
         )
         rpc_requests.append(rpc_request)
-    resp = await connection._provider.session.post(
-        connection._provider.endpoint_uri,
-        json=rpc_requests,
-        headers={"content-encoding": "gzip"},
+    content = await _post_batch(connection, rpc_requests)
+    request_ids = [rpc_request["id"] for rpc_request in rpc_requests]
+    if len(content) > offload_threshold:
+        loop = get_running_loop()
+        result = await loop.run_in_executor(
+            executor, _parse_multiple_accounts, content, pubkeys, request_ids
+        )
+    else:
+        result = _parse_multiple_accounts(content, pubkeys, request_ids)
+    return result, len(content)
+
+
+async def _post_batch(connection: AsyncClient, rpc_requests: list[dict]) -> bytes:
+    """Send a batch of JSON-RPC requests and return the raw response body.
+
+    Raises:
+        _SplittableError: If the request timed out or was too large.
+        _RetryableError: If the node is rate limiting or failing.
+        RPCException: For any other unsuccessful HTTP status.
+    """
+    try:
+        resp = await connection._provider.session.post(
+            connection._provider.endpoint_uri,
+            json=rpc_requests,
+            headers={"content-encoding": "gzip"},
+        )
+    except httpx.TimeoutException as e:
+        raise _SplittableError() from e
+    _raise_for_status(resp)
+    return resp.content
+
+
+async def _get_program_accounts_core(
+    connection: AsyncClient, program_id: Pubkey, **kwargs: Any
+) -> list[RpcKeyedAccount]:
+    """Call `getProgramAccounts`, raising the errors to retry or split on.
+
+    Raises:
+        _SplittableError: If the request timed out or was too large.
+        _RetryableError: If the node is rate limiting or failing.
+        RPCException: For any other unsuccessful HTTP status.
+    """
+    try:
+        resp = await connection.get_program_accounts(program_id, **kwargs)
+    except SolanaRpcException as e:
+        cause = e.__cause__
+        if isinstance(cause, httpx.TimeoutException):
+            raise _SplittableError() from e
+        if isinstance(cause, httpx.HTTPStatusError):
+            _raise_for_status(cause.response)
+        raise
+    return resp.value
+
+
+def _raise_for_status(resp: httpx.Response) -> None:
+    status = resp.status_code
+    if status == _HTTP_TOO_MANY_REQUESTS:
+        raise _RateLimitedError(_retry_after(resp.headers.get("retry-after")))
+    if status == _HTTP_PAYLOAD_TOO_LARGE:
+        raise _SplittableError()
+    if status >= _HTTP_SERVER_ERROR:
+        raise _RetryableError()
+    if not _HTTP_OK <= status < _HTTP_MULTIPLE_CHOICES:
+        body = resp.content[:_ERROR_BODY_CHARS].decode(errors="replace")
+        raise RPCException(f"RPC request failed with HTTP {status}: {body}")
+
+
+class TransactionLogs(NamedTuple):
+    """The logs of a confirmed transaction.
+
+    Attributes:
+        signature: The transaction signature.
+        slot: The slot the transaction was processed in.
+        err: The transaction error, or None if it succeeded.
+        logs: The log messages.
+    """
+
+    signature: Signature
+    slot: int
+    err: Any
+    logs: list[str]
+
+
+async def iter_transaction_logs(
+    connection: AsyncClient,
+    signatures: Sequence[Signature],
+    batch_size: int = _DEFAULT_TRANSACTION_BATCH_SIZE,
+    commitment: Commitment = Finalized,
+    max_concurrency: int = _DEFAULT_MAX_CONCURRENCY,
+    max_retries: int = _DEFAULT_MAX_RETRIES,
+    skip_missing: bool = False,
+) -> AsyncGenerator[list[TransactionLogs], None]:
+    """Fetch transaction logs through batched `getTransaction` RPC requests.
+
+    Up to `max_concurrency` HTTP requests, each with `batch_size`
+    `getTransaction` calls, are in flight at once, and batches are yielded in
+    the order of `signatures`. Requests are split, retried and backed off like
+    in `get_multiple_accounts`. Close the generator (`aclose`) when stopping
+    early so the in-flight requests are cancelled.
+
+    Args:
+        connection: The `solana-py` client object.
+        signatures: The transactions to fetch.
+        batch_size: The number of `getTransaction` calls per HTTP request.
+        commitment: Bank state to query, `confirmed` or `finalized`.
+        max_concurrency: Maximum number of concurrent HTTP requests.
+        max_retries: How many times to retry a request before giving up.
+        skip_missing: If True, leave out transactions the node does not have,
+            e.g. because its history was pruned, so batches may be shorter.
+
+    Raises:
+        RPCException: If a request keeps failing, the node returns an error or
+            a transaction is not found and `skip_missing` is False.
+
+    Yields:
+        The logs of each batch of `batch_size` transactions.
+    """
+
+    async def chunks() -> AsyncGenerator[Sequence[Signature], None]:
+        for chunk in partition_all(max(1, batch_size), signatures):
+            yield chunk
+
+    batches = _iter_transaction_log_chunks(
+        connection, chunks(), commitment, max_concurrency, max_retries, skip_missing
     )
-    parsed = jsonrpcclient.parse(resp.json())
+    try:
+        async for _, batch in batches:
+            yield batch
+    finally:
+        await batches.aclose()
+
+
+async def _iter_transaction_log_chunks(
+    connection: AsyncClient,
+    chunks: AsyncIterable[Sequence[Signature]],
+    commitment: Commitment,
+    max_concurrency: int,
+    max_retries: int,
+    skip_missing: bool,
+) -> AsyncGenerator[Tuple[Sequence[Signature], list[TransactionLogs]], None]:
+    """Fetch the logs of each chunk of signatures, as the chunks arrive.
+
+    Chunks are fetched while the next ones are produced, and yielded in
+    order with their logs.
+    """
+    config = {
+        "encoding": "json",
+        "commitment": commitment,
+        "maxSupportedTransactionVersion": 0,
+    }
+
+    async def fetch(chunk: Sequence[Signature]) -> list[TransactionLogs]:
+        attempt = 0
+        while True:
+            try:
+                return await _get_transactions_core(
+                    connection, chunk, config, skip_missing
+                )
+            except _SplittableError as e:
+                if len(chunk) == 1:
+                    raise RPCException(f"Failed to get transaction {chunk[0]}") from e
+                half = len(chunk) // 2
+                first, second = await gather(fetch(chunk[:half]), fetch(chunk[half:]))
+                return first + second
+            except _RetryableError as e:
+                if attempt >= max_retries:
+                    raise RPCException(
+                        f"Failed to get transactions after {attempt} retries"
+                    ) from e
+                await _backoff(attempt, e)
+                attempt += 1
+
+    window: Deque[Tuple[Sequence[Signature], Future]] = deque()
+    try:
+        async for chunk in chunks:
+            window.append((chunk, ensure_future(fetch(chunk))))
+            if len(window) >= max_concurrency:
+                done, task = window.popleft()
+                yield done, await task
+        while window:
+            done, task = window.popleft()
+            yield done, await task
+    finally:
+        tasks = [task for _, task in window]
+        for task in tasks:
+            task.cancel()
+        await gather(*tasks, return_exceptions=True)
+
+
+async def _get_transactions_core(
+    connection: AsyncClient,
+    signatures: Sequence[Signature],
+    config: dict[str, Any],
+    skip_missing: bool = False,
+) -> list[TransactionLogs]:
+    rpc_requests = [
+        jsonrpcclient.request("getTransaction", params=[str(signature), config])
+        for signature in signatures
+    ]
+    content = await _post_batch(connection, rpc_requests)
+    parsed = jsonrpcclient.parse(json.loads(content))
+    # Batched responses may come back in any order.
+    by_id = {rpc_result.id: rpc_result for rpc_result in parsed}
+    result = []
+    for signature, rpc_request in zip(signatures, rpc_requests):  # noqa: B905
+        rpc_result = by_id.get(rpc_request["id"])
+        if isinstance(rpc_result, jsonrpcclient.Error):
+            raise RPCException(f"Failed to get transactions: {rpc_result.message}")
+        if rpc_result is None or rpc_result.result is None:
+            if skip_missing:
+                continue
+            raise RPCException(f"Transaction {signature} not found")
+        # Status metadata can be missing, e.g. for very old transactions.
+        meta = rpc_result.result["meta"] or {}
+        result.append(
+            TransactionLogs(
+                signature,
+                rpc_result.result["slot"],
+                meta.get("err"),
+                meta.get("logMessages") or [],
+            )
+        )
+    return result
+
+
+_thread_local = local()
+
+
+def _zstd_decompressor() -> zstandard.ZstdDecompressor:
+    # Decompressor contexts are not thread-safe, so keep one per thread.
+    try:
+        return _thread_local.zstd_decompressor
+    except AttributeError:
+        dctx = zstandard.ZstdDecompressor()
+        _thread_local.zstd_decompressor = dctx
+        return dctx
+
+
+def _parse_multiple_accounts(
+    content: bytes, pubkeys: list[Pubkey], request_ids: list[int]
+) -> list[Optional[_MultipleAccountsItem]]:
+    """Parse a batched `getMultipleAccounts` response.
+
+    This is pure CPU work, so it can run in a thread or process executor.
+
+    Args:
+        content: The raw HTTP response body.
+        pubkeys: The pubkeys that were requested, in order.
+        request_ids: The JSON-RPC id of each request, in order. Each request
+            covers the next `_GET_MULTIPLE_ACCOUNTS_LIMIT` pubkeys.
+
+    Raises:
+        RPCException: If the node returned an error or left out a response.
+
+    Returns:
+        Account infos and pubkeys.
+    """
+    parsed = jsonrpcclient.parse(json.loads(content))
+    # Batched responses may come back in any order.
+    by_id = {rpc_result.id: rpc_result for rpc_result in parsed}
     result: list[Optional[_MultipleAccountsItem]] = []
-    dctx = zstandard.ZstdDecompressor()
+    dctx = _zstd_decompressor()
     idx = 0
-    for rpc_result in parsed:
+    for request_id in request_ids:
+        rpc_result = by_id.get(request_id)
+        if rpc_result is None:
+            raise RPCException("Failed to get info about accounts: missing response")
         if isinstance(rpc_result, jsonrpcclient.Error):
             raise RPCException(
                 f"Failed to get info about accounts: {rpc_result.message}"
             )
+        slot = rpc_result.result["context"]["slot"]
         for account in rpc_result.result["value"]:
             if account is None:
                 result.append(None)
@@ -150,8 +726,17 @@ async def _get_multiple_accounts_core(
                     rent_epoch=account["rentEpoch"],
                 )
                 multiple_accounts_item = _MultipleAccountsItem(
-                    pubkey=pubkeys[idx], account=acc_info
+                    pubkey=pubkeys[idx], account=acc_info, slot=slot
                 )
                 result.append(multiple_accounts_item)
             idx += 1
     return result
+
+
+def _retry_after(header: Optional[str]) -> Optional[float]:
+    if header is None:
+        return None
+    try:
+        return min(float(header), _MAX_RETRY_AFTER)
+    except ValueError:
+        return None
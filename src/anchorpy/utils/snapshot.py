@@ -0,0 +1,176 @@
+"""A persistent SQLite store of raw account data, for warm restarts."""
+import sqlite3
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+from solders.pubkey import Pubkey
+
+SNAPSHOT_CHUNK_SIZE = 10000
+_DISCRIMINATOR_SIZE = 8
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS accounts (
+    pubkey BLOB PRIMARY KEY,
+    discriminator BLOB NOT NULL,
+    slot INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS accounts_discriminator ON accounts (discriminator);
+"""
+
+
+class AccountSnapshot:
+    """Raw account data and read slots of one program, stored in SQLite.
+
+    Use `AccountClient.sync_snapshot` to fill or update it and
+    `AccountClient.load_snapshot` to decode it.
+    """
+
+    def __init__(self, path: Union[str, Path], program_id: Pubkey) -> None:
+        """Open or create a snapshot file.
+
+        Args:
+            path: The database file.
+            program_id: The program owning the accounts.
+
+        Raises:
+            ValueError: If the file holds a snapshot of another program.
+        """
+        self.path = Path(path)
+        self.program_id = program_id
+        self._db = sqlite3.connect(self.path)
+        with self._db:
+            self._db.executescript(_SCHEMA)
+            self._db.execute(
+                "INSERT OR IGNORE INTO meta VALUES ('program_id', ?)",
+                (str(program_id),),
+            )
+        stored = self._meta("program_id")
+        if stored != str(program_id):
+            self._db.close()
+            raise ValueError(f"{self.path} is a snapshot of program {stored}")
+
+    @property
+    def slot(self) -> int:
+        """Return the slot of the last sync, or 0 if never synced."""
+        stored = self._meta("slot")
+        return 0 if stored is None else int(stored)
+
+    def set_slot(self, slot: int) -> None:
+        """Record the slot of a completed sync.
+
+        Args:
+            slot: The slot.
+        """
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('slot', ?)", (str(slot),)
+            )
+
+    def put_many(self, accounts: Iterable[Tuple[Pubkey, bytes, int]]) -> None:
+        """Insert or replace accounts in one transaction.
+
+        An account already stored at a newer slot is kept.
+
+        Args:
+            accounts: Tuples of address, raw data and the slot it was read at.
+        """
+        rows = (
+            (bytes(pubkey), data[:_DISCRIMINATOR_SIZE], slot, data)
+            for pubkey, data, slot in accounts
+        )
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO accounts VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (pubkey) DO UPDATE SET "
+                "discriminator = excluded.discriminator, slot = excluded.slot, "
+                "data = excluded.data WHERE excluded.slot >= accounts.slot",
+                rows,
+            )
+
+    def delete_many(self, pubkeys: Iterable[Pubkey]) -> None:
+        """Remove accounts in one transaction.
+
+        Args:
+            pubkeys: The addresses to remove.
+        """
+        with self._db:
+            self._db.executemany(
+                "DELETE FROM accounts WHERE pubkey = ?",
+                ((bytes(pubkey),) for pubkey in pubkeys),
+            )
+
+    def get(self, pubkey: Pubkey) -> Optional[Tuple[bytes, int]]:
+        """Return the raw data and slot of an account, if stored.
+
+        Args:
+            pubkey: The address.
+        """
+        row = self._db.execute(
+            "SELECT data, slot FROM accounts WHERE pubkey = ?", (bytes(pubkey),)
+        ).fetchone()
+        return None if row is None else (row[0], row[1])
+
+    def pubkeys(self, discriminator: Optional[bytes] = None) -> List[Pubkey]:
+        """Return the stored addresses.
+
+        Args:
+            discriminator: (optional) Only return accounts of this type.
+        """
+        if discriminator is None:
+            cursor = self._db.execute("SELECT pubkey FROM accounts")
+        else:
+            cursor = self._db.execute(
+                "SELECT pubkey FROM accounts WHERE discriminator = ?",
+                (discriminator,),
+            )
+        return [Pubkey.from_bytes(row[0]) for row in cursor]
+
+    def iter_chunks(
+        self,
+        discriminator: Optional[bytes] = None,
+        chunk_size: int = SNAPSHOT_CHUNK_SIZE,
+    ) -> Iterator[List[Tuple[Pubkey, bytes]]]:
+        """Yield the stored accounts in chunks, for bulk decoding.
+
+        Args:
+            discriminator: (optional) Only yield accounts of this type.
+            chunk_size: The number of accounts per chunk.
+
+        Yields:
+            Lists of address and raw data.
+        """
+        if discriminator is None:
+            cursor = self._db.execute("SELECT pubkey, data FROM accounts")
+        else:
+            cursor = self._db.execute(
+                "SELECT pubkey, data FROM accounts WHERE discriminator = ?",
+                (discriminator,),
+            )
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield [(Pubkey.from_bytes(pubkey), data) for pubkey, data in rows]
+
+    def __len__(self) -> int:
+        """Return the number of stored accounts."""
+        return self._db.execute("SELECT COUNT(*) FROM accounts").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the database."""
+        self._db.close()
+
+    def __enter__(self) -> "AccountSnapshot":
+        """Use as a context manager that closes the database."""
+        return self
+
+    def __exit__(self, _exc_type, _exc, _tb) -> None:
+        """Close the database."""
+        self.close()
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self._db.execute(
+            "SELECT value FROM meta WHERE key = ?", (key,)
+        ).fetchone()
+        return None if row is None else row[0]
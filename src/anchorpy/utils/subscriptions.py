@@ -0,0 +1,397 @@
+"""Many RPC subscriptions multiplexed over one websocket connection."""
+import json
+from asyncio import CancelledError, Event, Task, TimeoutError, ensure_future, sleep
+from base64 import b64decode
+from collections import deque
+from contextlib import suppress
+from itertools import count
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+)
+from urllib.parse import urlsplit, urlunsplit
+
+from solana.rpc.core import RPCException
+from websockets.exceptions import WebSocketException
+from websockets.legacy.client import WebSocketClientProtocol
+from websockets.legacy.client import connect as ws_connect
+
+from anchorpy.utils.rpc import _MAX_ACCOUNT_SIZE, _zstd_decompressor
+
+if TYPE_CHECKING:
+    from anchorpy.provider import Provider
+
+DEFAULT_QUEUE_SIZE = 1024
+_RECONNECT_DELAY = 0.5  # seconds
+_MAX_RECONNECT_DELAY = 30.0  # seconds
+_CLOSED = object()
+
+OverflowPolicy = Literal["block", "drop-oldest", "coalesce"]
+# Errors after which the connection is reopened.
+_RECONNECT_ERRORS = (OSError, TimeoutError, WebSocketException, json.JSONDecodeError)
+
+
+class Subscription:
+    """An async iterator over the notifications of one subscription.
+
+    Iteration yields the `result` of each notification, or the items that
+    `transform` maps it to. At most `maxsize` items are buffered; what happens
+    to further items depends on `overflow`:
+
+    - `"drop-oldest"`: the oldest item is dropped.
+    - `"coalesce"`: the new item replaces the buffered item with the same
+      `coalesce_key`, if any, and otherwise the oldest item is dropped.
+    - `"block"`: reading from the websocket pauses until there is room.
+      This stalls every subscription sharing the connection.
+
+    Dropped and replaced items are counted in `dropped`.
+    """
+
+    def __init__(
+        self,
+        multiplexer: "SubscriptionMultiplexer",
+        method: str,
+        params: list,
+        maxsize: int,
+        overflow: OverflowPolicy = "drop-oldest",
+        transform: Optional[Callable[[Any], Iterable[Any]]] = None,
+        coalesce_key: Optional[Callable[[Any], Hashable]] = None,
+    ) -> None:
+        """Init.
+
+        Args:
+            multiplexer: The multiplexer owning the subscription.
+            method: The subscribe method, such as `accountSubscribe`.
+            params: The subscribe params.
+            maxsize: How many items to buffer.
+            overflow: What to do when the buffer is full.
+            transform: (optional) Maps each notification result to the items
+                to buffer. It runs on the websocket reading task.
+            coalesce_key: (optional) The key of an item for `"coalesce"`.
+
+        Raises:
+            ValueError: If `overflow` is `"coalesce"` without a `coalesce_key`.
+        """
+        if overflow == "coalesce" and coalesce_key is None:
+            raise ValueError("overflow='coalesce' requires a coalesce_key")
+        self.method = method
+        self.params = params
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.dropped = 0
+        self._multiplexer = multiplexer
+        self._transform = transform
+        self._coalesce_key = coalesce_key
+        # Items are held in [item, key] lists so coalescing can replace them.
+        self._items: Deque[List[Any]] = deque()
+        self._by_key: Dict[Hashable, List[Any]] = {}
+        self._readable = Event()
+        self._writable = Event()
+        self._server_id: Optional[int] = None
+        self._requested = False
+        self._closed = False
+
+    def __aiter__(self) -> "Subscription":
+        """Return the iterator."""
+        return self
+
+    async def __anext__(self) -> Any:
+        """Wait for the next notification.
+
+        Raises:
+            StopAsyncIteration: When the subscription is closed.
+            RPCException: If the node rejected the subscription.
+        """
+        while not self._items:
+            self._readable.clear()
+            await self._readable.wait()
+        cell = self._items[0]
+        item = cell[0]
+        if item is _CLOSED:
+            raise StopAsyncIteration
+        self._items.popleft()
+        self._forget(cell)
+        self._writable.set()
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    async def close(self) -> None:
+        """Unsubscribe and end iteration."""
+        await self._multiplexer._unsubscribe(self)
+
+    async def __aenter__(self) -> "Subscription":
+        """Use as a context manager that closes the subscription."""
+        return self
+
+    async def __aexit__(self, _exc_type, _exc, _tb) -> None:
+        """Close the subscription."""
+        await self.close()
+
+    async def _offer(self, result: Any) -> None:
+        items = (result,) if self._transform is None else self._transform(result)
+        for item in items:
+            if self.overflow == "block":
+                while len(self._items) >= self.maxsize and not self._closed:
+                    self._writable.clear()
+                    await self._writable.wait()
+            self._put(item)
+
+    def _put(self, item: Any) -> None:
+        if self._closed:
+            return
+        key = None
+        if self._coalesce_key is not None:
+            key = self._coalesce_key(item)
+        if len(self._items) >= self.maxsize:
+            queued = self._by_key.get(key) if self.overflow == "coalesce" else None
+            if queued is not None:
+                queued[0] = item
+                self.dropped += 1
+                return
+            if self._items:
+                self._forget(self._items.popleft())
+            self.dropped += 1
+        cell = [item, key]
+        self._items.append(cell)
+        if key is not None:
+            self._by_key[key] = cell
+        self._readable.set()
+
+    def _forget(self, cell: List[Any]) -> None:
+        key = cell[1]
+        if key is not None and self._by_key.get(key) is cell:
+            del self._by_key[key]
+
+    def _finish(self, item: Any = _CLOSED) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if item is not _CLOSED:
+            self._items.append([item, None])
+        self._items.append([_CLOSED, None])
+        self._readable.set()
+        self._writable.set()
+
+
+class SubscriptionMultiplexer:
+    """Shares one websocket connection between many subscriptions.
+
+    The connection is opened by the first subscription. When it drops, it is
+    reopened with exponential backoff and every open subscription is sent
+    again, so iterators keep going across reconnects. If a subscription's
+    `transform` raises, that subscription ends with the error. Any other
+    unexpected error ends every subscription with it.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        reconnect_delay: float = _RECONNECT_DELAY,
+        max_reconnect_delay: float = _MAX_RECONNECT_DELAY,
+    ):
+        """Init.
+
+        Args:
+            url: The websocket endpoint, e.g. from `ws_url`.
+            reconnect_delay: The first wait before reconnecting, in seconds.
+            max_reconnect_delay: The longest wait between reconnect attempts,
+                in seconds.
+        """
+        self.url = url
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.reconnects = 0
+        self._subs: dict[Subscription, None] = {}
+        self._by_server_id: dict[int, Subscription] = {}
+        self._pending: dict[int, Subscription] = {}
+        self._ids = count(1)
+        self._ws: Optional[WebSocketClientProtocol] = None
+        self._task: Optional[Task] = None
+
+    async def subscribe(
+        self,
+        method: str,
+        params: list,
+        maxsize: int = DEFAULT_QUEUE_SIZE,
+        overflow: OverflowPolicy = "drop-oldest",
+        transform: Optional[Callable[[Any], Iterable[Any]]] = None,
+        coalesce_key: Optional[Callable[[Any], Hashable]] = None,
+    ) -> Subscription:
+        """Start a subscription.
+
+        Args:
+            method: The subscribe method, such as `accountSubscribe`.
+            params: The subscribe params.
+            maxsize: How many items to buffer.
+            overflow: What to do when the buffer is full, see `Subscription`.
+            transform: (optional) Maps each notification result to the items
+                to buffer.
+            coalesce_key: (optional) The key of an item for `"coalesce"`.
+
+        Returns:
+            The subscription.
+        """
+        sub = Subscription(
+            self, method, params, maxsize, overflow, transform, coalesce_key
+        )
+        self._subs[sub] = None
+        if self._task is None:
+            self._task = ensure_future(self._run())
+        elif self._ws is not None:
+            # If this fails, the subscription is sent again on reconnect.
+            with suppress(WebSocketException):
+                await self._send_subscribe(self._ws, sub)
+        return sub
+
+    async def close(self) -> None:
+        """Close the connection and end all subscriptions."""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            with suppress(CancelledError):
+                await task
+        for sub in self._subs:
+            sub._finish()
+        self._subs.clear()
+
+    async def _unsubscribe(self, sub: Subscription) -> None:
+        sub._finish()
+        self._subs.pop(sub, None)
+        server_id = sub._server_id
+        if server_id is None:
+            return
+        self._by_server_id.pop(server_id, None)
+        ws = self._ws
+        if ws is None:
+            return
+        unsubscribe_method = sub.method.replace("Subscribe", "Unsubscribe")
+        with suppress(WebSocketException):
+            await ws.send(_request(next(self._ids), unsubscribe_method, [server_id]))
+
+    async def _send_subscribe(
+        self, ws: WebSocketClientProtocol, sub: Subscription
+    ) -> None:
+        sub._requested = True
+        request_id = next(self._ids)
+        self._pending[request_id] = sub
+        await ws.send(_request(request_id, sub.method, sub.params))
+
+    async def _run(self) -> None:
+        try:
+            await self._connect_forever()
+        except Exception as e:  # noqa: BLE001
+            # The connection will not be reopened, so end the iterators
+            # rather than leave them waiting.
+            self._task = None
+            for sub in self._subs:
+                sub._finish(e)
+            self._subs.clear()
+
+    async def _connect_forever(self) -> None:
+        delay = self.reconnect_delay
+        while True:
+            try:
+                async with ws_connect(self.url, max_size=None) as ws:
+                    self._ws = ws
+                    for sub in list(self._subs):
+                        if not sub._requested:
+                            await self._send_subscribe(ws, sub)
+                    delay = self.reconnect_delay
+                    async for raw in ws:
+                        await self._handle(json.loads(raw))
+            except _RECONNECT_ERRORS:
+                pass
+            finally:
+                self._ws = None
+                self._pending.clear()
+                self._by_server_id.clear()
+                for sub in self._subs:
+                    sub._requested = False
+                    sub._server_id = None
+            self.reconnects += 1
+            await sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def _handle(self, msg: dict) -> None:
+        if "id" in msg:
+            sub = self._pending.pop(msg["id"], None)
+            if sub is None:
+                return
+            if "error" in msg:
+                self._subs.pop(sub, None)
+                sub._finish(RPCException(msg["error"]))
+            elif sub._closed:
+                # Closed before the node confirmed, so unsubscribe now.
+                sub._server_id = msg["result"]
+                ensure_future(self._unsubscribe(sub))
+            else:
+                sub._server_id = msg["result"]
+                self._by_server_id[msg["result"]] = sub
+            return
+        params = msg.get("params")
+        if params is None:
+            return
+        sub = self._by_server_id.get(params["subscription"])
+        if sub is None:
+            return
+        try:
+            await sub._offer(params["result"])
+        except Exception as e:  # noqa: BLE001
+            # Raised by the transform, so only this subscription fails.
+            sub._finish(e)
+            await self._unsubscribe(sub)
+
+
+def _request(request_id: int, method: str, params: list) -> str:
+    return json.dumps(
+        {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+    )
+
+
+def ws_url(http_url: str) -> str:
+    """Derive the websocket endpoint of an RPC node from its HTTP endpoint.
+
+    Like `@solana/web3.js`, this switches to the `ws` or `wss` scheme and
+    uses the next port if the URL has an explicit port.
+
+    Args:
+        http_url: The HTTP endpoint.
+
+    Returns:
+        The websocket endpoint.
+    """
+    parts = urlsplit(http_url)
+    scheme = "wss" if parts.scheme == "https" else "ws"
+    netloc = parts.netloc
+    if parts.port is not None:
+        host = netloc.rsplit(":", 1)[0]
+        netloc = f"{host}:{parts.port + 1}"
+    return urlunsplit((scheme, netloc, parts.path, parts.query, parts.fragment))
+
+
+def _provider_subscriptions(provider: "Provider") -> SubscriptionMultiplexer:
+    """Return the provider's multiplexer, creating it from the RPC URL if unset."""
+    if provider.subscriptions is None:
+        endpoint = provider.connection._provider.endpoint_uri
+        provider.subscriptions = SubscriptionMultiplexer(ws_url(endpoint))
+    return provider.subscriptions
+
+
+def _notification_data(account: dict) -> bytes:
+    """Decode the data of an account in a notification."""
+    encoded, encoding = account["data"]
+    decoded = b64decode(encoded)
+    if encoding == "base64+zstd":
+        return _zstd_decompressor().decompress(
+            decoded, max_output_size=_MAX_ACCOUNT_SIZE
+        )
+    return decoded
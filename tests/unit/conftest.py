@@ -0,0 +1,140 @@
+"""Fakes of a Solana RPC node shared by the unit tests."""
+from base64 import b64encode
+from json import dumps
+from types import SimpleNamespace
+from typing import Any, Optional, Sequence, Union
+
+import zstandard
+from based58 import b58decode
+from pytest import fixture
+from solana.rpc.types import DataSliceOpts, MemcmpOpts
+from solders.account import Account
+from solders.pubkey import Pubkey
+from solders.rpc.responses import RpcKeyedAccount
+
+
+class FakeResponse:
+    def __init__(self, body: Any, status_code: int = 200) -> None:
+        self.status_code = status_code
+        self.headers = {"retry-after": "0"} if status_code == 429 else {}
+        self._body = body
+        self.content = dumps(body).encode()
+
+    def json(self) -> Any:
+        return self._body
+
+
+def account_json(data: bytes, lamports: int = 1) -> dict:
+    """An account as the RPC API encodes it with `base64+zstd`."""
+    return {
+        "data": [b64encode(zstandard.compress(data)).decode(), "base64+zstd"],
+        "executable": False,
+        "owner": str(Pubkey.default()),
+        "lamports": lamports,
+        "rentEpoch": 0,
+    }
+
+
+class FakeNode:
+    """Serves the accounts in `accounts` over batched HTTP and the client methods.
+
+    `post` answers with the status codes in `failures` first, and with 413 when
+    a request asks for more than `max_pubkeys` accounts. Subclasses serve other
+    methods by overriding `result`.
+    """
+
+    def __init__(self) -> None:
+        self.accounts: dict[Pubkey, bytes] = {}
+        self.slot = 1
+        self.failures: list[int] = []
+        self.max_pubkeys: Optional[int] = None
+        self.posts = 0
+        self.requested: list[str] = []
+        self.gpa_calls: list[dict[str, Any]] = []
+
+    async def post(
+        self, url: str, json: list[dict], headers: dict  # noqa: ARG002
+    ) -> FakeResponse:
+        self.posts += 1
+        if self.failures:
+            return FakeResponse(None, self.failures.pop(0))
+        n_pubkeys = sum(
+            len(req["params"][0])
+            for req in json
+            if req["method"] == "getMultipleAccounts"
+        )
+        if self.max_pubkeys is not None and n_pubkeys > self.max_pubkeys:
+            return FakeResponse(None, 413)
+        body = [
+            {"jsonrpc": "2.0", "id": req["id"], "result": self.result(req)}
+            for req in json
+        ]
+        # Batched responses may come back in any order.
+        return FakeResponse(body[::-1])
+
+    def result(self, req: dict) -> Any:
+        if req["method"] != "getMultipleAccounts":
+            raise AssertionError(f"Unexpected method {req['method']}")
+        pubkeys, config = req["params"]
+        self.requested.extend(pubkeys)
+        if config.get("minContextSlot", 0) > self.slot:
+            raise AssertionError("minContextSlot not reached")
+        value = [self._account(Pubkey.from_string(pubkey)) for pubkey in pubkeys]
+        return {"context": {"slot": self.slot}, "value": value}
+
+    def _account(self, pubkey: Pubkey) -> Optional[dict]:
+        data = self.accounts.get(pubkey)
+        return None if data is None else account_json(data)
+
+    async def get_program_accounts(
+        self,
+        pubkey: Pubkey,  # noqa: ARG002
+        commitment: Any = None,  # noqa: ARG002
+        encoding: str = "base64",
+        data_slice: Optional[DataSliceOpts] = None,
+        filters: Optional[Sequence[Union[int, MemcmpOpts]]] = None,
+    ) -> Any:
+        self.gpa_calls.append(
+            {"encoding": encoding, "data_slice": data_slice, "filters": filters}
+        )
+        value = [
+            RpcKeyedAccount(
+                pubkey, Account(1, _slice(data, data_slice), Pubkey.default(), False, 0)
+            )
+            for pubkey, data in self.accounts.items()
+            if all(_matches(data, f) for f in filters or [])
+        ]
+        return SimpleNamespace(value=value)
+
+    async def get_slot(self, commitment: Any = None) -> Any:  # noqa: ARG002
+        return SimpleNamespace(value=self.slot)
+
+
+def _matches(data: bytes, account_filter: Union[int, MemcmpOpts]) -> bool:
+    if isinstance(account_filter, int):
+        return len(data) == account_filter
+    expected = b58decode(account_filter.bytes.encode())
+    offset = account_filter.offset
+    return data[offset : offset + len(expected)] == expected
+
+
+def _slice(data: bytes, data_slice: Optional[DataSliceOpts]) -> bytes:
+    if data_slice is None:
+        return data
+    return data[data_slice.offset : data_slice.offset + data_slice.length]
+
+
+@fixture
+def node() -> FakeNode:
+    return FakeNode()
+
+
+@fixture
+def connection(node: FakeNode) -> Any:
+    """A stand-in for `AsyncClient` backed by `node`."""
+    return SimpleNamespace(
+        _commitment="confirmed",
+        _provider=SimpleNamespace(session=node, endpoint_uri="http://fake"),
+        get_program_accounts=node.get_program_accounts,
+        get_slot=node.get_slot,
+    )
@@ -0,0 +1,64 @@
+"""Random borsh data for testing the coders."""
+from random import Random
+from struct import calcsize, pack
+
+from anchorpy.coder.compiled import _SIMPLE_FIXED
+from anchorpy_core.idl import (
+    IdlField,
+    IdlType,
+    IdlTypeArray,
+    IdlTypeDefinition,
+    IdlTypeDefinitionTyStruct,
+    IdlTypeOption,
+    IdlTypeSimple,
+    IdlTypeVec,
+)
+
+
+def random_borsh(
+    ty: IdlType, types: dict[str, IdlTypeDefinition], rng: Random
+) -> bytes:
+    """Generate random valid borsh data for an IDL type."""
+    if isinstance(ty, IdlTypeSimple):
+        if ty in (IdlTypeSimple.Bytes, IdlTypeSimple.String):
+            length = rng.randrange(5)
+            return pack("<I", length) + bytes(
+                rng.randrange(97, 123) for _ in range(length)
+            )
+        if ty == IdlTypeSimple.Bool:
+            return bytes([rng.randrange(2)])
+        if ty in (IdlTypeSimple.F32, IdlTypeSimple.F64):
+            return pack("<f" if ty == IdlTypeSimple.F32 else "<d", rng.random())
+        return rng.randbytes(calcsize(_SIMPLE_FIXED[ty].fmt))
+    if isinstance(ty, IdlTypeVec):
+        length = rng.randrange(4)
+        return pack("<I", length) + b"".join(
+            random_borsh(ty.vec, types, rng) for _ in range(length)
+        )
+    if isinstance(ty, IdlTypeOption):
+        if rng.randrange(2):
+            return b"\x01" + random_borsh(ty.option, types, rng)
+        return b"\x00"
+    if isinstance(ty, IdlTypeArray):
+        return b"".join(
+            random_borsh(ty.array[0], types, rng) for _ in range(ty.array[1])
+        )
+    return random_typedef_borsh(types[ty.defined], types, rng)
+
+
+def random_typedef_borsh(
+    typedef: IdlTypeDefinition, types: dict[str, IdlTypeDefinition], rng: Random
+) -> bytes:
+    """Generate random valid borsh data for an IDL typedef."""
+    ty = typedef.ty
+    if isinstance(ty, IdlTypeDefinitionTyStruct):
+        return b"".join(random_borsh(f.ty, types, rng) for f in ty.fields)
+    index = rng.randrange(len(ty.variants))
+    fields = ty.variants[index].fields
+    field_types: list[IdlType] = []
+    if fields is not None:
+        for fld in fields.fields:
+            field_types.append(fld.ty if isinstance(fld, IdlField) else fld)
+    return bytes([index]) + b"".join(
+        random_borsh(field_ty, types, rng) for field_ty in field_types
+    )
@@ -0,0 +1,105 @@
+from asyncio import gather
+from pathlib import Path
+from typing import Any
+
+from anchorpy import Idl, Program, Provider, Wallet
+from anchorpy.coder.accounts import _account_discriminator
+from anchorpy.error import AccountDoesNotExistError
+from anchorpy.utils.cache import AccountCache
+from anchorpy.utils.loader import AccountLoader
+from anchorpy.utils.rpc import AccountInfo
+from pytest import mark, raises
+from solana.rpc.commitment import Confirmed, Finalized
+from solders.pubkey import Pubkey
+
+from tests.unit.conftest import FakeNode
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _account_info(data: bytes) -> AccountInfo:
+    return AccountInfo(False, Pubkey.default(), 1, data, 0)
+
+
+def test_account_cache_ttl_and_slots() -> None:
+    clock = _Clock()
+    cache = AccountCache(clock=clock)
+    pubkey = Pubkey.new_unique()
+    cache.put(pubkey, Confirmed, _account_info(b"new"), slot=10)
+    cache.put(pubkey, Confirmed, _account_info(b"old"), slot=9)
+    cached = cache.get(pubkey, Confirmed)
+    assert cached is not None
+    assert cached.account.data == b"new"
+    assert cache.get(pubkey, Finalized) is None
+    assert cache.get(pubkey, Confirmed, min_context_slot=11) is None
+    clock.now = 10
+    assert cache.get(pubkey, Confirmed) is None
+    assert cache.info().currsize == 0
+
+
+def test_account_cache_byte_budget() -> None:
+    cache = AccountCache(max_bytes=1000)
+    pubkeys = [Pubkey.new_unique() for _ in range(5)]
+    for pubkey in pubkeys:
+        cache.put(pubkey, Confirmed, _account_info(bytes(200)), slot=1)
+    info = cache.info()
+    assert info.nbytes <= 1000
+    assert cache.get(pubkeys[0], Confirmed) is None
+    assert cache.get(pubkeys[-1], Confirmed) is not None
+
+
+def _store_accounts(node: FakeNode, n_accounts: int) -> list[Pubkey]:
+    discriminator = _account_discriminator("MyAccount")
+    pubkeys = [Pubkey.new_unique() for _ in range(n_accounts)]
+    node.accounts = {
+        pubkey: discriminator + idx.to_bytes(8, "little")
+        for idx, pubkey in enumerate(pubkeys)
+    }
+    node.slot = 5
+    return pubkeys
+
+
+@mark.asyncio
+async def test_fetch_multiple_only_requests_misses(
+    node: FakeNode, connection: Any
+) -> None:
+    idl = Idl.from_json(Path("tests/idls/basic_1.json").read_text())
+    pubkeys = _store_accounts(node, 3)
+    provider = Provider(connection, Wallet.dummy(), account_cache=AccountCache())
+    client = Program(idl, Pubkey.default(), provider).account["MyAccount"]
+    first = await client.fetch(pubkeys[0])
+    assert first.data == 0
+    missing = Pubkey.new_unique()
+    result = await client.fetch_multiple([*pubkeys, missing])
+    assert [acc.data if acc else None for acc in result] == [0, 1, 2, None]
+    assert node.requested.count(str(pubkeys[0])) == 1
+    await client.fetch(pubkeys[1])
+    assert node.requested.count(str(pubkeys[1])) == 1
+    await client.fetch(pubkeys[1], min_context_slot=5)
+    assert node.requested.count(str(pubkeys[1])) == 1
+    node.slot = 6
+    await client.fetch(pubkeys[1], min_context_slot=6)
+    assert node.requested.count(str(pubkeys[1])) == 2
+
+
+@mark.asyncio
+async def test_account_loader_coalesces_fetches(
+    node: FakeNode, connection: Any
+) -> None:
+    idl = Idl.from_json(Path("tests/idls/basic_1.json").read_text())
+    pubkeys = _store_accounts(node, 60)
+    loader = AccountLoader(connection, max_batch_size=50)
+    provider = Provider(connection, Wallet.dummy(), account_loader=loader)
+    client = Program(idl, Pubkey.default(), provider).account["MyAccount"]
+    results = await gather(*(client.fetch(pubkey) for pubkey in pubkeys * 2))
+    assert [acc.data for acc in results] == list(range(60)) * 2
+    assert node.posts == 2
+    assert len(node.requested) == 60
+    with raises(AccountDoesNotExistError):
+        await client.fetch(Pubkey.new_unique())
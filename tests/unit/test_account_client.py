@@ -0,0 +1,133 @@
+from asyncio import all_tasks
+from pathlib import Path
+from typing import Any
+
+import httpx
+from anchorpy import Idl, Program, ProgramAccount, Provider, Wallet
+from anchorpy.coder.accounts import _account_discriminator
+from based58 import b58decode, b58encode
+from pytest import mark, raises
+from solana.exceptions import SolanaRpcException
+from solana.rpc.types import DataSliceOpts, MemcmpOpts
+from solders.pubkey import Pubkey
+
+from tests.unit.conftest import FakeNode
+
+
+def test_all_filters() -> None:
+    idl = Idl.from_json(Path("tests/idls/basic_1.json").read_text())
+    client = Program(idl, Pubkey.default()).account["MyAccount"]
+    memcmp = MemcmpOpts(offset=8, bytes="2")
+    data_opt = MemcmpOpts(offset=8, bytes=b58encode((5).to_bytes(8, "little")).decode())
+    filters = client._build_filters(None, [memcmp], {"data": 5}, exact_size=True)
+    assert filters[0] == MemcmpOpts(offset=0, bytes="iAa53AdZUuw")
+    assert filters[1:] == [memcmp, data_opt, 16]
+    assert client._build_filters(None, [20], None, exact_size=True)[1:] == [20]
+
+
+@mark.asyncio
+async def test_all_fields_uses_data_slice(node: FakeNode, connection: Any) -> None:
+    idl = Idl.from_json(Path("tests/idls/basic_1.json").read_text())
+    pubkey = Pubkey.new_unique()
+    data = _account_discriminator("MyAccount") + (5).to_bytes(8, "little")
+    node.accounts = {pubkey: data}
+    provider = Provider(connection, Wallet.dummy())
+    client = Program(idl, Pubkey.default(), provider).account["MyAccount"]
+    result = await client.all(fields=["data"])
+    assert result == [ProgramAccount(pubkey, {"data": 5})]
+    assert node.gpa_calls[0]["data_slice"] == DataSliceOpts(8, 8)
+    assert node.gpa_calls[0]["encoding"] == "base64"
+    await client.all(fields=["data"], encoding="base64+zstd")
+    assert node.gpa_calls[1]["encoding"] == "base64+zstd"
+
+
+@mark.asyncio
+async def test_all_sharded(node: FakeNode, connection: Any) -> None:
+    idl = Idl.from_json(Path("tests/idls/basic_1.json").read_text())
+    discriminator = _account_discriminator("MyAccount")
+    node.accounts = {
+        Pubkey.new_unique(): discriminator + value.to_bytes(8, "little")
+        for value in (1, 2, 258, 300)
+    }
+    tasks = []
+
+    async def get_program_accounts(*args: Any, **kwargs: Any) -> Any:
+        tasks.append(len(all_tasks()))
+        return await node.get_program_accounts(*args, **kwargs)
+
+    connection.get_program_accounts = get_program_accounts
+    provider = Provider(connection, Wallet.dummy())
+    client = Program(idl, Pubkey.default(), provider).account["MyAccount"]
+    running = len(all_tasks())
+    result = await client.all(sharded=True, shard_concurrency=4)
+    shard_filters = [call["filters"][-1] for call in node.gpa_calls]
+    assert len(shard_filters) == 256
+    # One task per worker, not per shard.
+    assert max(tasks) <= running + 4
+    assert {shard.offset for shard in shard_filters} == {8}
+    assert sorted(acc.account.data for acc in result) == [1, 2, 258, 300]
+    assert {acc.public_key for acc in result} == set(node.accounts)
+
+
+def _http_status_error(status: int, headers: dict[str, str]) -> SolanaRpcException:
+    request = httpx.Request("POST", "http://fake")
+    response = httpx.Response(status, headers=headers, request=request)
+    cause = httpx.HTTPStatusError("failed", request=request, response=response)
+    error = SolanaRpcException(cause, repr, None, None)
+    error.__cause__ = cause
+    return error
+
+
+@mark.asyncio
+async def test_all_sharded_splits_and_retries_failed_shards(
+    node: FakeNode, connection: Any
+) -> None:
+    idl = Idl.from_json(Path("tests/idls/basic_1.json").read_text())
+    discriminator = _account_discriminator("MyAccount")
+    node.accounts = {
+        Pubkey.new_unique(): discriminator + value.to_bytes(8, "little")
+        for value in (2, 256, 512, 0x10100)
+    }
+    prefixes = []
+
+    async def get_program_accounts(*args: Any, **kwargs: Any) -> Any:
+        shard_filter = kwargs["filters"][-1]
+        assert shard_filter.offset == 9
+        prefix = b58decode(shard_filter.bytes.encode())
+        prefixes.append(prefix)
+        if prefix == b"\x01":
+            raise _http_status_error(413, {})
+        if prefix == b"\x02" and prefixes.count(prefix) == 1:
+            raise _http_status_error(429, {"retry-after": "0"})
+        return await node.get_program_accounts(*args, **kwargs)
+
+    connection.get_program_accounts = get_program_accounts
+    provider = Provider(connection, Wallet.dummy())
+    client = Program(idl, Pubkey.default(), provider).account["MyAccount"]
+    result = await client.all(sharded=True, shard_offset=9)
+    assert len(prefixes) == 256 + 256 + 1
+    assert sum(len(prefix) == 2 for prefix in prefixes) == 256
+    assert sorted(acc.account.data for acc in result) == [2, 256, 512, 0x10100]
+
+
+def test_shard_layout() -> None:
+    basic_1 = Program(
+        Idl.from_json(Path("tests/idls/basic_1.json").read_text()), Pubkey.default()
+    )
+    basic_2 = Program(
+        Idl.from_json(Path("tests/idls/basic_2.json").read_text()), Pubkey.default()
+    )
+    my_account = basic_1.account["MyAccount"]
+    counter = basic_2.account["Counter"]
+    assert my_account._shard_layout(None, None, 1) == (8, 1, 8)
+    assert my_account._shard_layout(None, 12, 2) == (12, 2, 4)
+    # The authority public key, which spreads accounts evenly.
+    assert counter._shard_layout(None, None, 1) == (8, 1, 40)
+    assert counter._shard_layout("count", None, 1) == (40, 1, 8)
+    with raises(ValueError, match="not both"):
+        counter._shard_layout("count", 40, 1)
+    # MyAccount is 16 bytes long.
+    with raises(ValueError, match="first 16 bytes"):
+        my_account._shard_layout(None, 15, 2)
+    with raises(ValueError, match="first 16 bytes"):
+        my_account._shard_layout(None, None, 9)
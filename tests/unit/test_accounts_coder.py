@@ -1,7 +1,19 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import fields as dc_fields
+from dataclasses import is_dataclass
+from multiprocessing import get_context
 from pathlib import Path
+from random import Random
+from typing import Any
 
-from anchorpy import AccountsCoder, Idl
-from pytest import mark
+from anchorpy import AccountsCoder, Idl, Record
+from anchorpy.coder.common import _account_size
+from anchorpy.coder.records import DecodeOutput
+from construct import StreamError
+from pytest import importorskip, mark, raises
+from solders.pubkey import Pubkey
+
+from tests.unit.random_borsh import random_typedef_borsh
 
 
 @mark.unit
@@ -14,3 +26,243 @@ def test_accounts_coder() -> None:
     decoded = acc_coder.parse(raw_acc_data)
     encoded = acc_coder.build(decoded)
     assert encoded == raw_acc_data
+
+
+@mark.unit
+def test_compiled_decode_matches_construct() -> None:
+    """Test the compiled decoder gives the same values as the construct layouts."""
+    rng = Random(0)
+    for path in Path("tests/idls/").iterdir():
+        if "spl_token" in str(path):
+            continue
+        idl = Idl.from_json(path.read_text())
+        acc_coder = AccountsCoder(idl)
+        types = {t.name: t for t in idl.types}
+        for acc in idl.accounts:
+            if _account_size(idl, acc) > 10000:
+                continue
+            disc = acc_coder.acc_name_to_discriminator[acc.name]
+            for _ in range(5):
+                raw = disc + random_typedef_borsh(acc, types, rng)
+                assert acc_coder.decode(raw) == acc_coder.parse(raw).data
+
+
+@mark.unit
+def test_compiled_decode_errors_like_construct() -> None:
+    """Test malformed data still raises the construct error."""
+    raw = Path("tests/idls/basic_1.json").read_text()
+    acc_coder = AccountsCoder(Idl.from_json(raw))
+    with raises(StreamError):
+        acc_coder.decode(b"\xf6\x1c\x06W\xfb-2*\xd2\x04")
+
+
+@mark.unit
+def test_account_view() -> None:
+    """Test view fields match the fully decoded account."""
+    rng = Random(1)
+    idl = Idl.from_json(Path("tests/idls/clientgen_example_program.json").read_text())
+    acc_coder = AccountsCoder(idl)
+    types = {t.name: t for t in idl.types}
+    for acc in idl.accounts:
+        disc = acc_coder.acc_name_to_discriminator[acc.name]
+        for _ in range(5):
+            raw = disc + random_typedef_borsh(acc, types, rng)
+            decoded = acc_coder.decode(raw)
+            view = acc_coder.view(raw)
+            # Access in reverse so the lazily computed offsets get exercised.
+            for fld in reversed(dc_fields(decoded)):
+                assert getattr(view, fld.name) == getattr(decoded, fld.name)
+    with raises(AttributeError):
+        view.foo
+
+
+@mark.unit
+def test_decode_array() -> None:
+    """Test columnar decoding matches the row-wise decoder."""
+    np = importorskip("numpy")
+    rng = Random(2)
+    idl = Idl.from_json(Path("tests/idls/quarry_mine.json").read_text())
+    acc_coder = AccountsCoder(idl)
+    types = {t.name: t for t in idl.types}
+    for acc in idl.accounts:
+        disc = acc_coder.acc_name_to_discriminator[acc.name]
+        raws = [disc + random_typedef_borsh(acc, types, rng) for _ in range(5)]
+        arr = acc_coder.decode_array(acc.name, raws)
+        assert len(arr) == len(raws)
+        for idx, raw in enumerate(raws):
+            row = arr[idx]
+            decoded = acc_coder.decode(raw)
+            for fld in dc_fields(decoded):
+                expected = getattr(decoded, fld.name)
+                actual = row[fld.name]
+                if isinstance(expected, Pubkey):
+                    assert Pubkey(actual.tobytes()) == expected
+                elif isinstance(actual, np.void):
+                    assert int.from_bytes(actual.tobytes(), "little") == expected
+                else:
+                    assert actual == expected
+    state_name = "State"
+    clientgen_idl = Path("tests/idls/clientgen_example_program.json").read_text()
+    with raises(ValueError):
+        AccountsCoder(Idl.from_json(clientgen_idl)).dtype(state_name)
+
+
+@mark.unit
+def test_encode_field_matches_account_data() -> None:
+    """Test field offsets and encodings agree with the encoded account."""
+    rng = Random(3)
+    for name in ("clientgen_example_program.json", "quarry_mine.json", "jet.json"):
+        idl = Idl.from_json(Path("tests/idls", name).read_text())
+        acc_coder = AccountsCoder(idl)
+        types = {t.name: t for t in idl.types}
+        for acc in idl.accounts:
+            disc = acc_coder.acc_name_to_discriminator[acc.name]
+            raw = disc + random_typedef_borsh(acc, types, rng)
+            decoded = acc_coder.decode(raw)
+            size = acc_coder.fixed_size(acc.name)
+            assert size is None or size == len(raw)
+            for fld in dc_fields(decoded):
+                try:
+                    offset, encoded = acc_coder.encode_field(
+                        acc.name, fld.name, getattr(decoded, fld.name)
+                    )
+                except ValueError:
+                    continue
+                assert raw[offset : offset + len(encoded)] == encoded
+
+
+@mark.unit
+def test_encode_field_paths() -> None:
+    """Test nested paths and fields without a fixed offset."""
+    idl = Idl.from_json(Path("tests/idls/tictactoe.json").read_text())
+    acc_coder = AccountsCoder(idl)
+    player = Pubkey.new_unique()
+    assert acc_coder.encode_field("Game", "players[1]", player) == (40, bytes(player))
+    assert acc_coder.encode_field("Game", "turn", 3) == (72, b"\x03")
+    assert acc_coder.fixed_size("Game") is None
+    for path in ("state", "players[2]", "turn[0]", "nope", "players.x", ".turn"):
+        with raises(ValueError):
+            acc_coder.encode_field("Game", path, None)
+
+
+@mark.unit
+def test_projection() -> None:
+    """Test projections slice out and decode only the selected fields."""
+    idl = Idl.from_json(Path("tests/idls/tictactoe.json").read_text())
+    acc_coder = AccountsCoder(idl)
+    player = Pubkey.new_unique()
+    projection = acc_coder.projection("Game", ["turn", "players[1]"])
+    assert (projection.offset, projection.length) == (40, 33)
+    data = bytes(player) + b"\x07"
+    assert projection.decode(data) == {"turn": 7, "players[1]": player}
+    with raises(ValueError):
+        acc_coder.projection("Game", ["state"])
+    with raises(ValueError):
+        acc_coder.projection("Game", [])
+
+
+def _normalize(value: Any) -> Any:
+    if is_dataclass(value) or isinstance(value, Record):
+        names = [f.name for f in dc_fields(value)] if is_dataclass(value) else None
+        slots = names if names is not None else type(value).__slots__
+        return tuple(_normalize(getattr(value, name)) for name in slots)
+    if isinstance(value, (list, tuple)):
+        return type(value)(_normalize(item) for item in value)
+    if hasattr(value, "__attrs_attrs__"):
+        attrs = value.__attrs_attrs__
+        fields = tuple(_normalize(getattr(value, a.name)) for a in attrs)
+        return type(value).__name__, fields
+    return value
+
+
+@mark.unit
+def test_lightweight_decode_outputs() -> None:
+    """Test record and tuple outputs hold the same values as the dataclasses."""
+    rng = Random(4)
+    for name in ("clientgen_example_program.json", "jet.json", "tictactoe.json"):
+        idl = Idl.from_json(Path("tests/idls", name).read_text())
+        acc_coder = AccountsCoder(idl)
+        types = {t.name: t for t in idl.types}
+        for acc in idl.accounts:
+            disc = acc_coder.acc_name_to_discriminator[acc.name]
+            raw = disc + random_typedef_borsh(acc, types, rng)
+            expected = _normalize(acc_coder.decode(raw))
+            record = acc_coder.decode(raw, "record")
+            assert isinstance(record, Record)
+            assert _normalize(record) == expected
+            tup = acc_coder.decode(raw, "tuple")
+            assert type(tup) is tuple
+            assert _normalize(tup) == expected
+            with raises(AttributeError):
+                record.foo = 1
+    with raises(ValueError):
+        acc_coder.decode(raw, "dict")  # type: ignore[arg-type]
+
+
+@mark.unit
+def test_fallback_never_returns_a_dataclass_for_other_outputs() -> None:
+    idl = Idl.from_json(Path("tests/idls/basic_1.json").read_text())
+    acc_coder = AccountsCoder(idl)
+    disc = acc_coder.acc_name_to_discriminator["MyAccount"]
+    raw = disc + (5).to_bytes(8, "little")
+
+    def failing_decoder(buf: bytes, offset: int) -> Any:
+        raise ValueError("unsupported")
+
+    outputs: list[DecodeOutput] = ["record", "tuple"]
+    for output in outputs:
+        acc_coder._decoders(output)[disc] = failing_decoder
+        with raises(ValueError):
+            acc_coder.decode(raw, output)
+        with raises(ValueError):
+            acc_coder.decode_many([raw], output=output)
+    acc_coder._decoders("dataclass")[disc] = failing_decoder
+    assert is_dataclass(acc_coder.decode(raw))
+    with raises(StreamError):
+        acc_coder.decode(disc + b"\x01", "record")
+
+
+@mark.unit
+@mark.parametrize("executor_cls", [None, ThreadPoolExecutor, ProcessPoolExecutor])
+def test_decode_many(executor_cls: Any) -> None:
+    """Test bulk decoding of mixed account types matches `decode`."""
+    rng = Random(5)
+    idl = Idl.from_json(Path("tests/idls/clientgen_example_program.json").read_text())
+    acc_coder = AccountsCoder(idl)
+    types = {t.name: t for t in idl.types}
+    raws = [
+        acc_coder.acc_name_to_discriminator[acc.name]
+        + random_typedef_borsh(acc, types, rng)
+        for _ in range(10)
+        for acc in idl.accounts
+    ]
+    expected = [acc_coder.decode(raw) for raw in raws]
+    if executor_cls is None:
+        assert acc_coder.decode_many(raws) == expected
+        return
+    with executor_cls(max_workers=2) as executor:
+        assert acc_coder.decode_many(raws, executor, chunk_size=3) == expected
+        records = acc_coder.decode_many(raws, executor, "record", chunk_size=3)
+    assert records == [acc_coder.decode(raw, "record") for raw in raws]
+
+
+def _identity(values: list[Any]) -> list[Any]:
+    return values
+
+
+@mark.unit
+def test_decoded_enums_unpickle_in_fresh_process() -> None:
+    """Test decoded values can be sent to a process that never loaded the IDL."""
+    rng = Random(6)
+    idl = Idl.from_json(Path("tests/idls/clientgen_example_program.json").read_text())
+    acc_coder = AccountsCoder(idl)
+    types = {t.name: t for t in idl.types}
+    state = next(acc for acc in idl.accounts if acc.name == "State")
+    disc = acc_coder.acc_name_to_discriminator[state.name]
+    decoded = [
+        acc_coder.decode(disc + random_typedef_borsh(state, types, rng))
+        for _ in range(5)
+    ]
+    # Spawned workers start empty, so they rebuild the enums from the pickle.
+    with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as executor:
+        assert executor.submit(_identity, decoded).result() == decoded
@@ -0,0 +1,137 @@
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Optional
+
+from anchorpy import BackfillStats, Idl, Program, Provider, Wallet
+from anchorpy.program.namespace import events as events_namespace
+from anchorpy.utils.checkpoint import EventCheckpoint
+from pytest import MonkeyPatch, fixture, mark, raises
+from solders.pubkey import Pubkey
+from solders.rpc.responses import RpcConfirmedTransactionStatusWithSignature
+from solders.signature import Signature
+from solders.transaction_status import TransactionErrorFieldless
+
+from tests.unit.conftest import FakeNode
+
+PROGRAM_ID = Pubkey.from_string("2dhGsWUzy5YKUsjZdLHLmkNpUDAXkNa9MYWsPc4Ziqzy")
+LOGS = [
+    f"Program {PROGRAM_ID} invoke [1]",
+    "Program data: YLjF84sCWpQFAAAAAAAAAAUAAABoZWxsbw==",
+    f"Program {PROGRAM_ID} success",
+]
+# The event discriminator followed by too few bytes.
+MALFORMED_LOGS = [LOGS[0], "Program data: YLjF84sCWpQFAA==", LOGS[2]]
+
+
+class _HistoryNode(FakeNode):
+    """Serves the history of a program, newest first like the RPC API."""
+
+    def __init__(self, n: int, failed: int) -> None:
+        super().__init__()
+        self.signatures = [Signature.new_unique() for _ in range(n)]
+        self.slots = {sig: 10 + i for i, sig in enumerate(self.signatures)}
+        self.failed = self.signatures[failed]
+        self.fetched: list[str] = []
+        self.untils: list[Optional[Signature]] = []
+        self.pruned: set[Signature] = set()
+        self.malformed: set[Signature] = set()
+        self.without_meta: set[Signature] = set()
+
+    async def get_signatures_for_address(
+        self,
+        account: Pubkey,  # noqa: ARG002
+        before: Optional[Signature],
+        until: Optional[Signature],
+        limit: int,
+        commitment: Any,  # noqa: ARG002
+    ) -> Any:
+        self.untils.append(until)
+        newest_first = self.signatures[::-1]
+        start = 0 if before is None else newest_first.index(before) + 1
+        end = len(newest_first) if until is None else newest_first.index(until)
+        page = [
+            RpcConfirmedTransactionStatusWithSignature(
+                sig,
+                self.slots[sig],
+                TransactionErrorFieldless.AccountInUse if sig == self.failed else None,
+            )
+            for sig in newest_first[start:end][:limit]
+        ]
+        return SimpleNamespace(value=page)
+
+    def result(self, req: dict) -> Any:
+        if req["method"] != "getTransaction":
+            return super().result(req)
+        signature = req["params"][0]
+        self.fetched.append(signature)
+        sig = Signature.from_string(signature)
+        logs = MALFORMED_LOGS if sig in self.malformed else LOGS
+        meta = None if sig in self.without_meta else {"err": None, "logMessages": logs}
+        return None if sig in self.pruned else {"slot": self.slots[sig], "meta": meta}
+
+
+@fixture
+def node() -> _HistoryNode:
+    return _HistoryNode(8, failed=3)
+
+
+@fixture
+def connection(connection: Any, node: _HistoryNode) -> Any:
+    connection.get_signatures_for_address = node.get_signatures_for_address
+    return connection
+
+
+@mark.asyncio
+async def test_backfill_resumes_from_checkpoint(
+    tmp_path: Path, monkeypatch: MonkeyPatch, node: _HistoryNode, connection: Any
+) -> None:
+    monkeypatch.setattr(events_namespace, "_SIGNATURES_LIMIT", 3)
+    provider = Provider(connection, Wallet.dummy())
+    idl = Idl.from_json(Path("tests/idls/events.json").read_text())
+    program = Program(idl, PROGRAM_ID, provider)
+    path = tmp_path / "checkpoint.json"
+    checkpoint = EventCheckpoint(path, PROGRAM_ID)
+    events = program.events.backfill(
+        checkpoint, min_slot=11, batch_size=2, max_concurrency=2
+    )
+    first = [await events.__anext__() for _ in range(3)]
+    await events.aclose()
+    assert [n.slot for n in first] == [11, 12, 14]
+    assert first[0].event.name == "MyEvent"
+    # Only the batch of slots 11 and 12 was consumed completely.
+    assert EventCheckpoint(path, PROGRAM_ID).slot == 12
+    assert str(node.failed) not in node.fetched
+
+    resumed = EventCheckpoint(path, PROGRAM_ID)
+    rest = [n.slot async for n in program.events.backfill(resumed, batch_size=2)]
+    assert rest == [14, 15, 16, 17]
+    assert node.untils[-1] == node.signatures[2]
+    assert resumed.slot == 17
+    assert [n async for n in program.events.backfill(resumed)] == []
+    assert EventCheckpoint(path, PROGRAM_ID).signature == node.signatures[-1]
+    with raises(ValueError):
+        EventCheckpoint(path, Pubkey.new_unique())
+
+
+@mark.asyncio
+async def test_backfill_skips_pruned_and_malformed_transactions(
+    tmp_path: Path, monkeypatch: MonkeyPatch, node: _HistoryNode, connection: Any
+) -> None:
+    monkeypatch.setattr(events_namespace, "_SIGNATURES_LIMIT", 3)
+    node.pruned = {node.signatures[1]}
+    node.malformed = {node.signatures[4]}
+    node.without_meta = {node.signatures[5]}
+    provider = Provider(connection, Wallet.dummy())
+    idl = Idl.from_json(Path("tests/idls/events.json").read_text())
+    program = Program(idl, PROGRAM_ID, provider)
+    checkpoint = EventCheckpoint(tmp_path / "checkpoint.json", PROGRAM_ID)
+    stats = BackfillStats()
+    slots = [
+        n.slot
+        async for n in program.events.backfill(checkpoint, batch_size=2, stats=stats)
+    ]
+    assert slots == [10, 12, 16, 17]
+    assert stats == BackfillStats(transactions=6, events=4, missing=1, malformed=1)
+    assert checkpoint.signature == node.signatures[-1]
+    # Each page is listed once to find the oldest, then again oldest first.
+    assert len(node.untils) == 3 + 2
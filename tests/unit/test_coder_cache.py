@@ -0,0 +1,46 @@
+from pathlib import Path
+
+from anchorpy import (
+    Idl,
+    Program,
+    clear_coder_cache,
+    coder_cache_info,
+    get_coder,
+)
+from anchorpy.coder import idl as idl_coder
+from anchorpy.coder.cache import _LRUCache
+from solders.pubkey import Pubkey
+
+
+def test_programs_share_coder() -> None:
+    clear_coder_cache()
+    raw = Path("tests/idls/basic_1.json").read_text()
+    program_id = Pubkey.default()
+    first = Program(Idl.from_json(raw), program_id)
+    second = Program(Idl.from_json(raw), program_id)
+    assert first.coder is second.coder
+    other = get_coder(Idl.from_json(Path("tests/idls/basic_2.json").read_text()))
+    assert other is not first.coder
+    info = coder_cache_info()
+    assert (info.hits, info.misses, info.currsize) == (1, 2, 2)
+
+
+def test_lru_cache_evicts_least_recently_used() -> None:
+    cache: _LRUCache[str, int] = _LRUCache(2)
+    cache.get_or_create("a", lambda: 1)
+    cache.get_or_create("b", lambda: 2)
+    assert cache.get_or_create("a", lambda: 10) == 1
+    cache.get_or_create("c", lambda: 3)
+    assert cache.get_or_create("b", lambda: 20) == 20
+    assert cache.get_or_create("a", lambda: 30) == 30
+    assert cache.info().currsize == 2
+
+
+def test_generated_types_are_never_evicted() -> None:
+    cache: _LRUCache[str, int] = _LRUCache(None)
+    for key in range(10000):
+        cache.get_or_create(str(key), lambda: 1)
+    assert cache.info().currsize == 10000
+    assert cache.info().maxsize is None
+    assert idl_coder._enums_cache.maxsize is None
+    assert idl_coder._datacls_cache.maxsize is None
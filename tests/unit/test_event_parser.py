@@ -1,6 +1,14 @@
 from pathlib import Path
 
-from anchorpy import Event, EventParser, Idl, Program
+from anchorpy import (
+    Event,
+    EventParser,
+    Idl,
+    Program,
+    ProgramEvent,
+    WorkspaceEventParser,
+)
+from pytest import raises
 from solders.pubkey import Pubkey
 
 
@@ -30,3 +38,109 @@ def test_event_parser() -> None:
     )
     expected_event = Event(name="MyEvent", data=expected_data)
     assert evts[0] == expected_event
+
+
+def test_event_parser_skips_unselected_events() -> None:
+    path = Path("tests/idls/events.json")
+    idl = Idl.from_json(path.read_text())
+    program = Program(
+        idl, Pubkey.from_string("2dhGsWUzy5YKUsjZdLHLmkNpUDAXkNa9MYWsPc4Ziqzy")
+    )
+    logs = [
+        "Program 2dhGsWUzy5YKUsjZdLHLmkNpUDAXkNa9MYWsPc4Ziqzy invoke [1]",
+        "Program log: Instruction: Initialize",
+        "Program log: test",
+        "Program data: YLjF84sCWpQFAAAAAAAAAAUAAABoZWxsbw==",
+        "Program 2dhGsWUzy5YKUsjZdLHLmkNpUDAXkNa9MYWsPc4Ziqzy success",
+    ]
+    evts: list[Event] = []
+    selected = EventParser(program.program_id, program.coder, event_names=["MyEvent"])
+    selected.parse_logs(logs, evts.append)
+    assert [evt.name for evt in evts] == ["MyEvent"]
+    evts.clear()
+    EventParser(program.program_id, program.coder, event_names=[]).parse_logs(
+        logs, evts.append
+    )
+    assert evts == []
+    with raises(ValueError):
+        EventParser(program.program_id, program.coder, event_names=["Nope"])
+
+
+def test_iter_events_batches_and_long_logs() -> None:
+    idl = Idl.from_json(Path("tests/idls/events.json").read_text())
+    program_id = Pubkey.from_string("2dhGsWUzy5YKUsjZdLHLmkNpUDAXkNa9MYWsPc4Ziqzy")
+    program = Program(idl, program_id)
+    other = Pubkey.new_unique()
+    data = "Program data: YLjF84sCWpQFAAAAAAAAAAUAAABoZWxsbw=="
+    logs = [
+        f"Program {program_id} invoke [1]",
+        data,
+        f"Program {other} invoke [2]",
+        data,
+        f"Program {other} success",
+        *[data] * 50000,
+        f"Program {program_id} success",
+    ]
+    parser = EventParser(program_id, program.coder)
+    # The data line logged by the other program is not an event of this one.
+    assert sum(1 for _ in parser.iter_events(logs)) == 50001
+    batches: list[list[str]] = [logs[:2] + logs[-1:], [], logs[2:5]]
+    events = list(parser.iter_events(iter(batches)))
+    assert [evt.name for evt in events] == ["MyEvent"]
+    assert list(parser.iter_events([])) == []
+
+
+def test_event_parser_classifies_nested_invocations() -> None:
+    idl = Idl.from_json(Path("tests/idls/events.json").read_text())
+    program_id = Pubkey.from_string("2dhGsWUzy5YKUsjZdLHLmkNpUDAXkNa9MYWsPc4Ziqzy")
+    program = Program(idl, program_id)
+    other = Pubkey.new_unique()
+    data = "Program data: YLjF84sCWpQFAAAAAAAAAAUAAABoZWxsbw=="
+    logs = [
+        f"Program {other} invoke [1]",
+        data,
+        f"Program {program_id} invoke [2]",
+        "Program log: invoke: not an event",
+        data,
+        f"Program {program_id} consumed 1019 of 1400000 compute units",
+        f"Program {program_id} success",
+        data,
+        f"Program {other} success",
+    ]
+    parser = EventParser(program_id, program.coder)
+    assert [evt.name for evt in parser.iter_events(logs)] == ["MyEvent"]
+    assert parser.handle_system_log(f"Program {other} success") == (None, True)
+    assert parser.handle_system_log(f"Program {other} success extra") == (None, False)
+    assert parser.handle_system_log(f"Program {other} invoke [3]") == ("cpi", False)
+    assert parser.handle_system_log("Program log: invoke") == (None, False)
+
+
+def test_workspace_event_parser() -> None:
+    idl = Idl.from_json(Path("tests/idls/events.json").read_text())
+    outer, inner, untracked = (Pubkey.new_unique() for _ in range(3))
+    coder = Program(idl, outer).coder
+    data = "Program data: YLjF84sCWpQFAAAAAAAAAAUAAABoZWxsbw=="
+    logs = [
+        f"Program {outer} invoke [1]",
+        data,
+        f"Program {inner} invoke [2]",
+        "Program log: Instruction: Inner",
+        data,
+        f"Program {untracked} invoke [3]",
+        data,
+        f"Program {untracked} success",
+        f"Program {inner} consumed 1019 of 1400000 compute units",
+        f"Program {inner} success",
+        data,
+        f"Program {outer} success",
+    ]
+    parser = WorkspaceEventParser([(outer, coder), (inner, coder)])
+    assert parser.program_ids == [outer, inner]
+    events = list(parser.iter_events([logs, logs[2:5]]))
+    assert [evt.program_id for evt in events] == [outer, inner, outer, inner]
+    assert {evt.event.name for evt in events} == {"MyEvent"}
+    callback_events: list[ProgramEvent] = []
+    parser.parse_logs(logs, callback_events.append)
+    assert callback_events == events[:3]
+    with raises(ValueError):
+        WorkspaceEventParser([(outer, coder), (outer, coder)])
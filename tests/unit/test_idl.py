@@ -1,6 +1,8 @@
 from pathlib import Path
 
-from anchorpy import Idl, Program
+from anchorpy import Coder, Idl, Program
+from anchorpy.coder.common import _account_size, _idl_type_index
+from pytest import raises
 from solders.pubkey import Pubkey
 
 
@@ -37,3 +39,19 @@ def test_clientgen_example() -> None:
     path = Path("tests/idls/clientgen_example_program.json")
     raw = path.read_text()
     Idl.from_json(raw)
+
+
+def test_type_index_memoizes_layouts() -> None:
+    raw = Path("tests/idls/switchboard_v2.mainnet.06022022.json").read_text()
+    idl = Idl.from_json(raw)
+    coder = Coder(idl)
+    types = _idl_type_index(idl)
+    assert types is _idl_type_index(Idl.from_json(raw))
+    assert types.layouts
+    assert coder.accounts._types is types
+    with raises(ValueError, match="Type not found Nope"):
+        types.get("Nope")
+    expected = {"OracleQueueAccountData": 1261, "VrfAccountData": 29050}
+    for acc in idl.accounts:
+        if acc.name in expected:
+            assert _account_size(idl, acc) == expected[acc.name]
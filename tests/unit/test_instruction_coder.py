@@ -1,9 +1,14 @@
 from pathlib import Path
+from random import Random
 
 from anchorpy import Idl, InstructionCoder
 from anchorpy.program.common import _to_instruction
 from anchorpy.program.context import _check_args_length
-from pytest import mark
+from pyheck import snake
+from pytest import mark, raises
+from solders.pubkey import Pubkey
+
+from tests.unit.random_borsh import random_borsh
 
 
 @mark.unit
@@ -19,3 +24,47 @@ def test_instruction_coder() -> None:
     encoded = coder.build(ix)
     assert encoded == b"\xaf\xafm\x1f\r\x98\x9b\xed\xd2\x04\x00\x00\x00\x00\x00\x00"
     assert coder.parse(encoded) == ix
+
+
+@mark.unit
+def test_compiled_encoder_round_trip() -> None:
+    """Test the compiled encoder reproduces the bytes construct decodes."""
+    rng = Random(0)
+    for path in Path("tests/idls/").iterdir():
+        if "spl_token" in str(path):
+            continue
+        idl = Idl.from_json(path.read_text())
+        coder = InstructionCoder(idl)
+        types = {t.name: t for t in [*idl.accounts, *idl.types]}
+        for idl_ix in idl.instructions:
+            name = snake(idl_ix.name)
+            for _ in range(3):
+                raw = coder.sighashes[name] + b"".join(
+                    random_borsh(arg.ty, types, rng) for arg in idl_ix.args
+                )
+                data = coder.parse(raw).data
+                args = tuple(data[snake(arg.name)] for arg in idl_ix.args)
+                assert coder._args_encoders[name](args) == raw
+                assert coder.encode(name, data) == raw
+
+
+@mark.unit
+def test_encode_args_rejects_wrong_arg_count() -> None:
+    idl = Idl.from_json(Path("tests/idls/basic_1.json").read_text())
+    coder = InstructionCoder(idl)
+    name = snake(idl.instructions[0].name)
+    with raises(ValueError):
+        coder.encode_args(name, ())
+    with raises(ValueError):
+        coder.encode_args(name, (1, 2))
+
+
+@mark.unit
+def test_encode_rejects_int_for_bytes_arg() -> None:
+    idl = Idl.from_json(Path("tests/idls/multisig.json").read_text())
+    coder = InstructionCoder(idl)
+    args = {"pid": Pubkey.default(), "accs": [], "data": 5}
+    with raises(TypeError):
+        coder.encode("create_transaction", args)
+    with raises(TypeError):
+        coder.encode_args("create_transaction", tuple(args.values()))
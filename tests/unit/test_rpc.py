@@ -0,0 +1,120 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+from anchorpy.utils.rpc import (
+    MultipleAccountsStats,
+    get_multiple_accounts,
+    iter_multiple_accounts,
+)
+from pytest import mark, raises
+from solana.rpc.core import RPCException
+from solders.pubkey import Pubkey
+
+from tests.unit.conftest import FakeNode
+
+
+def _store(node: FakeNode, n_accounts: int) -> list[Pubkey]:
+    pubkeys = [Pubkey.new_unique() for _ in range(n_accounts)]
+    # Each account holds its own address, to check results line up.
+    node.accounts = {pubkey: bytes(pubkey) for pubkey in pubkeys}
+    return pubkeys
+
+
+@mark.asyncio
+async def test_get_multiple_accounts_retries_and_splits(
+    node: FakeNode, connection: Any
+) -> None:
+    pubkeys = _store(node, 1050)
+    node.failures = [429, 503]
+    node.max_pubkeys = 250
+    stats = MultipleAccountsStats()
+    result = await get_multiple_accounts(
+        connection, pubkeys, batch_size=3, max_concurrency=2, stats=stats
+    )
+    assert [item.pubkey for item in result if item is not None] == pubkeys
+    assert all(
+        item is not None and item.account.data == bytes(item.pubkey) for item in result
+    )
+    assert stats.accounts == len(pubkeys)
+    assert stats.rate_limited == 1
+    assert stats.retries == 2
+    assert stats.splits > 0
+    assert stats.accounts_per_second > 0
+
+
+@mark.asyncio
+async def test_get_multiple_accounts_gives_up(node: FakeNode, connection: Any) -> None:
+    node.failures = [429] * 3
+    with raises(RPCException):
+        await get_multiple_accounts(connection, [Pubkey.new_unique()], max_retries=2)
+    assert node.posts == 3
+
+
+@mark.asyncio
+@mark.parametrize("use_process_pool", [False, True])
+async def test_get_multiple_accounts_offloads_parsing(
+    node: FakeNode, connection: Any, use_process_pool: bool
+) -> None:
+    pubkeys = _store(node, 250)
+    executor = ProcessPoolExecutor(max_workers=1) if use_process_pool else None
+    try:
+        result = await get_multiple_accounts(
+            connection, pubkeys, executor=executor, offload_threshold=0
+        )
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    assert [item.pubkey for item in result if item is not None] == pubkeys
+    assert all(
+        item is not None and item.account.data == bytes(item.pubkey) for item in result
+    )
+
+
+@mark.asyncio
+@mark.parametrize("ordered", [False, True])
+async def test_iter_multiple_accounts(
+    node: FakeNode, connection: Any, ordered: bool
+) -> None:
+    pubkeys = _store(node, 1050)
+    node.failures = [503]
+    node.max_pubkeys = 250
+    starts = []
+    seen = []
+    async for batch in iter_multiple_accounts(
+        connection, pubkeys, batch_size=3, ordered=ordered
+    ):
+        starts.append(batch.start)
+        for idx, item in enumerate(batch.accounts):
+            assert item is not None
+            assert item.pubkey == pubkeys[batch.start + idx]
+            seen.append(item.pubkey)
+    assert set(seen) == set(pubkeys)
+    assert len(seen) == len(pubkeys)
+    if ordered:
+        assert starts == sorted(starts)
+        assert seen == pubkeys
+
+
+@mark.asyncio
+async def test_iter_multiple_accounts_stops_early(
+    node: FakeNode, connection: Any
+) -> None:
+    pubkeys = _store(node, 1000)
+    node.max_pubkeys = 100
+    batches = iter_multiple_accounts(
+        connection, pubkeys, batch_size=1, max_concurrency=2
+    )
+    batch = await batches.__anext__()
+    assert batch.accounts
+    await batches.aclose()
+    assert node.posts < 10
+
+
+@mark.asyncio
+async def test_get_multiple_accounts_reports_client_errors(
+    node: FakeNode, connection: Any
+) -> None:
+    node.failures = [401]
+    with raises(RPCException, match="HTTP 401"):
+        await get_multiple_accounts(connection, [Pubkey.new_unique()])
+    assert node.posts == 1
@@ -0,0 +1,105 @@
+from pathlib import Path
+from typing import Any
+
+from anchorpy import Idl, Program, Provider, Wallet
+from anchorpy.coder.accounts import _account_discriminator
+from anchorpy.utils.snapshot import AccountSnapshot
+from pytest import mark, raises
+from solders.pubkey import Pubkey
+
+from tests.unit.conftest import FakeNode
+
+
+def test_snapshot_store(tmp_path: Path) -> None:
+    program_id = Pubkey.new_unique()
+    path = tmp_path / "snapshot.db"
+    pubkey = Pubkey.new_unique()
+    with AccountSnapshot(path, program_id) as snapshot:
+        snapshot.put_many([(pubkey, b"new-data", 5)])
+        snapshot.put_many([(pubkey, b"old-data", 4)])
+        snapshot.set_slot(5)
+    with AccountSnapshot(path, program_id) as snapshot:
+        assert snapshot.slot == 5
+        assert snapshot.get(pubkey) == (b"new-data", 5)
+        assert snapshot.pubkeys(b"new-data") == [pubkey]
+        assert snapshot.pubkeys(b"old-data") == []
+        snapshot.delete_many([pubkey])
+        assert len(snapshot) == 0
+    with raises(ValueError):
+        AccountSnapshot(path, Pubkey.new_unique())
+
+
+def _data(value: int) -> bytes:
+    return _account_discriminator("MyAccount") + value.to_bytes(8, "little")
+
+
+@mark.asyncio
+async def test_sync_and_resume_snapshot(
+    tmp_path: Path, node: FakeNode, connection: Any
+) -> None:
+    first, closed, created = (Pubkey.new_unique() for _ in range(3))
+    node.accounts = {first: _data(1), closed: _data(2)}
+    node.slot = 10
+    provider = Provider(connection, Wallet.dummy())
+    idl = Idl.from_json(Path("tests/idls/basic_1.json").read_text())
+    program_id = Pubkey.new_unique()
+    client = Program(idl, program_id, provider).account["MyAccount"]
+    with AccountSnapshot(tmp_path / "snapshot.db", program_id) as snapshot:
+        await client.sync_snapshot(snapshot)
+        assert snapshot.slot == 10
+        assert len(snapshot) == 2
+        node.accounts = {first: _data(3), created: _data(4)}
+        node.slot = 20
+        await client.sync_snapshot(snapshot)
+        assert not any(
+            isinstance(f, int) for call in node.gpa_calls for f in call["filters"]
+        )
+        data_slices = [call["data_slice"] for call in node.gpa_calls]
+        assert data_slices[0] is None
+        assert data_slices[1].length == 0
+        assert node.requested == [str(created)]
+        loaded = await client.load_snapshot(snapshot)
+        values = {acc.public_key: acc.account.data for acc in loaded}
+        # Resuming keeps the stored data of accounts that still exist.
+        assert values == {first: 1, created: 4}
+        assert snapshot.slot == 20
+        node.requested.clear()
+        node.accounts = {first: _data(3), created: _data(5)}
+        node.slot = 30
+        await client.sync_snapshot(snapshot, change_fields=["data"])
+        data_slice = node.gpa_calls[2]["data_slice"]
+        assert (data_slice.offset, data_slice.length) == (8, 8)
+        # Only the accounts whose change field differs are refetched.
+        assert sorted(node.requested) == sorted([str(first), str(created)])
+        node.requested.clear()
+        await client.sync_snapshot(snapshot, change_fields=["data"])
+        assert node.requested == []
+        loaded = await client.load_snapshot(snapshot)
+        values = {acc.public_key: acc.account.data for acc in loaded}
+        assert values == {first: 3, created: 5}
+
+
+@mark.asyncio
+async def test_sync_snapshot_drops_accounts_closed_while_syncing(
+    tmp_path: Path, node: FakeNode, connection: Any
+) -> None:
+    kept, closing = Pubkey.new_unique(), Pubkey.new_unique()
+    node.accounts = {kept: _data(1), closing: _data(2)}
+    provider = Provider(connection, Wallet.dummy())
+    idl = Idl.from_json(Path("tests/idls/basic_1.json").read_text())
+    program_id = Pubkey.new_unique()
+    client = Program(idl, program_id, provider).account["MyAccount"]
+    with AccountSnapshot(tmp_path / "snapshot.db", program_id) as snapshot:
+        await client.sync_snapshot(snapshot)
+
+        async def get_program_accounts(*args: Any, **kwargs: Any) -> Any:
+            resp = await node.get_program_accounts(*args, **kwargs)
+            # Closed after being listed, so it is not found when fetched.
+            del node.accounts[closing]
+            return resp
+
+        connection.get_program_accounts = get_program_accounts
+        await client.sync_snapshot(snapshot, refresh_existing=True)
+        assert sorted(node.requested) == sorted([str(kept), str(closing)])
+        assert snapshot.get(closing) is None
+        assert len(snapshot) == 1
@@ -0,0 +1,332 @@
+import json
+from asyncio import Event, ensure_future, sleep, wait_for
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+from anchorpy import Idl, Program, Provider, Wallet
+from anchorpy.coder.accounts import _account_discriminator
+from anchorpy.utils.subscriptions import Subscription, SubscriptionMultiplexer, ws_url
+from pytest import mark, raises
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+from websockets.legacy.server import WebSocketServerProtocol, serve
+
+from tests.unit.conftest import FakeNode, account_json
+
+
+def test_ws_url() -> None:
+    assert ws_url("http://127.0.0.1:8899") == "ws://127.0.0.1:8900"
+    assert ws_url("https://api.devnet.solana.com") == "wss://api.devnet.solana.com"
+
+
+class _Node:
+    """Confirms subscriptions and sends two notifications to each.
+
+    The first connection is dropped after its notifications, to make the
+    client reconnect.
+    """
+
+    def __init__(self) -> None:
+        self.connections = 0
+        self.subscribes: list[str] = []
+
+    async def handler(
+        self, ws: WebSocketServerProtocol, path: str  # noqa: ARG002
+    ) -> None:
+        self.connections += 1
+        connection = self.connections
+        async for raw in ws:
+            req = json.loads(raw)
+            if not req["method"].endswith("Subscribe"):
+                continue
+            self.subscribes.append(req["method"])
+            sub_id = len(self.subscribes)
+            await ws.send(
+                json.dumps({"jsonrpc": "2.0", "id": req["id"], "result": sub_id})
+            )
+            await ws.send(json.dumps(self._notification(req, sub_id, connection)))
+            if connection == 1 and len(self.subscribes) == 2:
+                await ws.close()
+
+    def _notification(self, req: dict, sub_id: int, value: int) -> dict:
+        data = _account_discriminator("MyAccount") + value.to_bytes(8, "little")
+        account = account_json(data)
+        if req["method"] == "programSubscribe":
+            result: Any = {"pubkey": str(Pubkey.default()), "account": account}
+        else:
+            result = account
+        return {
+            "jsonrpc": "2.0",
+            "method": req["method"].replace("Subscribe", "Notification"),
+            "params": {
+                "result": {"context": {"slot": 1}, "value": result},
+                "subscription": sub_id,
+            },
+        }
+
+
+@mark.asyncio
+async def test_subscriptions_share_connection_and_resubscribe(
+    connection: Any,
+) -> None:
+    node = _Node()
+    async with serve(node.handler, "127.0.0.1", 0) as server:
+        port = list(server.sockets)[0].getsockname()[1]
+        multiplexer = SubscriptionMultiplexer(
+            f"ws://127.0.0.1:{port}", reconnect_delay=0.01
+        )
+        provider = Provider(connection, Wallet.dummy(), subscriptions=multiplexer)
+        idl = Idl.from_json(Path("tests/idls/basic_1.json").read_text())
+        client = Program(idl, Pubkey.default(), provider).account["MyAccount"]
+        account_updates = client.subscribe(Pubkey.new_unique())
+        program_updates = client.subscribe_all()
+        first = await wait_for(account_updates.__anext__(), 5)
+        first_all = await wait_for(program_updates.__anext__(), 5)
+        assert first is not None
+        assert first.data == 1
+        assert first_all.account.data == 1
+        second = await wait_for(account_updates.__anext__(), 5)
+        second_all = await wait_for(program_updates.__anext__(), 5)
+        assert second is not None
+        assert second.data == 2
+        assert second_all.account.data == 2
+        assert node.connections == 2
+        assert (
+            sorted(node.subscribes)
+            == ["accountSubscribe"] * 2 + ["programSubscribe"] * 2
+        )
+        await account_updates.aclose()
+        await program_updates.aclose()
+        await multiplexer.close()
+
+
+@mark.asyncio
+async def test_replica(node: FakeNode, connection: Any) -> None:
+    discriminator = _account_discriminator("MyAccount")
+    first, closed, created, truncated = (Pubkey.new_unique() for _ in range(4))
+    updates = [
+        (first, discriminator + (7).to_bytes(8, "little"), 1),
+        (created, discriminator + (1).to_bytes(8, "little"), 1),
+        (truncated, discriminator + b"\x01", 1),
+        (closed, b"", 0),
+    ]
+    subscribed = Event()
+    release = Event()
+
+    async def handler(ws: WebSocketServerProtocol, path: str) -> None:  # noqa: ARG001
+        async for raw in ws:
+            req = json.loads(raw)
+            if req["method"] != "programSubscribe":
+                continue
+            await ws.send(json.dumps({"jsonrpc": "2.0", "id": req["id"], "result": 9}))
+            subscribed.set()
+            await release.wait()
+            for slot, (pubkey, data, lamports) in enumerate(updates):
+                value = {
+                    "pubkey": str(pubkey),
+                    "account": account_json(data, lamports),
+                }
+                notification = {
+                    "jsonrpc": "2.0",
+                    "method": "programNotification",
+                    "params": {
+                        "result": {"context": {"slot": slot}, "value": value},
+                        "subscription": 9,
+                    },
+                }
+                await ws.send(json.dumps(notification))
+
+    data = discriminator + (1).to_bytes(8, "little")
+    node.accounts = {first: data, closed: data}
+    async with serve(handler, "127.0.0.1", 0) as server:
+        port = list(server.sockets)[0].getsockname()[1]
+        multiplexer = SubscriptionMultiplexer(f"ws://127.0.0.1:{port}")
+        provider = Provider(connection, Wallet.dummy(), subscriptions=multiplexer)
+        idl = Idl.from_json(Path("tests/idls/basic_1.json").read_text())
+        client = Program(idl, Pubkey.default(), provider).account["MyAccount"]
+        async with client.replica(indexes=["data"]) as replica:
+            await wait_for(subscribed.wait(), 5)
+            assert set(replica.lookup("data", 1)) == {first, closed}
+            release.set()
+            for _ in range(100):
+                if replica.slot == len(updates) - 1:
+                    break
+                await sleep(0.01)
+            assert set(replica) == {first, created}
+            assert set(replica.lookup("data", 1)) == {created}
+            assert replica.lookup("data", 7)[first].data == 7
+            assert replica.resyncs == 0
+            assert replica.skipped == 1
+        await multiplexer.close()
+
+
+@mark.asyncio
+async def test_replica_raises_update_errors(connection: Any) -> None:
+    async def handler(ws: WebSocketServerProtocol, path: str) -> None:  # noqa: ARG001
+        async for raw in ws:
+            req = json.loads(raw)
+            if req["method"] != "programSubscribe":
+                continue
+            await ws.send(json.dumps({"jsonrpc": "2.0", "id": req["id"], "result": 9}))
+            # No "value", which the replica cannot apply.
+            params = {"result": {"context": {"slot": 1}}, "subscription": 9}
+            await ws.send(json.dumps({"jsonrpc": "2.0", "params": params}))
+
+    async with serve(handler, "127.0.0.1", 0) as server:
+        port = list(server.sockets)[0].getsockname()[1]
+        multiplexer = SubscriptionMultiplexer(f"ws://127.0.0.1:{port}")
+        provider = Provider(connection, Wallet.dummy(), subscriptions=multiplexer)
+        idl = Idl.from_json(Path("tests/idls/basic_1.json").read_text())
+        client = Program(idl, Pubkey.default(), provider).account["MyAccount"]
+        replica = client.replica()
+        await replica.start()
+        for _ in range(100):
+            if replica._error is not None:
+                break
+            await sleep(0.01)
+        with raises(KeyError):
+            len(replica)
+        with raises(KeyError):
+            replica.get(Pubkey.default())
+        with raises(KeyError):
+            await replica.stop()
+        await multiplexer.close()
+
+
+async def _confirm_and_notify(ws: WebSocketServerProtocol, path: str) -> None:
+    """Confirms subscriptions and sends one notification to each."""
+    async for raw in ws:
+        req = json.loads(raw)
+        if not req["method"].endswith("Subscribe"):
+            continue
+        sub_id = req["params"][0]
+        await ws.send(json.dumps({"jsonrpc": "2.0", "id": req["id"], "result": sub_id}))
+        params = {"result": sub_id, "subscription": sub_id}
+        if path == "/malformed":
+            del params["subscription"]
+        await ws.send(json.dumps({"jsonrpc": "2.0", "params": params}))
+
+
+@mark.asyncio
+async def test_failing_transform_ends_only_its_subscription() -> None:
+    def transform(result: Any) -> list[Any]:
+        raise ValueError(f"bad notification {result}")
+
+    async with serve(_confirm_and_notify, "127.0.0.1", 0) as server:
+        port = list(server.sockets)[0].getsockname()[1]
+        multiplexer = SubscriptionMultiplexer(f"ws://127.0.0.1:{port}")
+        failing = await multiplexer.subscribe("logsSubscribe", [1], transform=transform)
+        working = await multiplexer.subscribe("logsSubscribe", [2])
+        with raises(ValueError, match="bad notification 1"):
+            await wait_for(failing.__anext__(), 5)
+        with raises(StopAsyncIteration):
+            await failing.__anext__()
+        assert await wait_for(working.__anext__(), 5) == 2
+        assert multiplexer._task is not None
+        await multiplexer.close()
+
+
+@mark.asyncio
+async def test_unexpected_error_ends_all_subscriptions() -> None:
+    async with serve(_confirm_and_notify, "127.0.0.1", 0) as server:
+        port = list(server.sockets)[0].getsockname()[1]
+        multiplexer = SubscriptionMultiplexer(f"ws://127.0.0.1:{port}/malformed")
+        sub = await multiplexer.subscribe("logsSubscribe", [1])
+        with raises(KeyError):
+            await wait_for(sub.__anext__(), 5)
+        assert multiplexer._task is None
+        await multiplexer.close()
+
+
+@mark.asyncio
+async def test_subscription_overflow_policies() -> None:
+    multiplexer: Any = SimpleNamespace()
+    dropping = Subscription(multiplexer, "logsSubscribe", [], 2)
+    for item in range(3):
+        await dropping._offer(item)
+    assert [await dropping.__anext__() for _ in range(2)] == [1, 2]
+    assert dropping.dropped == 1
+
+    coalescing = Subscription(
+        multiplexer, "logsSubscribe", [], 2, "coalesce", coalesce_key=lambda x: x[0]
+    )
+    for pair in [("a", 1), ("b", 1), ("a", 2), ("c", 1)]:
+        await coalescing._offer(pair)
+    # ("a", 2) replaced ("a", 1) in place, then ("c", 1) pushed it out.
+    assert [await coalescing.__anext__() for _ in range(2)] == [("b", 1), ("c", 1)]
+    assert coalescing.dropped == 2
+    with raises(ValueError):
+        Subscription(multiplexer, "logsSubscribe", [], 2, "coalesce")
+
+    blocking = Subscription(
+        multiplexer, "logsSubscribe", [], 2, "block", transform=lambda r: [r, r]
+    )
+    await blocking._offer(1)
+    offer = ensure_future(blocking._offer(2))
+    await sleep(0)
+    assert not offer.done()
+    assert [await blocking.__anext__() for _ in range(2)] == [1, 1]
+    await wait_for(offer, 5)
+    assert [await blocking.__anext__() for _ in range(2)] == [2, 2]
+    assert blocking.dropped == 0
+    blocking._finish()
+    with raises(StopAsyncIteration):
+        await blocking.__anext__()
+
+
+@mark.asyncio
+async def test_event_subscription(connection: Any) -> None:
+    program_id = Pubkey.from_string("2dhGsWUzy5YKUsjZdLHLmkNpUDAXkNa9MYWsPc4Ziqzy")
+    logs = [
+        f"Program {program_id} invoke [1]",
+        "Program data: YLjF84sCWpQFAAAAAAAAAAUAAABoZWxsbw==",
+        f"Program {program_id} success",
+    ]
+    # The event discriminator followed by too few bytes.
+    malformed_logs = [logs[0], "Program data: YLjF84sCWpQFAA==", logs[2]]
+    malformed, failed, succeeded = (Signature.new_unique() for _ in range(3))
+    requests: list[dict] = []
+
+    async def handler(ws: WebSocketServerProtocol, path: str) -> None:  # noqa: ARG001
+        async for raw in ws:
+            req = json.loads(raw)
+            requests.append(req)
+            if req["method"] != "logsSubscribe":
+                continue
+            await ws.send(json.dumps({"jsonrpc": "2.0", "id": req["id"], "result": 3}))
+            notifications = [
+                (4, malformed, None, malformed_logs),
+                (5, failed, {"e": 1}, logs),
+                (6, succeeded, None, logs),
+            ]
+            for slot, signature, err, tx_logs in notifications:
+                value = {"signature": str(signature), "err": err, "logs": tx_logs}
+                notification = {
+                    "jsonrpc": "2.0",
+                    "method": "logsNotification",
+                    "params": {
+                        "result": {"context": {"slot": slot}, "value": value},
+                        "subscription": 3,
+                    },
+                }
+                await ws.send(json.dumps(notification))
+
+    async with serve(handler, "127.0.0.1", 0) as server:
+        port = list(server.sockets)[0].getsockname()[1]
+        multiplexer = SubscriptionMultiplexer(f"ws://127.0.0.1:{port}")
+        provider = Provider(connection, Wallet.dummy(), subscriptions=multiplexer)
+        idl = Idl.from_json(Path("tests/idls/events.json").read_text())
+        program = Program(idl, program_id, provider)
+        events = program.events.subscribe(names=["MyEvent"])
+        notification = await wait_for(events.__anext__(), 5)
+        assert notification.signature == succeeded
+        assert notification.slot == 6
+        assert notification.event.name == "MyEvent"
+        assert notification.event.data.label == "hello"
+        assert requests[0]["params"] == [
+            {"mentions": [str(program_id)]},
+            {"commitment": "confirmed"},
+        ]
+        await events.aclose()
+        await multiplexer.close()